@@ -4,42 +4,150 @@ This module implements sophisticated AI algorithms including breadth-first
 search, Dinic's maximum flow algorithm, and various heuristics for optimal
 move selection in both blocker and mouse roles.
 """
+import os
 import random
 import math
+import time
 import collections
+import tablebase
+import opening_book
+import learned_eval
+import bfs_engine
 
-def bfs_dist(game, start, blocked):
+_batch_pool = None
+_batch_workers = 0
+_boards = {}
+
+class Config:
+    """Tunable weights of the blocker and mouse heuristics.
+    
+    Attributes:
+        gamma: Growth rate of a candidate's weight with its distance.
+        w1: Weight of a candidate's share of all shortest paths.
+        w2: Weight of a candidate's share within its distance layer.
+        alpha_cut: Weight of the drop in min-cut a wall causes.
+        top_k: Number of best candidates whose min-cut drop is computed.
+        mouse_power: Exponent of the distance falloff in score_mouse.
+        book: Whether best_wall may answer from the opening book.
+        learned: Whether best_wall may answer from the learned model;
+            best_wall without a config turns it on once the model has
+            been accepted by tune.py.
+    """
+    FIELDS = ("gamma", "w1", "w2", "alpha_cut", "top_k", "mouse_power", "book", "learned")
+
+    def __init__(self, gamma=0.7, w1=0.5, w2=0.5, alpha_cut=1.0, top_k=15, mouse_power=2.0,
+                 book=True, learned=False):
+        self.gamma = gamma
+        self.w1 = w1
+        self.w2 = w2
+        self.alpha_cut = alpha_cut
+        self.top_k = top_k
+        self.mouse_power = mouse_power
+        self.book = book
+        self.learned = learned
+
+    def replace(self, **changes):
+        """Return a copy with some fields changed."""
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        values.update(changes)
+        return Config(**values)
+
+    def __eq__(self, other):
+        return isinstance(other, Config) and all(
+            getattr(self, name) == getattr(other, name) for name in self.FIELDS)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.FIELDS))
+
+    def __repr__(self):
+        return "Config(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS) + ")"
+
+DEFAULT_CONFIG = Config()
+_ACCEPTED_CONFIG = DEFAULT_CONFIG.replace(learned=True)
+
+
+def default_config():
+    """Return DEFAULT_CONFIG, with the learned model on if it was accepted."""
+    return _ACCEPTED_CONFIG if learned_eval.model_accepted() else DEFAULT_CONFIG
+
+def bfs_dist(game, start, blocked, to_exit=False):
     """Calculate distances from start to all reachable cells using BFS.
     
     Args:
         game: Game instance containing grid and neighbor information.
         start: Starting cell tuple (q, r).
         blocked: Set of blocked/wall cells.
+        to_exit: Stop once the layer of the nearest exit is complete,
+            leaving out every cell further away (default False).
     
     Returns:
         Dictionary mapping cell coordinates to their distance from start.
     """
     queue = collections.deque([(start, 0)])
     viz = {start: 0}
+    limit = 0 if to_exit and game.final_hex(start) else None
     while queue:
         nod, dist = queue.popleft()
+        # The first cell of the exit layer is popped once that whole
+        # layer has been discovered.
+        if limit is not None and dist >= limit:
+            break
         for n in game.get_neighbors(*nod):
             if n in game.cells and n not in blocked and n not in viz:
                 viz[n] = dist + 1
                 queue.append((n, dist + 1))
+                if to_exit and limit is None and game.final_hex(n):
+                    limit = dist + 1
     return viz
 
-def dp_IN_OUT(game, dist, blocked, start):
+def shortest_path_dag(game, start, blocked):
+    """Collect the cells on the shortest paths to the nearest exits.
+    
+    The BFS stops at the nearest exit layer, and a backward pass from
+    the exits keeps only the cells that lead to one of them, i.e. those
+    with both IN > 0 and OUT > 0 in dp_IN_OUT. Path counts, flows and
+    wall candidates over this DAG are the same as over the whole board,
+    but cost in proportion to the escape corridors, not the board area.
+    
+    Args:
+        game: Game instance.
+        start: Starting cell for the mouse.
+        blocked: Set of blocked/wall cells.
+    
+    Returns:
+        Dictionary mapping each cell of the DAG to its distance from
+        start, in the form of bfs_dist; empty if no exit is reachable.
+    """
+    dist = bfs_dist(game, start, blocked, to_exit=True)
+    min_dist = max(dist.values())
+    layer = [u for u, d in dist.items() if d == min_dist and game.final_hex(u)]
+    if not layer:
+        return {}
+    keep = set(layer)
+    for d in range(min_dist - 1, -1, -1):
+        layer = {v for u in layer for v in game.get_neighbors(*u) if dist.get(v) == d}
+        keep |= layer
+    # In BFS order, which decides the order of equally scored candidates.
+    return {u: d for u, d in dist.items() if u in keep}
+
+def dp_IN_OUT(game, dist, blocked, start, normalized=False):
     """Calculate incoming and outgoing path counts using dynamic programming.
     
+    In exact mode the counts are Python ints, which grow combinatorially
+    with the distance to the exits. In normalized mode every BFS layer is
+    rescaled as it is produced, so all values stay floats in [0, 1] and
+    IN[u] * OUT[u] is directly the share of shortest paths through u.
+    
     Args:
         game: Game instance.
         dist: Dictionary of distances from start to cells.
         blocked: Set of blocked cells.
         start: Starting cell.
+        normalized: Use per-layer renormalized floats (default False).
     
     Returns:
         Tuple of (IN, OUT, total) where IN/OUT are dicts of path counts.
+        In normalized mode total is 1.0 when an exit is reachable.
     """
     edge_nodes = [n for n in dist if game.final_hex(n)]
     if not edge_nodes: return {}, {}, 0
@@ -50,29 +158,61 @@ def dp_IN_OUT(game, dist, blocked, start):
     IN = collections.defaultdict(int)
     OUT = collections.defaultdict(int)
 
-    nods = sorted(dist.keys(), key=lambda x: dist[x])
+    layers = collections.defaultdict(list)
+    for u in dist:
+        layers[dist[u]].append(u)
+
     IN[start] = 1
 
-    for u in nods:
-        if IN[u] == 0: continue
-        d_u = dist[u]
-        for v in game.get_neighbors(*u):
-            if v in dist and v not in blocked and dist[v] == d_u + 1:
-                IN[v] += IN[u]
+    for d in sorted(layers):
+        for u in layers[d]:
+            if IN[u] == 0: continue
+            for v in game.get_neighbors(*u):
+                if v in dist and v not in blocked and dist[v] == d + 1:
+                    IN[v] += IN[u]
+        if normalized:
+            _normalize_layer(IN, layers[d + 1])
 
     for ex in exits:
         OUT[ex] = 1 
 
-    nods = sorted(dist.keys(), key=lambda x: -dist[x])
-    for u in nods:
-        if OUT[u] == 0 and u not in exits: continue
-        d_u = dist[u]
-        for v in game.get_neighbors(*u):
-            if v in dist and v not in blocked and dist[v] == d_u - 1:
-                OUT[v] += OUT[u]
+    for d in sorted(layers, reverse=True):
+        for u in layers[d]:
+            if OUT[u] == 0 and u not in exits: continue
+            for v in game.get_neighbors(*u):
+                if v in dist and v not in blocked and dist[v] == d - 1:
+                    OUT[v] += OUT[u]
+        if normalized:
+            _normalize_layer(OUT, layers[d - 1])
 
-    total = OUT[start]
-    return IN, OUT, total
+    if not normalized:
+        return IN, OUT, OUT[start]
+
+    if OUT[start] == 0:
+        return IN, OUT, 0
+    for d in range(min_dist + 1):
+        through = sum(IN[u] * OUT[u] for u in layers[d])
+        if through > 0:
+            for u in layers[d]:
+                OUT[u] /= through
+    return IN, OUT, 1.0
+
+def _normalize_layer(counts, layer):
+    """Rescale the counts of one BFS layer so that they sum to 1."""
+    s = sum(counts[u] for u in layer)
+    if s > 0:
+        for u in layer:
+            counts[u] /= s
+
+def _round_score(x):
+    """Round a score to 12 significant digits.
+    
+    Normalized path counts reach the same shares as the exact integer
+    counts through a different sequence of float operations, so equal
+    scores can differ in the last bits. Rounding keeps such ties equal
+    and the candidate ranking independent of the counting mode.
+    """
+    return float(f"{x:.12g}")
 
 def build_dinic(game, start, blocked):
     """Build a flow network graph for Dinic's algorithm.
@@ -85,7 +225,7 @@ def build_dinic(game, start, blocked):
     Returns:
         Tuple of (graph, source_node, target_node) or (None, None, None).
     """
-    dist = bfs_dist(game, start, blocked)
+    dist = shortest_path_dag(game, start, blocked)
     edge_nodes = [n for n in dist if game.final_hex(n)]
     
     if not edge_nodes: 
@@ -171,37 +311,206 @@ def dinic(S, T, graph):
             max_flow += pushed
     return max_flow
 
-def best_wall(game, mouse_pos, blocked):
-    """Determine the optimal wall placement to block the mouse.
+def unit_flow_cut(game, start, blocked, dist=None):
+    """Compute the minimum vertex cut between the mouse and the nearest exits.
     
-    Uses a combination of path probability analysis and max-flow cut
-    calculations to find the wall position that maximally disrupts
-    the mouse's escape routes.
+    Solves the same problem as build_dinic + dinic, but directly on the
+    layered DAG of shortest paths: every cell except start has capacity 1
+    and the edges are uncapacitated, so the max flow is the number of
+    vertex-disjoint shortest escape paths. Augmenting paths are found by a
+    BFS over (cell, side) states using the flow marks kept on the cells
+    instead of an explicit residual graph.
+    
+    Args:
+        game: Game instance.
+        start: Starting cell for the mouse.
+        blocked: Set of blocked/wall cells.
+        dist: Optional precomputed result of shortest_path_dag(game, start,
+            blocked) or bfs_dist(game, start, blocked).
+    
+    Returns:
+        Tuple of (cut_value, cut_cells, flow_cells) where cut_cells is a
+        minimum set of cells separating start from the nearest exits and
+        flow_cells are the cells carrying flow. cut_value is None when no
+        exit is reachable.
+    """
+    if dist is None:
+        dist = shortest_path_dag(game, start, blocked)
+    edge_nodes = [n for n in dist if game.final_hex(n)]
+    if not edge_nodes:
+        return None, set(), set()
+
+    min_dist = min(dist[n] for n in edge_nodes)
+    if min_dist == 0:
+        return 10**9, set(), set()
+
+    succ = {}
+    for u in dist:
+        d_u = dist[u]
+        if d_u < min_dist:
+            succ[u] = [v for v in game.get_neighbors(*u)
+                       if v in dist and v not in blocked and dist[v] == d_u + 1]
+        elif d_u == min_dist:
+            succ[u] = []
+    exits = {u for u in succ if dist[u] == min_dist and game.final_hex(u)}
+
+    through = set()
+    flow_in = collections.defaultdict(set)
+
+    def residual(u, side):
+        if side == 0:
+            if u == start:
+                yield (u, 1), None
+            elif u not in through:
+                yield (u, 1), ("enter", u)
+            for x in flow_in[u]:
+                yield (x, 1), ("unflow", x, u)
+        else:
+            if u in exits:
+                yield "T", None
+            if u in through:
+                yield (u, 0), ("leave", u)
+            for v in succ[u]:
+                yield (v, 0), ("flow", u, v)
+
+    def search():
+        prev = {(start, 1): None, (start, 0): None}
+        queue = collections.deque([(start, 1)])
+        while queue:
+            state = queue.popleft()
+            for nxt, step in residual(*state):
+                if nxt in prev:
+                    continue
+                prev[nxt] = (state, step)
+                if nxt == "T":
+                    return prev
+                queue.append(nxt)
+        return prev
+
+    flow = 0
+    while True:
+        prev = search()
+        if "T" not in prev:
+            break
+        state = "T"
+        while prev[state] is not None:
+            state, step = prev[state]
+            if step is None:
+                continue
+            if step[0] == "enter":
+                through.add(step[1])
+            elif step[0] == "leave":
+                through.discard(step[1])
+            elif step[0] == "flow":
+                flow_in[step[2]].add(step[1])
+            else:
+                flow_in[step[2]].discard(step[1])
+        flow += 1
+
+    cut_cells = {state[0] for state in prev
+                 if state[1] == 0 and (state[0], 1) not in prev}
+    return flow, cut_cells, set(through)
+
+def _common_dominator(a, b, idom, depth):
+    """Return the nearest common ancestor of a and b in the dominator tree."""
+    while a != b:
+        while depth[a] > depth[b]:
+            a = idom[a]
+        while depth[b] > depth[a]:
+            b = idom[b]
+        if a != b:
+            a, b = idom[a], idom[b]
+    return a
+
+def chokepoints(game, start, blocked, dist=None):
+    """Find the cells that every shortest escape path goes through.
+    
+    Builds the DAG of shortest paths from start to the nearest exits (the
+    BFS layers dp_IN_OUT counts on) with a virtual sink behind the exits,
+    and computes its dominator tree in one pass over the layers, which
+    are a topological order: a cell's immediate dominator is the common
+    dominator-tree ancestor of its predecessors. The dominators of the
+    sink are the cells whose wall leaves no shortest escape path; there
+    are some exactly when unit_flow_cut's cut is 1.
+    
+    Args:
+        game: Game instance.
+        start: Starting cell for the mouse.
+        blocked: Set of blocked/wall cells.
+        dist: Optional precomputed result of shortest_path_dag(game, start,
+            blocked) or bfs_dist(game, start, blocked).
+    
+    Returns:
+        List of the dominators of the sink other than start, nearest to
+        the mouse first. Empty if no exit is reachable or start is an exit.
+    """
+    if dist is None:
+        dist = shortest_path_dag(game, start, blocked)
+    exit_dists = [dist[n] for n in dist if game.final_hex(n)]
+    if not exit_dists or min(exit_dists) == 0:
+        return []
+    min_dist = min(exit_dists)
+
+    layers = [[] for _ in range(min_dist + 1)]
+    for u, d in dist.items():
+        if d <= min_dist:
+            layers[d].append(u)
+
+    idom = {start: None}
+    depth = {start: 0}
+    for d in range(1, min_dist + 1):
+        for v in layers[d]:
+            preds = [u for u in game.get_neighbors(*v) if dist.get(u) == d - 1]
+            dom = preds[0]
+            for u in preds[1:]:
+                dom = _common_dominator(dom, u, idom, depth)
+            idom[v] = dom
+            depth[v] = depth[dom] + 1
+
+    exits = [v for v in layers[min_dist] if game.final_hex(v)]
+    sink_dom = exits[0]
+    for v in exits[1:]:
+        sink_dom = _common_dominator(sink_dom, v, idom, depth)
+    cuts = []
+    while sink_dom != start:
+        cuts.append(sink_dom)
+        sink_dom = idom[sink_dom]
+    cuts.reverse()
+    return cuts
+
+def wall_candidates(game, mouse_pos, blocked, dist=None, config=None):
+    """Score every cell on a shortest escape path as a wall candidate.
+    
+    A cell's score combines its share of all shortest escape paths with
+    its share within its own distance layer, weighted up exponentially
+    for cells further from the mouse.
     
     Args:
         game: Game instance.
         mouse_pos: Current mouse position tuple (q, r).
         blocked: Set of currently blocked cells.
+        dist: Optional precomputed result of shortest_path_dag(game,
+            mouse_pos, blocked) or bfs_dist(game, mouse_pos, blocked).
+        config: Heuristic weights (default DEFAULT_CONFIG).
     
     Returns:
-        Cell coordinates (q, r) for optimal wall placement, or None.
+        List of (cell, score) tuples sorted by decreasing score, empty if
+        no exit is reachable.
     """
-    dist = bfs_dist(game, mouse_pos, blocked)
-    if not dist: 
-        opts = [c for c in game.cells if c not in blocked and c != mouse_pos]
-        return random.choice(opts) if opts else None
+    config = config or DEFAULT_CONFIG
+    if dist is None:
+        dist = shortest_path_dag(game, mouse_pos, blocked)
 
-    IN, OUT, total = dp_IN_OUT(game, dist, blocked, mouse_pos)
+    IN, OUT, total = dp_IN_OUT(game, dist, blocked, mouse_pos, normalized=True)
     
     if total == 0:
-        opts = [c for c in game.cells if c not in blocked and c != mouse_pos]
-        return random.choice(opts) if opts else None
+        return []
 
     candidates = []
     
-    gamma = 0.7      
-    w1 = 0.5          
-    w2 = 0.5          
+    gamma = config.gamma
+    w1 = config.w1
+    w2 = config.w2
     
     level_sums = collections.defaultdict(int)
     for u in dist:
@@ -226,36 +535,65 @@ def best_wall(game, mouse_pos, blocked):
         w_time = math.exp(gamma * lead)
         
         base_score = w_time * (w1 * share + w2 * level_norm)
-        candidates.append((u, base_score))
+        candidates.append((u, _round_score(base_score)))
+
+    candidates.sort(key=lambda x: x[1], reverse=True)
+    return candidates
+
+def best_wall(game, mouse_pos, blocked, config=None):
+    """Determine the optimal wall placement to block the mouse.
+    
+    Uses a combination of path probability analysis and max-flow cut
+    calculations to find the wall position that maximally disrupts
+    the mouse's escape routes. When config.learned is set and a model
+    has been trained, its top-ranked cell is played instead.
+    
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position tuple (q, r).
+        blocked: Set of currently blocked cells.
+        config: Heuristic weights (default default_config()).
+    
+    Returns:
+        Cell coordinates (q, r) for optimal wall placement, or None.
+    """
+    config = config or default_config()
+    solved = tablebase.probe_wall(game, mouse_pos, blocked)
+    if solved:
+        return solved[0]
+
+    if config.book:
+        book = opening_book.probe(game, mouse_pos, blocked)
+        if book is not None and book not in blocked:
+            return book
+
+    if config.learned:
+        ranked = learned_eval.rank_walls(game, mouse_pos, blocked)
+        if ranked:
+            return ranked[0][0]
+
+    dist = shortest_path_dag(game, mouse_pos, blocked)
+    candidates = wall_candidates(game, mouse_pos, blocked, dist, config)
 
     if not candidates:
-            opts = [c for c in game.cells if c not in blocked and c != mouse_pos]
-            return random.choice(opts) if opts else None
+        opts = [c for c in game.cells if c not in blocked and c != mouse_pos]
+        return random.choice(opts) if opts else None
 
-    candidates.sort(key=lambda x: x[1], reverse=True)
-    top_k = candidates[:15]
+    top_k = candidates[:config.top_k]
     
-    base_graph, S, T = build_dinic(game, mouse_pos, blocked)
-    if not base_graph: 
+    base_cut, cut_cells, nodes_in_flow = unit_flow_cut(game, mouse_pos, blocked, dist)
+    # With a single-cell cut no wall can lower the cut any further (a new
+    # cut is at least 1 while an exit is reachable), so every marginal cut
+    # is 0 and the flow computations below would not change the ranking.
+    if base_cut is None or base_cut == 1:
         return top_k[0][0]
     
-    base_cut = dinic(S, T, base_graph)
+    top_k += [c for c in candidates[config.top_k:] if c[0] in cut_cells]
     
     best_hex = None
     max_score = -10**9
-    alpha_cut = 1.0
+    alpha_cut = config.alpha_cut
     
-    nodes_in_flow = set()
-    for u in dist:
-        if u == mouse_pos: 
-            continue
-        u_in = f"{u}_in"
-        if u_in in base_graph:
-            for v, cap, rev in base_graph[u_in]:
-                if v == f"{u}_out" and cap == 0:
-                    nodes_in_flow.add(u)
-                    break
-
     for u, base_val in top_k:
         marginal_cut = 0
         
@@ -265,9 +603,8 @@ def best_wall(game, mouse_pos, blocked):
             temp_blocked = blocked.copy()
             temp_blocked.add(u)
             
-            temp_graph, tS, tT = build_dinic(game, mouse_pos,temp_blocked)
-            if temp_graph:
-                new_cut = dinic(tS, tT, temp_graph)
+            new_cut, _, _ = unit_flow_cut(game, mouse_pos, temp_blocked)
+            if new_cut is not None:
                 marginal_cut = max(0, base_cut - new_cut)
         
         score = base_val + (alpha_cut * marginal_cut)
@@ -278,6 +615,70 @@ def best_wall(game, mouse_pos, blocked):
 
     return best_hex if best_hex else top_k[0][0]
 
+def region_wall(game, mouse_pos, blocked, region):
+    """Choose a wall that shrinks an enclosed mouse's region fastest.
+    
+    Once the mouse cannot reach the boundary the outcome is decided, so
+    only the mouse's free neighbors are considered: the wall that leaves
+    the mouse the fewest reachable cells is chosen, preferring the
+    neighbor with the most free neighbors of its own on ties.
+    
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position tuple (q, r).
+        blocked: Set of currently blocked cells.
+        region: Set of free cells reachable by the mouse.
+    
+    Returns:
+        Cell coordinates (q, r) for the wall, or None.
+    """
+    solved = tablebase.probe_wall(game, mouse_pos, blocked)
+    if solved:
+        return solved[0]
+
+    options = [n for n in game.get_neighbors(*mouse_pos) if n in region]
+    if not options:
+        opts = [c for c in game.cells if c not in blocked and c != mouse_pos]
+        return random.choice(opts) if opts else None
+
+    def left_after(wall):
+        seen = {mouse_pos, wall}
+        stack = [mouse_pos]
+        while stack:
+            u = stack.pop()
+            for n in game.get_neighbors(*u):
+                if n in region and n not in seen:
+                    seen.add(n)
+                    stack.append(n)
+        return len(seen) - 1
+
+    def degree(cell):
+        return sum(1 for n in game.get_neighbors(*cell) if n in region)
+
+    return min(options, key=lambda n: (left_after(n), -degree(n)))
+
+def region_move_mouse(game, mouse_pos, blocked, region):
+    """Choose a move for an enclosed mouse that delays the trap.
+    
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+        region: Set of free cells reachable by the mouse.
+    
+    Returns:
+        Neighbor cell (q, r) with the most free neighbors, or None.
+    """
+    solved = tablebase.probe_mouse(game, mouse_pos, blocked)
+    if solved:
+        return solved[0]
+
+    options = [n for n in game.get_neighbors(*mouse_pos) if n in region]
+    if not options:
+        return None
+    return max(options, key=lambda n: sum(1 for m in game.get_neighbors(*n)
+                                          if m in region and m != mouse_pos))
+
 def winning_hex(game, blocked):
     """Identify cells that guarantee mouse victory if reached.
     
@@ -314,7 +715,7 @@ def winning_hex(game, blocked):
 
     return hexes
 
-def score_mouse(game, move, blocked, win_hexes):
+def score_mouse(game, move, blocked, win_hexes, config=None):
     """Calculate a score for a potential mouse move.
     
     Args:
@@ -322,10 +723,12 @@ def score_mouse(game, move, blocked, win_hexes):
         move: Candidate move cell (q, r).
         blocked: Set of blocked cells.
         win_hexes: Dictionary of winning positions.
+        config: Heuristic weights (default DEFAULT_CONFIG).
     
     Returns:
         Numeric score (higher is better, 10^9 for winning moves).
     """
+    power = (config or DEFAULT_CONFIG).mouse_power
     if move in win_hexes:
         return 10**9
         
@@ -338,7 +741,7 @@ def score_mouse(game, move, blocked, win_hexes):
         
         if game.final_hex(curr):
             ok = True
-            weight = 100.0 / math.pow(dist + 1.0, 2)
+            weight = 100.0 / math.pow(dist + 1.0, power)
             total += weight
         
         for n in game.get_neighbors(*curr):
@@ -349,13 +752,14 @@ def score_mouse(game, move, blocked, win_hexes):
         return -10**9
     return total
 
-def best_move_mouse(game, mouse_pos, blocked):
+def best_move_mouse(game, mouse_pos, blocked, config=None):
     """Determine the best move for the mouse using advanced heuristics.
     
     Args:
         game: Game instance.
         mouse_pos: Current mouse position (q, r).
         blocked: Set of blocked cells.
+        config: Heuristic weights (default DEFAULT_CONFIG).
     
     Returns:
         Best move cell coordinates (q, r), or None if no valid moves.
@@ -371,16 +775,20 @@ def best_move_mouse(game, mouse_pos, blocked):
     
     if not valid_moves:
         return None
+
+    solved = tablebase.probe_mouse(game, mouse_pos, blocked)
+    if solved:
+        return solved[0]
         
     win_hexes = winning_hex(game, blocked)
+    scores = bfs_engine.score_moves(game, valid_moves, blocked, win_hexes, config)
     best_move = None
     best_score = -10**9
     
-    for move in valid_moves:
+    for move, score in zip(valid_moves, scores):
         if game.final_hex(move):
             return move
             
-        score = score_mouse(game, move, blocked, win_hexes)
         score += random.uniform(0, 0.1)
         
         if score > best_score:
@@ -388,16 +796,19 @@ def best_move_mouse(game, mouse_pos, blocked):
             best_move = move
     return best_move if best_move else random.choice(valid_moves)
 
-def get_shortest_path(game, start_pos):
+def get_shortest_path(game, start_pos, blocked=None):
     """Find the first move on the shortest path to the grid edge.
     
     Args:
         game: Game instance.
         start_pos: Starting position (q, r).
+        blocked: Set of blocked cells (default game.walls).
     
     Returns:
         Next move coordinates (q, r) towards nearest edge, or None.
     """
+    if blocked is None:
+        blocked = game.walls
     queue = collections.deque([start_pos])
     prev = {start_pos: None}
     while queue:
@@ -413,7 +824,91 @@ def get_shortest_path(game, start_pos):
             if nb not in game.cells:
                 if prev.get(u) == start_pos:
                     return nb
-            if nb not in game.walls and nb not in prev and nb in game.cells:
+            if nb not in blocked and nb not in prev and nb in game.cells:
                 prev[nb] = u
                 queue.append(nb)
     return None
+
+def _board(w, h):
+    """Return this process's wall-free Game of a board size."""
+    board = _boards.get((w, h))
+    if board is None:
+        from game import Game
+        board = _boards[(w, h)] = Game(w=w, h=h, n_obs=0)
+    return board
+
+def solve_position(w, h, walls, pos, turn, difficulty):
+    """Choose the move of one position on this process's board of its size.
+    
+    Args:
+        w: Grid width.
+        h: Grid height.
+        walls: Iterable of wall cells.
+        pos: Mouse cell.
+        turn: Side to move, 0 for the blocker and 1 for the mouse.
+        difficulty: AI difficulty.
+    
+    Returns:
+        The wall or mouse destination chosen, or None.
+    """
+    game = _board(w, h).clone_position()
+    game.walls = set(walls)
+    game.pos = pos
+    game.turn = turn
+    game.update_region()
+    if turn == 0:
+        return game.choose_blocker_wall(difficulty)
+    return game.choose_mouse_move(difficulty)
+
+def _get_batch_pool(workers):
+    global _batch_pool, _batch_workers
+    if _batch_pool is None or _batch_workers != workers:
+        import shared_positions
+        if _batch_pool is not None:
+            _batch_pool.close()
+        _batch_pool = shared_positions.PositionPool(workers)
+        _batch_workers = workers
+    return _batch_pool
+
+def best_moves_batch(positions, difficulty="HARD", workers=None, stats=None):
+    """Choose the AI moves of many positions in one call.
+    
+    Positions may come from games of different board sizes. Identical
+    positions are computed once, and the rest is handed to a persistent
+    pool of workers through shared memory (shared_positions), one
+    position per slot, so no Game or wall set is pickled per task.
+    
+    Args:
+        positions: Iterable of Game instances or (w, h, walls, pos, turn)
+            tuples, each with the side to move given by turn.
+        difficulty: AI difficulty of the moves (default "HARD").
+        workers: Worker processes, 1 computes in-process (default
+            os.cpu_count()).
+        stats: Optional dict that receives moves, unique, seconds and
+            moves_per_sec of the call.
+    
+    Returns:
+        List with the wall (blocker to move) or mouse destination (mouse
+        to move) of each position, None where the side has no move.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    keys = []
+    for p in positions:
+        if not isinstance(p, tuple):
+            p = (p.w, p.h, p.walls, p.pos, p.turn)
+        w, h, walls, pos, turn = p
+        keys.append((w, h, frozenset(walls), pos, turn, difficulty))
+
+    unique = list(dict.fromkeys(keys))
+    if workers > 1 and len(unique) > 1:
+        moves = _get_batch_pool(workers).map(unique)
+    else:
+        moves = [solve_position(*k) for k in unique]
+    answers = dict(zip(unique, moves))
+
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats.update(moves=len(keys), unique=len(unique), seconds=elapsed,
+                     moves_per_sec=len(keys) / elapsed if elapsed > 0 else 0.0)
+    return [answers[k] for k in keys]
@@ -0,0 +1,137 @@
+"""Batch analysis of saved games.
+
+Streams save files through Game.load_from_file in a worker pool and
+writes one JSON line per position with the HARD recommendations, the
+mouse's distance to the edge, the base min-cut and a proof-search
+verdict. Files are taken lazily from the glob and at most WINDOW of them
+are in flight, so memory stays constant however many saves there are.
+Lines are written in input order as soon as they are ready.
+
+Usage:
+    python analyze.py saves/*.sav --out analysis.jsonl --nodes 2000 --history
+"""
+import sys
+import os
+import glob
+import json
+import collections
+import multiprocessing
+import ai_logic
+import proof_search
+from game import Game
+
+WINDOW = 64
+VERDICT_NODES = 2000
+
+
+def analyze_position(game, nodes=VERDICT_NODES):
+    """Analyze the current position of a game.
+
+    Args:
+        game: Game instance.
+        nodes: Node budget of the proof search (default VERDICT_NODES).
+
+    Returns:
+        Dict with turn, over, winner, hard_wall, hard_mouse,
+        edge_distance, base_cut and verdict ("BLOCKER", "MOUSE" or None
+        when the proof search ran out of budget).
+    """
+    info = {"turn": game.turn, "over": game.over, "winner": game.winner,
+            "walls": len(game.walls), "pos": game.pos}
+    if game.over:
+        info["verdict"] = game.winner
+        return info
+    dist = ai_logic.bfs_dist(game, game.pos, game.walls)
+    edge = [d for c, d in dist.items() if game.final_hex(c)]
+    info["edge_distance"] = min(edge) if edge else None
+    info["base_cut"] = ai_logic.unit_flow_cut(game, game.pos, game.walls, dist)[0]
+    info["hard_wall"] = game.choose_blocker_wall("HARD")
+    info["hard_mouse"] = game.choose_mouse_move("HARD")
+    status, _ = proof_search.prove(game, max_nodes=nodes)
+    info["verdict"] = {proof_search.PROVEN: "BLOCKER",
+                       proof_search.DISPROVEN: "MOUSE"}.get(status)
+    return info
+
+
+def analyze_file(task):
+    """Worker entry point: analyze one save file.
+
+    Args:
+        task: Tuple of (path, nodes, history).
+
+    Returns:
+        List of JSON lines for the file's positions.
+    """
+    path, nodes, history = task
+    g = Game.load_from_file(os.path.basename(path), os.path.dirname(path))
+    if g is None:
+        return [json.dumps({"file": path, "error": "cannot load"})]
+    lines = []
+    if history:
+        for ply, st in enumerate(g.history):
+            past = g.clone_position()
+            past.walls, past.pos, past.turn = set(st['walls']), st['pos'], st['turn']
+            past.over, past.winner = st['over'], st['winner']
+            past.update_region()
+            lines.append(json.dumps({"file": path, "ply": ply, **analyze_position(past, nodes)}))
+    lines.append(json.dumps({"file": path, "ply": len(g.history), **analyze_position(g, nodes)}))
+    return lines
+
+
+def paths(patterns):
+    """Yield the save files matching patterns, one at a time."""
+    for pattern in patterns:
+        yield from glob.iglob(pattern)
+
+
+def run(patterns, out, nodes=VERDICT_NODES, history=False, workers=None, window=WINDOW):
+    """Analyze every matching save and stream the results.
+
+    Args:
+        patterns: Glob patterns of save files.
+        out: Writable text file for the JSON lines.
+        nodes: Node budget of each proof search (default VERDICT_NODES).
+        history: Also analyze every earlier position of each game.
+        workers: Worker processes (default os.cpu_count()).
+        window: Maximum number of files in flight (default WINDOW).
+
+    Returns:
+        Number of files analyzed.
+    """
+    done = 0
+    pending = collections.deque()
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for path in paths(patterns):
+            pending.append(pool.apply_async(analyze_file, ((path, nodes, history),)))
+            if len(pending) >= window:
+                out.write("\n".join(pending.popleft().get()) + "\n")
+                out.flush()
+                done += 1
+        while pending:
+            out.write("\n".join(pending.popleft().get()) + "\n")
+            out.flush()
+            done += 1
+    return done
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--out": None, "--nodes": str(VERDICT_NODES), "--workers": None}
+    for name in options:
+        if name in args:
+            i = args.index(name)
+            options[name] = args[i + 1]
+            del args[i:i + 2]
+    history = "--history" in args
+    if history:
+        args.remove("--history")
+    if not args:
+        args = [os.path.join("saves", "*.sav")]
+
+    workers = int(options["--workers"]) if options["--workers"] else None
+    if options["--out"]:
+        with open(options["--out"], "w") as f:
+            count = run(args, f, int(options["--nodes"]), history, workers)
+    else:
+        count = run(args, sys.stdout, int(options["--nodes"]), history, workers)
+    print(f"{count} files analyzed", file=sys.stderr)
@@ -0,0 +1,92 @@
+"""Fonts loaded without a system font scan on every start.
+
+pygame.font.SysFont scans every installed font each time the program
+starts (fc-list on Linux, the registry on Windows), which can take longer
+than everything else before the first frame together. Here a font is
+looked up once: in the FONT_FOLDER bundled with the game if it has the
+file, otherwise through pygame's font matching, whose answer is kept in
+a small JSON file in CACHE_FOLDER so later starts open the font file
+directly. Delete the cache file to look the fonts up again.
+"""
+import os
+import json
+import pygame
+
+FONT_FOLDER = "fonts"
+CACHE_FOLDER = "cache"
+FONT_CACHE_FILE = "fonts.json"
+
+_font_paths = None
+
+
+def _cache_file():
+    return os.path.join(CACHE_FOLDER, FONT_CACHE_FILE)
+
+
+def _load_cache():
+    global _font_paths
+    if _font_paths is None:
+        try:
+            with open(_cache_file()) as f:
+                _font_paths = json.load(f)
+        except (OSError, ValueError):
+            _font_paths = {}
+    return _font_paths
+
+
+def _save_cache():
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
+    tmp = _cache_file() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(_font_paths, f, indent=1)
+    os.replace(tmp, _cache_file())
+
+
+def font_path(name, bold=False):
+    """Find the file of a font, scanning the system fonts at most once.
+
+    Args:
+        name: Font family name, e.g. "Arial".
+        bold: Whether the bold face is wanted (default False).
+
+    Returns:
+        Tuple of (path, fake_bold): the font file, None for pygame's
+        default font, and whether bold has to be synthesized because the
+        family has no bold face.
+    """
+    base = os.path.join(FONT_FOLDER, name.lower())
+    if bold and os.path.exists(base + "-bold.ttf"):
+        return base + "-bold.ttf", False
+    if os.path.exists(base + ".ttf"):
+        return base + ".ttf", bold
+    key = f"{name.lower()}:{'bold' if bold else 'regular'}"
+    paths = _load_cache()
+    entry = paths.get(key)
+    if entry is not None and (entry[0] is None or os.path.exists(entry[0])):
+        return entry[0], entry[1]
+    path = pygame.font.match_font(name, bold=bold)
+    fake_bold = bold and (path is None or path == pygame.font.match_font(name))
+    paths[key] = [path, fake_bold]
+    try:
+        _save_cache()
+    except OSError:
+        pass
+    return path, fake_bold
+
+
+def load_font(name, size, bold=False):
+    """Open a font like pygame.font.SysFont, without the font scan.
+
+    Args:
+        name: Font family name, e.g. "Arial".
+        size: Font size in points.
+        bold: Whether to use the bold face (default False).
+
+    Returns:
+        Pygame Font object.
+    """
+    path, fake_bold = font_path(name, bold)
+    font = pygame.font.Font(path, size)
+    if fake_bold:
+        font.set_bold(True)
+    return font
@@ -0,0 +1,86 @@
+"""Throughput benchmark of ai_logic.best_moves_batch.
+
+Builds a batch of positions from simulated concurrent games of mixed
+board sizes, then times the batch API with growing worker counts against
+a plain loop over Game.choose_* calls, and prints moves per second,
+speedup and efficiency per worker.
+
+Usage:
+    python batch_bench.py --positions 400 --sizes 11,13,15
+"""
+import sys
+import os
+import time
+import random
+import ai_logic
+from game import Game
+
+
+def sample_positions(count, sizes, seed=0):
+    """Generate positions reached in randomly played games.
+
+    Args:
+        count: Number of positions.
+        sizes: Board sizes to draw from.
+        seed: Random seed (default 0).
+
+    Returns:
+        List of (w, h, walls, pos, turn) tuples with the game not over.
+    """
+    random.seed(seed)
+    positions = []
+    while len(positions) < count:
+        size = random.choice(sizes)
+        g = Game(w=size, h=size, auto_resolve=True)
+        for _ in range(random.randint(0, 8)):
+            if g.over:
+                break
+            if g.turn == 0:
+                g.apply_blocker_wall(random.choice([c for c in g.cells
+                                                    if c not in g.walls and c != g.pos]))
+            else:
+                g.apply_mouse_move(g.choose_mouse_move("MEDIUM"))
+        if not g.over:
+            positions.append((g.w, g.h, frozenset(g.walls), g.pos, g.turn))
+    return positions
+
+
+def sequential(positions, difficulty="HARD"):
+    """Compute the moves one position at a time, as the GUI does."""
+    moves = []
+    for w, h, walls, pos, turn in positions:
+        g = Game(w=w, h=h, n_obs=0)
+        g.walls, g.pos, g.turn = set(walls), pos, turn
+        g.update_region()
+        moves.append(g.choose_blocker_wall(difficulty) if turn == 0
+                     else g.choose_mouse_move(difficulty))
+    return moves
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--positions": "300", "--sizes": "11,13,15", "--difficulty": "HARD"}
+    for name in options:
+        if name in args:
+            options[name] = args[args.index(name) + 1]
+    sizes = [int(s) for s in options["--sizes"].split(",")]
+    positions = sample_positions(int(options["--positions"]), sizes)
+    difficulty = options["--difficulty"]
+
+    t = time.perf_counter()
+    sequential(positions, difficulty)
+    loop_rate = len(positions) / (time.perf_counter() - t)
+    print(f"{os.cpu_count()} cores, {len(positions)} positions")
+    print(f"sequential loop: {loop_rate:8.1f} moves/s")
+
+    counts = sorted({1, 2, 4, 8, 16, os.cpu_count() or 1})
+    base = None
+    for workers in [n for n in counts if n <= (os.cpu_count() or 1)]:
+        stats = {}
+        ai_logic.best_moves_batch(positions[:workers * 2], difficulty, workers)
+        ai_logic.best_moves_batch(positions, difficulty, workers, stats)
+        base = base or stats["moves_per_sec"]
+        speedup = stats["moves_per_sec"] / base
+        print(f"batch, {workers:2d} workers: {stats['moves_per_sec']:8.1f} moves/s "
+              f"({stats['unique']} unique), speedup {speedup:.2f}, "
+              f"efficiency {speedup / workers:.0%}")
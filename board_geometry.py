@@ -0,0 +1,101 @@
+"""Board geometry shared by every game of the same size.
+
+The cells of a board, its boundary and the neighbors of every cell only
+depend on the board size, so they are built once per (w, h) and the same
+read-only Geometry instance is attached to every Game of that size,
+including the copies made for searches. Games neither rebuild nor pickle
+them.
+
+With NumPy installed the Geometry also carries the index tables of the
+vectorized searches and features (bfs_engine, learned_eval); without it
+those are None.
+"""
+import types
+import hex_math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1))
+
+_interned = {}
+
+
+class Geometry:
+    """Cells and neighbor tables of one board size, read-only.
+
+    Every table is immutable (frozensets, tuples and read-only mapping
+    views) and the attributes cannot be rebound, so no game can change
+    the geometry the other games of its size share.
+
+    Attributes:
+        w: Grid width in hexagons.
+        h: Grid height in hexagons.
+        cells: Frozenset of all cells.
+        order: Tuple of the cells in sorted order.
+        index: Mapping from a cell to its position in order.
+        boundary: Frozenset of the cells with a neighbor off the board.
+        neighbors: Mapping from each cell to the tuple of its six
+            neighbors, on the board or not, in DIRECTIONS order.
+        origin: Mouse start cell.
+        adjacency_np: Read-only NumPy array of shape (len(order) + 1, 6),
+            the neighbor indices of every cell in order followed by a row
+            for a sentinel cell; neighbors off the board index the
+            sentinel. None without NumPy.
+        exits_np: Read-only NumPy array of the indices of the boundary
+            cells in order. None without NumPy.
+        coords_np: Read-only NumPy array of shape (len(order), 2), the
+            (q, r) coordinates of the cells in order. None without NumPy.
+    """
+    __slots__ = ("w", "h", "cells", "order", "index", "boundary", "neighbors", "origin",
+                 "adjacency_np", "exits_np", "coords_np")
+
+    def __init__(self, w, h):
+        """Build the tables of a board size."""
+        # Same insertion order as the grid has always been built in, so
+        # iterating the cells (e.g. to sample obstacles) is unchanged.
+        cells = frozenset((c - (r // 2), r) for r in range(h) for c in range(w))
+        order = tuple(sorted(cells))
+        neighbors = {(q, r): tuple((q + dq, r + dr) for dq, dr in DIRECTIONS)
+                     for q, r in cells}
+        tables = {
+            "w": w,
+            "h": h,
+            "cells": cells,
+            "order": order,
+            "index": types.MappingProxyType({c: i for i, c in enumerate(order)}),
+            "boundary": frozenset(c for c, ns in neighbors.items()
+                                  if any(n not in cells for n in ns)),
+            "neighbors": types.MappingProxyType(neighbors),
+            "origin": hex_math.board_origin(w, h),
+            "adjacency_np": None,
+            "exits_np": None,
+            "coords_np": None,
+        }
+        if np is not None:
+            index = tables["index"]
+            sentinel = len(order)
+            adjacency = np.array([[index.get(n, sentinel) for n in neighbors[c]] for c in order]
+                                 + [[sentinel] * 6])
+            exits = np.array([i for i, c in enumerate(order) if c in tables["boundary"]])
+            coords = np.array(order)
+            for array in (adjacency, exits, coords):
+                array.flags.writeable = False
+            tables["adjacency_np"] = adjacency
+            tables["exits_np"] = exits
+            tables["coords_np"] = coords
+        for name, value in tables.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("board geometry is shared and read-only")
+
+
+def get(w, h):
+    """Return the shared Geometry of a board size, building it once."""
+    geometry = _interned.get((w, h))
+    if geometry is None:
+        geometry = _interned.setdefault((w, h), Geometry(w, h))
+    return geometry
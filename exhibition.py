@@ -0,0 +1,352 @@
+"""Simultaneous exhibition: one human against the AI on many boards.
+
+The boards are tiled over the window and each one keeps a cached picture
+that is only redrawn when its position (or the hovered cell) changes, so
+a frame costs one blit per board however many boards are shown. The
+human's moves are played on the spot; the AI's replies are computed in
+the background by a scheduler, which always serves the board under the
+cursor first and the others in the order the human moved on them.
+"""
+import os
+import atexit
+import signal
+import threading
+import multiprocessing
+import pygame
+import hex_math
+import ui
+import constants as C
+from game import Game
+
+BOARDS = 6
+LABEL_H = 22
+TILE_PAD = 12
+WORKERS = max(1, (os.cpu_count() or 1) - 1)
+WORKER_NICENESS = 5
+
+
+def _init_worker():
+    # Started from the pygame process, whose SDL handler would swallow
+    # the SIGTERM that Pool.terminate() sends.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+
+
+def _reply(game):
+    """Worker entry point: choose the AI's move in a position."""
+    if game.turn == 0:
+        return game.choose_blocker_wall()
+    return game.choose_mouse_move()
+
+
+class Scheduler:
+    """Thread handing out the AI's replies for many boards to workers.
+
+    The replies are computed in worker processes running at a lower
+    priority, so the render loop neither waits for them nor competes
+    with them for the interpreter lock. The thread keeps at most one
+    request per worker in flight and always sends the focused board's
+    request first. Results are only handed back through collect(), so
+    the games themselves are never touched outside the main thread.
+
+    Attributes:
+        focus: Index of the board to serve first, or None.
+        pending: Dict mapping board index to the position to answer,
+            in submission order.
+        workers: Number of worker processes.
+        error: Last exception raised by a worker, or None.
+        thread: Scheduler thread.
+    """
+    def __init__(self, workers=WORKERS):
+        """Start the worker pool and the scheduler thread.
+
+        Args:
+            workers: Number of worker processes (default WORKERS).
+        """
+        self.focus = None
+        self.pending = {}
+        self.workers = workers
+        self.error = None
+        self._in_flight = 0
+        self._results = []
+        self._cond = threading.Condition()
+        self._stop = False
+        # Spawned, not forked: the GUI has threads running (warm-up,
+        # pondering, analysis) whose locks a fork could copy held.
+        ctx = multiprocessing.get_context("spawn")
+        self._pool = ctx.Pool(workers, initializer=_init_worker)
+        atexit.register(self.stop)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, index, game):
+        """Queue the AI's reply for a board, replacing any older request.
+
+        Args:
+            index: Board index.
+            game: Game instance where it is the AI's turn.
+        """
+        snapshot = game.clone_position()
+        with self._cond:
+            self.pending.pop(index, None)
+            self.pending[index] = snapshot
+            self._cond.notify()
+
+    def cancel(self, index):
+        """Drop the queued request of a board, if any."""
+        with self._cond:
+            self.pending.pop(index, None)
+
+    def collect(self):
+        """Return and forget the finished replies.
+
+        Returns:
+            List of (index, position_key, move, error) tuples, error
+            being the exception a worker raised (move is then None) or
+            None.
+        """
+        with self._cond:
+            results, self._results = self._results, []
+        return results
+
+    def stop(self):
+        """Stop the thread and the workers."""
+        with self._cond:
+            self._stop = True
+            self.pending.clear()
+            self._cond.notify()
+        self._pool.terminate()
+        self._pool.join()
+        atexit.unregister(self.stop)
+
+    def _done(self, index, key, move):
+        with self._cond:
+            self._in_flight -= 1
+            self._results.append((index, key, move, None))
+            self._cond.notify()
+
+    def _failed(self, index, key, error):
+        with self._cond:
+            self._in_flight -= 1
+            self.error = error
+            self._results.append((index, key, None, error))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and (not self.pending or self._in_flight >= self.workers):
+                    self._cond.wait()
+                if self._stop:
+                    return
+                index = self.focus if self.focus in self.pending else next(iter(self.pending))
+                snapshot = self.pending.pop(index)
+                self._in_flight += 1
+            key = snapshot.position_key()
+            self._pool.apply_async(_reply, (snapshot,),
+                                   callback=lambda move, i=index, k=key: self._done(i, k, move),
+                                   error_callback=lambda e, i=index, k=key: self._failed(i, k, e))
+
+
+class Board:
+    """One game of the exhibition and its cached picture.
+
+    Attributes:
+        game: Game instance.
+        rect: Screen rectangle of the board's tile.
+        surface: Cached picture of the tile.
+        drawn: Key of what surface currently shows.
+        thinking: Whether an AI reply has been requested.
+        error: Exception of the last failed AI reply, or None; clicking
+            the board asks for the reply again.
+    """
+    def __init__(self, game, rect):
+        self.game = game
+        self.rect = rect
+        self.surface = pygame.Surface(rect.size)
+        self.drawn = None
+        self.thinking = False
+        self.error = None
+
+    def status(self):
+        """Return the label shown above the board."""
+        game = self.game
+        if game.over:
+            return "Castigat!" if game.winner == game.player_role else "Pierdut"
+        if self.error is not None:
+            return "Eroare AI (clic: reia)"
+        return "Gandeste AI..." if self.thinking else "Randul tau"
+
+    def render(self, sz, font, hover, mouse_img):
+        """Redraw the cached picture if what it shows has changed.
+
+        Args:
+            sz: Hexagon size (radius).
+            font: Pygame font for the label.
+            hover: Cell under the mouse cursor, or None.
+            mouse_img: Pygame surface drawn on the mouse's cell, or None.
+        """
+        key = (self.game.position_key(), self.game.over, self.thinking, self.error, hover)
+        if key == self.drawn:
+            return
+        self.drawn = key
+        surf = self.surface
+        surf.fill(C.COLOR_BG)
+        center = (self.rect.w // 2, LABEL_H + (self.rect.h - LABEL_H) // 2)
+        ui.draw_board(surf, self.game, sz, center, hover=hover, mouse_img=mouse_img)
+        if self.game.over:
+            overlay = pygame.Surface(self.rect.size)
+            overlay.set_alpha(120)
+            surf.blit(overlay, (0, 0))
+        won = self.game.over and self.game.winner == self.game.player_role
+        col = C.COLOR_VALID_MOVE if won or not self.game.over else C.COLOR_MOUSE_POS
+        if self.error is not None:
+            col = C.COLOR_MOUSE_POS
+        surf.blit(font.render(self.status(), True, col), (6, 2))
+
+
+class Exhibition:
+    """Several AI games played at once by the same human.
+
+    Attributes:
+        boards: List of Board instances.
+        sz: Hexagon size used on every board.
+        scheduler: Scheduler computing the AI's replies.
+        focus: Index of the board under the cursor, or None.
+    """
+    def __init__(self, area, count=BOARDS, w=11, h=11, player_role="BLOCKER", difficulty="HARD"):
+        """Create the games and lay them out over an area of the window.
+
+        Args:
+            area: Pygame Rect the boards are tiled in.
+            count: Number of boards (default BOARDS).
+            w: Grid width (default 11).
+            h: Grid height (default 11).
+            player_role: Human's role on every board (default "BLOCKER").
+            difficulty: AI difficulty (default "HARD").
+        """
+        self.w, self.h = w, h
+        self.player_role = player_role
+        self.difficulty = difficulty
+        cols, rows, _ = hex_math.tile_layout(count, w, h, area.w, area.h)
+        tile_w, tile_h = area.w // cols, area.h // rows
+        self.sz = hex_math.get_hex_size(w, h, tile_w - TILE_PAD, tile_h - LABEL_H - TILE_PAD)
+        self.scheduler = Scheduler()
+        self.focus = None
+        self.boards = []
+        for i in range(count):
+            rect = pygame.Rect(area.x + (i % cols) * tile_w, area.y + (i // cols) * tile_h,
+                               tile_w, tile_h)
+            self.boards.append(Board(None, rect))
+            self.restart(i)
+
+    def restart(self, index):
+        """Start a new game on a board.
+
+        Args:
+            index: Board index.
+        """
+        self.scheduler.cancel(index)
+        board = self.boards[index]
+        # Built as a blocker game so a human mouse does not wait here for
+        # the AI's first wall; the scheduler places it like any reply.
+        game = Game(mode="AI", difficulty=self.difficulty, player_role="BLOCKER",
+                    w=self.w, h=self.h, auto_resolve=True, balanced=True)
+        game.player_role = self.player_role
+        board.game = game
+        board.thinking = False
+        board.error = None
+        if self.player_role == "MOUSE":
+            game.save_state()
+            self._request(index)
+
+    def _request(self, index):
+        self.boards[index].thinking = True
+        self.boards[index].error = None
+        self.scheduler.submit(index, self.boards[index].game)
+
+    def board_at(self, pos):
+        """Return the index of the board whose tile contains pos, or None."""
+        for i, board in enumerate(self.boards):
+            if board.rect.collidepoint(pos):
+                return i
+        return None
+
+    def cell_at(self, index, pos):
+        """Return the cell of a board under the pixel position pos."""
+        rect = self.boards[index].rect
+        cx = rect.x + rect.w // 2
+        cy = rect.y + LABEL_H + (rect.h - LABEL_H) // 2
+        return hex_math.pixel_to_cell(pos[0], pos[1], self.w, self.h, self.sz, cx, cy)
+
+    def click(self, pos):
+        """Play the human's move on the board under pos.
+
+        Args:
+            pos: Tuple of (x, y) pixel coordinates of the click.
+        """
+        index = self.board_at(pos)
+        if index is None or self.boards[index].thinking:
+            return
+        if self.boards[index].error is not None:
+            self._request(index)
+            return
+        game = self.boards[index].game
+        before = game.position_key()
+        game.click_tile(*self.cell_at(index, pos), reply=False)
+        if game.position_key() != before and not game.over:
+            self._request(index)
+
+    def update(self, mouse_pos):
+        """Apply the AI replies that are ready and track the focus.
+
+        Args:
+            mouse_pos: Tuple of (x, y) mouse coordinates.
+        """
+        self.focus = self.board_at(mouse_pos)
+        self.scheduler.focus = self.focus
+        for index, key, move, error in self.scheduler.collect():
+            board = self.boards[index]
+            game = board.game
+            if not board.thinking or game.position_key() != key:
+                continue
+            board.thinking = False
+            if error is not None:
+                board.error = error
+                continue
+            if game.turn == 0:
+                if move:
+                    game.apply_blocker_wall(move)
+            elif move is None:
+                game.over = True
+                game.winner = "BLOCKER"
+            else:
+                game.apply_mouse_move(move)
+
+    def draw(self, screen, font, mouse_pos, mouse_img=None):
+        """Draw every board, re-rendering only those that changed.
+
+        Args:
+            screen: Pygame surface to draw on.
+            font: Pygame font for the board labels.
+            mouse_pos: Tuple of (x, y) mouse coordinates.
+            mouse_img: Pygame surface of the mouse, scaled to the boards
+                (default None).
+        """
+        for i, board in enumerate(self.boards):
+            hover = self.cell_at(i, mouse_pos) if i == self.focus else None
+            board.render(self.sz, font, hover, mouse_img)
+            screen.blit(board.surface, board.rect)
+        if self.focus is not None:
+            pygame.draw.rect(screen, C.COLOR_BTN_BORDER, self.boards[self.focus].rect, 2)
+
+    def score(self):
+        """Return the human's (won, lost, playing) board counts."""
+        won = sum(1 for b in self.boards if b.game.over and b.game.winner == self.player_role)
+        finished = sum(1 for b in self.boards if b.game.over)
+        return won, finished - won, len(self.boards) - finished
+
+    def close(self):
+        """Stop the scheduler."""
+        self.scheduler.stop()
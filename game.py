@@ -10,6 +10,15 @@ import os
 import math
 from collections import deque
 import ai_logic
+import mcts
+import start_positions
+import board_geometry
+
+# Undo snapshots kept per game; each one holds a copy of the walls, so a
+# long game on a big board would otherwise keep O(cells^2) of them. Redo
+# entries come out of the history, so this bounds them too. None keeps
+# everything.
+HISTORY_LIMIT = 200
 
 
 class Game:
@@ -22,29 +31,61 @@ class Game:
     Attributes:
         w: Grid width in hexagons.
         h: Grid height in hexagons.
-        mode: Game mode ("AI" or "PVP").
-        difficulty: AI difficulty level ("EASY", "MEDIUM", "HARD").
+        mode: Game mode ("AI", "PVP", "NET" or "SPECTATE").
+        difficulty: AI difficulty level ("EASY", "MEDIUM", "HARD", "EXPERT").
         player_role: Player's role ("BLOCKER" or "MOUSE").
-        cells: Set of all grid cell coordinates.
+        geometry: board_geometry.Geometry of the board size, shared by
+            every game of that size.
+        cells: Frozenset of all grid cell coordinates (geometry.cells).
         walls: Set of wall/blocked cell coordinates.
         pos: Current mouse position as (q, r) tuple.
         over: Boolean indicating if game has ended.
         winner: Winning side ("BLOCKER" or "MOUSE"), None if ongoing.
         turn: Current turn (0 = blocker, 1 = mouse).
-        history: List of previous game states for undo.
+        history: List of previous game states for undo, at most
+            HISTORY_LIMIT of them.
         redo_stack: Stack of undone states for redo.
         current_filename: Name of save file if game was loaded.
+        auto_resolve: Whether an enclosed mouse ends the game at once.
+        balanced: Whether starts come from the balanced start generator.
+        region: Set of free cells reachable by the mouse.
+        enclosed: Boolean indicating if region has no boundary cell.
+        expert: MCTS searcher kept between turns for EXPERT, or None.
+        reply_cache: Precomputed AI replies keyed by position_key().
+        seed: Seed of the game's random generator.
+        rng: random.Random used to place the initial obstacles.
+        start_walls: Frozenset of the obstacles the game started with.
+        move_log: List of (turn, cell) pairs, every move played so far.
+            History snapshots store only its length.
     """
-    def __init__(self, mode="AI", difficulty="MEDIUM", player_role="BLOCKER", w=11, h=11, n_obs=10):
+    # Searches clone games by the thousand; slots drop the per-instance
+    # __dict__ and the board tables live in the shared geometry.
+    __slots__ = ("w", "h", "mode", "difficulty", "player_role", "initial_obs",
+                 "geometry", "cells", "walls", "pos", "over", "winner", "turn",
+                 "history", "redo_stack", "current_filename", "auto_resolve", "balanced",
+                 "region", "enclosed", "expert", "reply_cache",
+                 "seed", "rng", "start_walls", "move_log")
+
+    # Left out of pickles: rebuilt from the board size or recomputed on load.
+    _DERIVED = ("geometry", "cells", "region", "enclosed", "expert", "reply_cache", "rng")
+
+    def __init__(self, mode="AI", difficulty="MEDIUM", player_role="BLOCKER", w=11, h=11, n_obs=10,
+                 auto_resolve=False, balanced=False, seed=None):
         """Initialize a new game instance.
         
         Args:
-            mode: Game mode, "AI" or "PVP" (default "AI").
-            difficulty: AI difficulty, "EASY"/"MEDIUM"/"HARD" (default "MEDIUM").
+            mode: Game mode, "AI", "PVP", "NET" or "SPECTATE" (default "AI").
+            difficulty: AI difficulty, "EASY"/"MEDIUM"/"HARD"/"EXPERT" (default "MEDIUM").
             player_role: Player's role, "BLOCKER" or "MOUSE" (default "BLOCKER").
             w: Grid width (default 11).
             h: Grid height (default 11).
             n_obs: Number of initial random obstacles (default 10).
+            auto_resolve: End the game as a blocker win as soon as the
+                mouse is enclosed (default False).
+            balanced: Draw the initial obstacles from the balanced start
+                generator (default False).
+            seed: Seed of the initial obstacles (default a random one, or
+                that of a pooled balanced start).
         """
         self.w = w
         self.h = h
@@ -53,7 +94,8 @@ class Game:
         self.player_role = player_role
         self.initial_obs = n_obs
         
-        self.cells = set()
+        self.geometry = None
+        self.cells = frozenset()
         self.walls = set()
         self.pos = (0, 0)
         self.over = False
@@ -63,25 +105,30 @@ class Game:
         self.history = []
         self.redo_stack = []
         self.current_filename = None
+        self.auto_resolve = auto_resolve
+        self.balanced = balanced
+
+        self.region = set()
+        self.enclosed = False
+        self.expert = None
+        self.reply_cache = {}
+
+        self.move_log = []
 
         self.make_grid()
-        self.add_walls(n_obs)
+        self.add_start_walls(seed)
+        self.start_walls = frozenset(self.walls)
+        self.update_region()
 
         if self.mode == "AI" and self.player_role == "MOUSE":
             self.save_state()
             self.ai_move_blocker()
 
     def make_grid(self):
-        """Generate hexagonal grid cells and initialize mouse position."""
-        self.cells.clear()
-        for r in range(self.h):
-            for c in range(self.w):
-                q = c - (r // 2)
-                self.cells.add((q, r))
-        
-        cr = self.h // 2
-        cc = self.w // 2
-        self.pos = (cc - (cr // 2), cr)
+        """Attach the board geometry of the grid size and center the mouse."""
+        self.geometry = board_geometry.get(self.w, self.h)
+        self.cells = self.geometry.cells
+        self.pos = self.geometry.origin
 
     def add_walls(self, n):
         opts = list(self.cells)
@@ -91,7 +138,123 @@ class Game:
         potential = [c for c in opts if c not in current_walls]
         if len(potential) < n: 
             n = len(potential)
-        self.walls.update(set(random.sample(potential, n)))
+        self.walls.update(set(self.rng.sample(potential, n)))
+
+    def add_start_walls(self, seed=None):
+        """Seed the game and place the initial obstacles.
+        
+        A balanced layout is a function of the seed. Without a seed of its
+        own the game takes a ready (seed, layout) pair from the generator's
+        pool, and only screens one itself when the pool is empty. If no
+        balanced layout is found, or none was asked for, the obstacles are
+        random as in add_walls.
+        
+        Args:
+            seed: Seed of the obstacles, or None for a random one.
+        """
+        layout = None
+        if self.balanced and seed is None:
+            start = start_positions.take(self.w, self.h, self.initial_obs)
+            if start is not None:
+                seed, layout = start
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if self.balanced and layout is None:
+            layout = start_positions.draw(self.w, self.h, self.initial_obs, seed)
+        if layout is None:
+            self.add_walls(self.initial_obs)
+        else:
+            self.walls.update(layout)
+
+    def __getstate__(self):
+        """Return the pickled state, leaving out derived and AI data."""
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in self._DERIVED and hasattr(self, name)}
+
+    def __setstate__(self, state):
+        """Restore a pickled game, including saves from older versions.
+
+        Older saves carry the cell set and attributes that no longer
+        exist; the cells come from the shared geometry instead and the
+        rest is ignored.
+        """
+        self.current_filename = None
+        self.auto_resolve = False
+        self.balanced = False
+        self.seed = None
+        self.start_walls = None
+        self.move_log = []
+        for name, value in state.items():
+            if name in self.__slots__ and name not in self._DERIVED:
+                setattr(self, name, value)
+        # Saves from before the log became a list hold a tuple.
+        self.move_log = list(self.move_log)
+        self.geometry = board_geometry.get(self.w, self.h)
+        self.cells = self.geometry.cells
+        self.rng = random.Random(self.seed)
+        self.expert = None
+        self.reply_cache = {}
+        self.update_region()
+
+    def update_region(self):
+        """Recompute the mouse's free region and its enclosure status."""
+        self.region = {self.pos}
+        stack = [self.pos]
+        while stack:
+            u = stack.pop()
+            for n in self.get_neighbors(*u):
+                if n in self.cells and n not in self.walls and n not in self.region:
+                    self.region.add(n)
+                    stack.append(n)
+        self.enclosed = not any(self.final_hex(c) for c in self.region)
+
+    def wall_added(self, cell):
+        """Update the mouse's region after a wall was placed on cell.
+        
+        A wall outside the region changes nothing. A wall whose free
+        neighbors form a single arc around it cannot split the region, so
+        the cell is just removed; only other walls trigger a flood fill.
+        
+        Args:
+            cell: Cell coordinates (q, r) of the new wall.
+        """
+        if cell not in self.region:
+            return
+        ring = [n in self.region for n in self.get_neighbors(*cell)]
+        arcs = sum(1 for i in range(6) if ring[i] and not ring[i - 1])
+        if arcs <= 1 or all(ring):
+            self.region.discard(cell)
+            if not self.enclosed and self.final_hex(cell):
+                self.enclosed = not any(self.final_hex(c) for c in self.region)
+        else:
+            self.update_region()
+
+    def log_move(self, turn, cell):
+        """Append a played move to the move log.
+        
+        Args:
+            turn: Side that moved (0 = blocker, 1 = mouse).
+            cell: Wall cell, or mouse destination (outside the grid for
+                an escape).
+        """
+        self.move_log.append((turn, cell))
+
+    def _restore_log(self, state):
+        """Bring the move log back to a saved state's length.
+
+        Snapshots in saves from older versions hold the whole log, or no
+        log at all, instead of its length.
+
+        Args:
+            state: Undo or redo snapshot being restored.
+        """
+        if 'log_len' in state:
+            del self.move_log[state['log_len']:]
+            self.move_log.extend(state.get('log_tail', ()))
+        else:
+            self.move_log = list(state.get('move_log', ()))
 
     def save_state(self):
         """Save current game state to history for undo functionality."""
@@ -100,30 +263,39 @@ class Game:
             'pos': self.pos,
             'turn': self.turn,
             'over': self.over,
-            'winner': self.winner
+            'winner': self.winner,
+            'log_len': len(self.move_log)
         }
         self.history.append(state)
+        if HISTORY_LIMIT is not None and len(self.history) > HISTORY_LIMIT:
+            del self.history[:len(self.history) - HISTORY_LIMIT]
         self.redo_stack.clear() 
 
     def undo(self):
         """Undo the last move, restoring previous game state."""
         if not self.history: return
         
+        prev = self.history.pop()
+        # The log is truncated, so the redo snapshot keeps the moves cut.
+        kept = prev.get('log_len', len(prev.get('move_log', ())))
         current_state = {
             'walls': self.walls.copy(),
             'pos': self.pos,
             'turn': self.turn,
             'over': self.over,
-            'winner': self.winner
+            'winner': self.winner,
+            'log_len': kept,
+            'log_tail': self.move_log[kept:]
         }
         self.redo_stack.append(current_state)
 
-        prev = self.history.pop()
         self.walls = prev['walls']
         self.pos = prev['pos']
         self.turn = prev['turn']
         self.over = prev['over']
         self.winner = prev['winner']
+        self._restore_log(prev)
+        self.update_region()
 
     def redo(self):
         """Redo a previously undone move."""
@@ -134,7 +306,8 @@ class Game:
             'pos': self.pos,
             'turn': self.turn,
             'over': self.over,
-            'winner': self.winner
+            'winner': self.winner,
+            'log_len': len(self.move_log)
         }
         self.history.append(current_state)
 
@@ -144,18 +317,20 @@ class Game:
         self.turn = next_st['turn']
         self.over = next_st['over']
         self.winner = next_st['winner']
+        self._restore_log(next_st)
+        self.update_region()
 
-    def save_to_file(self, filename):
+    def save_to_file(self, filename, folder="saves"):
         """Save game state to a file using pickle.
         
         Args:
             filename: Name of save file.
+            folder: Directory to save into (default "saves").
         
         Returns:
             True if save succeeded, False otherwise.
         """
         try:
-            folder = "saves"
             if not os.path.exists(folder):
                 os.makedirs(folder)
             full_path = os.path.join(folder, filename)
@@ -169,17 +344,17 @@ class Game:
             return False
 
     @staticmethod
-    def load_from_file(filename):
+    def load_from_file(filename, folder="saves"):
         """Load a game instance from a save file.
         
         Args:
             filename: Name of save file to load.
+            folder: Directory holding the save file (default "saves").
         
         Returns:
             Game instance if successful, None otherwise.
         """
         try:
-            folder = "saves"
             full_path = os.path.join(folder, filename)
             if not os.path.exists(full_path):
                 return None
@@ -192,8 +367,10 @@ class Game:
             return None
 
     def get_neighbors(self, q, r):
-        dirs = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
-        return [(q + dq, r + dr) for dq, dr in dirs]
+        try:
+            return self.geometry.neighbors[(q, r)]
+        except KeyError:
+            return tuple((q + dq, r + dr) for dq, dr in board_geometry.DIRECTIONS)
 
     def has_valid_moves(self):
         for n in self.get_neighbors(*self.pos):
@@ -204,20 +381,17 @@ class Game:
         return False
 
     def final_hex(self, cell):
-        if cell not in self.cells: 
-            return False
-        neighbors = self.get_neighbors(*cell)
-        for n in neighbors:
-            if n not in self.cells:
-                return True
-        return False
+        return cell in self.geometry.boundary
 
-    def click_tile(self, q, r):
+    def click_tile(self, q, r, reply=True):
         """Handle mouse click on a hex tile.
         
         Args:
             q: Hexagon q coordinate.
             r: Hexagon r coordinate.
+            reply: Let the AI answer right away in AI mode (default True).
+                With False the AI's turn is left for the caller to play,
+                e.g. from a background scheduler.
         """
         if self.over: return
 
@@ -227,11 +401,13 @@ class Game:
                     return
                 self.save_state()
                 self.walls.add((q, r))
+                self.log_move(0, (q, r))
+                self.wall_added((q, r))
                 self.check_game_state_after_block()
                 
                 if not self.over:
                     self.turn = 1
-                    if self.mode == "AI":
+                    if self.mode == "AI" and reply:
                         self.ai_move_mouse()
             
             elif self.turn == 1 and self.mode == "PVP":
@@ -248,13 +424,15 @@ class Game:
                 moved = self.human_move_mouse(q, r)
                 if moved and not self.over:
                     self.turn = 0
-                    self.ai_move_blocker()
+                    if reply:
+                        self.ai_move_blocker()
                 elif not moved:
                     self.undo()
 
     def human_move_mouse(self, q, r):
         if (q, r) not in self.get_neighbors(*self.pos): return False
         if (q, r) in self.walls: return False
+        self.log_move(1, (q, r))
         if (q, r) not in self.cells:
             self.over = True
             self.winner = "MOUSE"
@@ -263,32 +441,70 @@ class Game:
         return True
 
     def check_game_state_after_block(self):
-        if not self.has_valid_moves():
+        if not self.has_valid_moves() or (self.enclosed and self.auto_resolve):
             self.over = True
             self.winner = "BLOCKER"
 
     def ai_move_mouse(self):
         """Execute AI-controlled mouse move based on difficulty level."""
-        neighbors = self.get_neighbors(*self.pos)
-        valid_moves = [n for n in neighbors if n not in self.walls]
-        if not valid_moves:
+        move = self.choose_mouse_move()
+        if move is None:
             self.over = True
             self.winner = "BLOCKER"
             return
+        self.apply_mouse_move(move)
+
+    def choose_mouse_move(self, difficulty=None, stop=None):
+        """Pick the AI mouse's move without playing it.
+        
+        Args:
+            difficulty: AI difficulty to use (default self.difficulty).
+            stop: threading.Event cutting an EXPERT search short when set
+                (default None).
+        
+        Returns:
+            Destination cell (q, r), outside the grid for an escape, or
+            None if the mouse has no valid move.
+        """
+        difficulty = difficulty or self.difficulty
+        neighbors = self.get_neighbors(*self.pos)
+        valid_moves = [n for n in neighbors if n not in self.walls]
+        if not valid_moves:
+            return None
+
+        cached = self.cached_reply(difficulty)
+        if cached in valid_moves:
+            return cached
         
         move = None
-        if self.difficulty == "EASY":
+        if self.enclosed and difficulty != "EASY":
+            move = ai_logic.region_move_mouse(self, self.pos, self.walls, self.region)
+        elif difficulty == "EASY":
             move = random.choice(valid_moves)
-        elif self.difficulty == "MEDIUM":
+        elif difficulty == "MEDIUM":
             move = ai_logic.get_shortest_path(self, self.pos)
             if not move or move not in valid_moves:
                 move = random.choice(valid_moves)
 
-        elif self.difficulty == "HARD":
+        elif difficulty == "HARD":
              move = ai_logic.best_move_mouse(self, self.pos, self.walls)
              if not move or move not in valid_moves:
                  move = random.choice(valid_moves)
 
+        elif difficulty == "EXPERT":
+            move = self.expert_searcher().choose(self, stop)
+            if not move or move not in valid_moves:
+                move = random.choice(valid_moves)
+
+        return move
+
+    def apply_mouse_move(self, move):
+        """Play a mouse move chosen by the AI.
+        
+        Args:
+            move: Destination cell (q, r), outside the grid for an escape.
+        """
+        self.log_move(1, move)
         if move not in self.cells:
             self.over = True
             self.winner = "MOUSE"
@@ -301,13 +517,35 @@ class Game:
     def ai_move_blocker(self):
         """Execute AI-controlled blocker move to place an optimal wall."""
         if self.over: return
+        target_wall = self.choose_blocker_wall()
+        if target_wall:
+            self.apply_blocker_wall(target_wall)
+
+    def choose_blocker_wall(self, difficulty=None, stop=None):
+        """Pick the AI blocker's wall without placing it.
+        
+        Args:
+            difficulty: AI difficulty to use (default self.difficulty).
+            stop: threading.Event cutting an EXPERT search short when set
+                (default None).
+        
+        Returns:
+            Cell coordinates (q, r) for the wall, or None.
+        """
+        difficulty = difficulty or self.difficulty
         target_wall = None
+
+        cached = self.cached_reply(difficulty)
+        if cached and cached not in self.walls and cached != self.pos:
+            return cached
         
-        if self.difficulty == "EASY":
+        if self.enclosed and difficulty != "EASY":
+            target_wall = ai_logic.region_wall(self, self.pos, self.walls, self.region)
+        elif difficulty == "EASY":
             opts = [c for c in self.cells if c not in self.walls and c != self.pos]
             if opts: 
                 target_wall = random.choice(opts)
-        elif self.difficulty == "MEDIUM":
+        elif difficulty == "MEDIUM":
             move = ai_logic.get_shortest_path(self, self.pos)
             if move and move not in self.walls and move != self.pos:
                 target_wall = move
@@ -315,13 +553,80 @@ class Game:
                 opts = [c for c in self.cells if c not in self.walls and c != self.pos]
                 if opts: 
                     target_wall = random.choice(opts)
-        elif self.difficulty == "HARD":
+        elif difficulty == "HARD":
             target_wall = ai_logic.best_wall(self, self.pos, self.walls)
+        elif difficulty == "EXPERT":
+            target_wall = self.expert_searcher().choose(self, stop)
+            if not target_wall:
+                target_wall = ai_logic.best_wall(self, self.pos, self.walls)
 
-        if target_wall:
-            self.walls.add(target_wall)
-            self.turn = 1
-            self.check_game_state_after_block()
+        return target_wall
+
+    def apply_blocker_wall(self, cell):
+        """Place a wall chosen by the AI and hand the turn to the mouse.
+        
+        Args:
+            cell: Cell coordinates (q, r) of the wall.
+        """
+        self.walls.add(cell)
+        self.log_move(0, cell)
+        self.wall_added(cell)
+        self.turn = 1
+        self.check_game_state_after_block()
+
+    def position_key(self):
+        """Return a hashable key identifying the current position."""
+        return (frozenset(self.walls), self.pos, self.turn)
+
+    def cached_reply(self, difficulty):
+        """Take a precomputed AI reply for the current position, if any.
+        
+        Replies are filled in by the ponderer while the human is thinking.
+        The cache only ever matters for the position right after the
+        human's move, so it is emptied on every lookup.
+        
+        Args:
+            difficulty: Difficulty the reply must have been computed for.
+        
+        Returns:
+            The cached move, or None.
+        """
+        if difficulty != self.difficulty or not self.reply_cache:
+            return None
+        reply = self.reply_cache.get(self.position_key())
+        self.reply_cache.clear()
+        return reply
+
+    def clone_position(self):
+        """Return an independent copy of the game without its history.
+        
+        Used to think about hypothetical moves, e.g. from another thread,
+        without touching this game.
+        
+        Returns:
+            New Game instance with the same board, position and settings.
+        """
+        clone = Game.__new__(Game)
+        for name in self.__slots__:
+            setattr(clone, name, getattr(self, name))
+        clone.walls = set(self.walls)
+        clone.region = set(self.region)
+        clone.history = []
+        clone.redo_stack = []
+        clone.move_log = list(self.move_log)
+        clone.expert = None
+        clone.reply_cache = {}
+        # Its own generator in the same state: drawing from the clone must
+        # neither advance this game's sequence nor be shared across threads.
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        return clone
+
+    def expert_searcher(self):
+        """Return the MCTS searcher of this game, creating it on first use."""
+        if self.expert is None:
+            self.expert = mcts.Searcher()
+        return self.expert
 
     def reset(self):
         """Reset game to initial state with same configuration."""
@@ -332,7 +637,13 @@ class Game:
         self.redo_stack.clear()
         self.walls.clear()
         self.current_filename = None
+        self.move_log = []
+        # The search tree and the pondered replies belong to the old game.
+        self.expert = None
+        self.reply_cache = {}
         self.make_grid()
-        self.add_walls(self.initial_obs)
+        self.add_start_walls()
+        self.start_walls = frozenset(self.walls)
+        self.update_region()
         if self.mode == "AI" and self.player_role == "MOUSE":
             self.ai_move_blocker()
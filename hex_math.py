@@ -77,3 +77,97 @@ def axial_round(x, y):
     elif dy > dz: ry = -(rx + rz)
     else: rz = -(rx + ry)
     return int(rx), int(ry)
+
+def transform(q, r, k):
+    """Apply one of the 12 symmetries of the hexagonal grid.
+    
+    Symmetries 0-5 rotate the grid by k * 60 degrees around the origin,
+    symmetries 6-11 first mirror it across the q = r axis.
+    
+    Args:
+        q: Hexagon q coordinate.
+        r: Hexagon r coordinate.
+        k: Symmetry index in range(12).
+    
+    Returns:
+        Tuple of transformed (q, r) axial coordinates.
+    """
+    if k >= 6:
+        q, r = r, q
+    for _ in range(k % 6):
+        q, r = -r, q + r
+    return q, r
+
+def board_origin(w, h):
+    """Return the cell drawn at the center point of a w x h board.
+    
+    Args:
+        w: Grid width in hexagons.
+        h: Grid height in hexagons.
+    
+    Returns:
+        Tuple of (q, r) axial coordinates of the middle cell.
+    """
+    mid_r = h // 2
+    return (w // 2) - (mid_r // 2), mid_r
+
+def cell_to_pixel(q, r, w, h, sz, cx, cy):
+    """Convert a board cell to pixel coordinates, board centered on (cx, cy).
+    
+    Args:
+        q: Hexagon q coordinate.
+        r: Hexagon r coordinate.
+        w: Grid width in hexagons.
+        h: Grid height in hexagons.
+        sz: Hexagon size (radius).
+        cx: Board center X coordinate.
+        cy: Board center Y coordinate.
+    
+    Returns:
+        Tuple of (x, y) pixel coordinates.
+    """
+    mid_q, mid_r = board_origin(w, h)
+    return hex_to_pixel(q - mid_q, r - mid_r, sz, cx, cy)
+
+def pixel_to_cell(x, y, w, h, sz, cx, cy):
+    """Convert pixel coordinates to the cell of a board centered on (cx, cy).
+    
+    Args:
+        x: Pixel X coordinate.
+        y: Pixel Y coordinate.
+        w: Grid width in hexagons.
+        h: Grid height in hexagons.
+        sz: Hexagon size (radius).
+        cx: Board center X coordinate.
+        cy: Board center Y coordinate.
+    
+    Returns:
+        Tuple of (q, r) axial coordinates, possibly off the board.
+    """
+    mid_q, mid_r = board_origin(w, h)
+    q, r = pixel_to_hex(x, y, sz, cx, cy)
+    return q + mid_q, r + mid_r
+
+def tile_layout(count, w, h, screen_w, screen_h):
+    """Choose how to tile several boards of the same size on screen.
+    
+    Tries every number of columns and keeps the one giving the largest
+    hexagons.
+    
+    Args:
+        count: Number of boards.
+        w: Grid width in hexagons.
+        h: Grid height in hexagons.
+        screen_w: Available width in pixels.
+        screen_h: Available height in pixels.
+    
+    Returns:
+        Tuple of (cols, rows, sz) with sz the hexagon size in each tile.
+    """
+    best = None
+    for cols in range(1, count + 1):
+        rows = math.ceil(count / cols)
+        sz = get_hex_size(w, h, screen_w // cols, screen_h // rows)
+        if best is None or sz > best[2]:
+            best = (cols, rows, sz)
+    return best
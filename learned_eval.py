@@ -0,0 +1,395 @@
+"""Learned wall evaluation with vectorized inference.
+
+best_wall ranks cells with hand-picked weights and only pays for the
+min-cut term on its top 15 candidates. This module describes every free
+cell of a position with a fixed feature vector (distance layers, path
+count shares, cut membership, wall density around the cell, ...) and
+scores all of them at once with a small model trained offline from
+self-play logs.
+
+Features are assembled with NumPy operations over the board's index
+tables (board_geometry.Geometry) and scored with one matrix product per
+layer. Without NumPy no model is loaded and best_wall keeps its
+hand-picked ranking. A model records the FEATURES it was trained on and
+is only loaded when they are this version's.
+
+A trained model is only played by default (HARD blocker) once tune.py's
+SPRT has found it at least as strong as the heuristic and marked it
+accepted; retraining writes a model that has to be accepted again.
+
+Usage:
+    python selfplay.py --games 200 --out logs/selfplay.jsonl
+    python learned_eval.py train logs/selfplay.jsonl --model mlp
+    python tune.py learned=true
+"""
+import sys
+import os
+import json
+import math
+import pickle
+import random
+import ai_logic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODEL_FOLDER = "models"
+MODEL_FILE = "wall_eval.pkl"
+GAMMA = 0.7
+
+FEATURES = ("bias", "on_dag", "share", "level_share", "lead", "time_share",
+            "time_level", "in_cut", "in_flow", "near_walls", "near_blocked",
+            "edge", "exit_layer", "distance", "hex_distance")
+
+_model = None
+
+
+def _hex_distances(coords, cell):
+    dq = coords[:, 0] - cell[0]
+    dr = coords[:, 1] - cell[1]
+    return (np.abs(dq) + np.abs(dr) + np.abs(dq + dr)) // 2
+
+
+def features(game, mouse_pos, blocked):
+    """Describe every cell of a blocker-to-move position; requires NumPy.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Tuple of (cells, rows, legal): the cells in index order, a NumPy
+        array with one feature vector per cell in FEATURES order and a
+        NumPy bool array flagging the cells a wall may be placed on. None
+        if no exit is reachable or the mouse already stands on the edge.
+    """
+    geometry = game.geometry
+    dist = ai_logic.bfs_dist(game, mouse_pos, blocked)
+    IN, OUT, total = ai_logic.dp_IN_OUT(game, dist, blocked, mouse_pos, normalized=True)
+    if total == 0:
+        return None
+    min_dist = min(dist[c] for c in dist if game.final_hex(c))
+    if min_dist == 0:
+        return None
+    _, cut_cells, flow_cells = ai_logic.unit_flow_cut(game, mouse_pos, blocked, dist)
+
+    n = len(geometry.order)
+    index = geometry.index
+    reached = np.fromiter((index[u] for u in dist), dtype=np.intp, count=len(dist))
+    d = np.full(n, -1.0)
+    d[reached] = np.fromiter(dist.values(), dtype=float, count=len(dist))
+    share = np.zeros(n)
+    share[reached] = np.fromiter((IN[u] * OUT[u] for u in dist), dtype=float, count=len(dist))
+    # Summed in index order, the mouse's own share included.
+    on_dag = share > 0
+    level_sums = np.bincount(d[on_dag].astype(np.intp), weights=share[on_dag],
+                             minlength=int(d.max()) + 1)
+    level = np.where(d >= 0, level_sums[np.maximum(d, 0).astype(np.intp)], 0.0)
+    mouse = index[mouse_pos]
+    share[mouse] = 0.0
+    on_dag = (share > 0).astype(float)
+
+    # The last entry is the sentinel cell that neighbors off the board index.
+    wall = np.zeros(n + 1)
+    wall[n] = 1.0
+    wall[[index[c] for c in blocked if c in index]] = 1.0
+    legal = wall[:n] == 0.0
+    legal[mouse] = False
+    cut = np.zeros(n)
+    cut[[index[c] for c in cut_cells if c in index]] = 1.0
+    flow = np.zeros(n)
+    flow[[index[c] for c in flow_cells if c in index]] = 1.0
+    edge = np.zeros(n)
+    edge[geometry.exits_np] = 1.0
+    radius = int(_hex_distances(geometry.coords_np, geometry.origin).max()) or 1
+    hex_d = _hex_distances(geometry.coords_np, mouse_pos) / radius
+
+    level_share = np.divide(share, level, out=np.zeros(n), where=level > 0)
+    lead = np.maximum(0.0, d - 1) * on_dag
+    time = np.exp(GAMMA * lead) * on_dag
+    neighbors = geometry.adjacency_np[:n]
+    around = wall[neighbors]
+    near_walls = around.mean(axis=1)
+    near_blocked = (around * (neighbors < n)).mean(axis=1)
+    reach = (d >= 0).astype(float)
+    rows = np.stack([
+        np.ones(n), on_dag, share, level_share, lead / min_dist, time * share,
+        time * level_share, cut, flow, near_walls,
+        near_blocked, edge, (d == min_dist) * on_dag,
+        np.where(d >= 0, d / min_dist, 0.0), hex_d * reach,
+    ], axis=1)
+    return geometry.order, rows, legal
+
+
+def predict(model, rows):
+    """Score feature rows with a model; requires NumPy.
+
+    Args:
+        model: Dict with "kind" ("linear" or "mlp") and its weights.
+        rows: Feature rows as returned by features.
+
+    Returns:
+        NumPy array with one score per row.
+    """
+    x = np.asarray(rows, dtype=float)
+    linear = x @ np.array(model["w"])
+    if model["kind"] == "linear":
+        return linear
+    x = (x - np.array(model["mean"])) / np.array(model["scale"])
+    hidden = np.tanh(x @ np.array(model["w1"]))
+    return linear + (hidden @ np.array(model["w2"])) * model["y_scale"]
+
+
+def _check_model(model):
+    """Make sure a model scores the features of this version.
+
+    Args:
+        model: Unpickled model.
+
+    Returns:
+        The model.
+
+    Raises:
+        ValueError: If it was trained on other features or its weights
+            do not have one entry per feature.
+    """
+    if not isinstance(model, dict) or tuple(model.get("features", ())) != FEATURES:
+        raise ValueError("model was trained on other features")
+    sizes = [len(model.get("w", ()))]
+    if model.get("kind") == "mlp":
+        sizes += [len(model.get(key, ())) for key in ("mean", "scale", "w1")]
+    elif model.get("kind") != "linear":
+        raise ValueError(f"unknown model kind {model.get('kind')!r}")
+    if any(size != len(FEATURES) for size in sizes):
+        raise ValueError("model weights do not match the features")
+    return model
+
+
+def load_model(path=None):
+    """Load the trained model, once.
+
+    A model trained on other features is ignored, and without NumPy no
+    model is loaded at all.
+
+    Args:
+        path: Model file (default MODEL_FOLDER/MODEL_FILE).
+
+    Returns:
+        Model dict, or None if no usable model has been trained.
+    """
+    global _model
+    if _model is None and np is None:
+        _model = False
+    if _model is None:
+        try:
+            with open(path or os.path.join(MODEL_FOLDER, MODEL_FILE), "rb") as f:
+                _model = _check_model(pickle.load(f))
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            _model = False
+    return _model or None
+
+
+def model_accepted():
+    """Return whether the trained model has passed tune.py's SPRT."""
+    model = load_model()
+    return bool(model and model.get("accepted"))
+
+
+def accept_model(path=None):
+    """Mark the trained model as accepted for default play.
+
+    Args:
+        path: Model file (default MODEL_FOLDER/MODEL_FILE).
+    """
+    model = load_model(path)
+    if model is not None:
+        save_model(dict(model, accepted=True), path)
+
+
+def rank_walls(game, mouse_pos, blocked, model=None):
+    """Score every legal wall of a position in one model call.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+        model: Model dict (default the trained model).
+
+    Returns:
+        List of (cell, score) tuples sorted by decreasing score, empty if
+        there is no model or no reachable exit.
+    """
+    model = model or load_model()
+    found = features(game, mouse_pos, blocked) if model else None
+    if found is None:
+        return []
+    cells, rows, legal = found
+    scores = predict(model, rows)
+    ranked = [(cells[i], float(scores[i])) for i in np.flatnonzero(legal)]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked
+
+
+def teacher_scores(game, mouse_pos, blocked):
+    """Compute best_wall's full score for every cell of a position.
+
+    Unlike best_wall, the marginal cut is computed for every candidate,
+    not only the top ones. Cells off the shortest paths score 0.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Dict mapping candidate cells to their score.
+    """
+    dist = ai_logic.bfs_dist(game, mouse_pos, blocked)
+    candidates = ai_logic.wall_candidates(game, mouse_pos, blocked, dist)
+    base_cut, _, flow_cells = ai_logic.unit_flow_cut(game, mouse_pos, blocked, dist)
+    scores = {}
+    for u, base in candidates:
+        marginal = 0
+        if base_cut is not None and u in flow_cells:
+            new_cut = ai_logic.unit_flow_cut(game, mouse_pos, blocked | {u})[0]
+            if new_cut is not None:
+                marginal = max(0, base_cut - new_cut)
+        scores[u] = base + marginal
+    return scores
+
+
+def training_set(log_paths, limit=None):
+    """Turn self-play logs into feature rows and teacher targets.
+
+    Args:
+        log_paths: JSONL files written by selfplay.py.
+        limit: Maximum number of positions to use (default all).
+
+    Returns:
+        Tuple of (rows, targets) lists.
+    """
+    from game import Game
+    boards = {}
+    rows, targets = [], []
+    used = 0
+    for path in log_paths:
+        with open(path) as f:
+            for line in f:
+                if limit is not None and used >= limit:
+                    return rows, targets
+                rec = json.loads(line)
+                if rec.get("side") != "BLOCKER":
+                    continue
+                size = (rec["w"], rec["h"])
+                if size not in boards:
+                    boards[size] = Game(w=size[0], h=size[1], n_obs=0)
+                board = boards[size]
+                walls = {tuple(c) for c in rec["walls"]}
+                pos = tuple(rec["pos"])
+                found = features(board, pos, walls)
+                if found is None:
+                    continue
+                cells, feats, legal = found
+                teacher = teacher_scores(board, pos, walls)
+                rows.extend(feats[legal].tolist())
+                targets.extend(teacher.get(cells[i], 0.0) for i in np.flatnonzero(legal))
+                used += 1
+    return rows, targets
+
+
+def fit(rows, targets, kind="linear", hidden=16, steps=1500, seed=0):
+    """Fit a model to training rows; requires NumPy.
+
+    Args:
+        rows: Feature rows.
+        targets: Target score per row.
+        kind: "linear" (least squares) or "mlp" (least squares plus one
+            tanh layer fitted to its residual).
+        hidden: Hidden units of the MLP (default 16).
+        steps: Adam steps for the MLP (default 1500).
+        seed: Seed of the MLP initialization (default 0).
+
+    Returns:
+        Model dict.
+    """
+    x = np.array(rows, dtype=float)
+    y = np.array(targets, dtype=float)
+    w, *_ = np.linalg.lstsq(x, y, rcond=None)
+    if kind == "linear":
+        return {"kind": "linear", "features": FEATURES, "w": w.tolist()}
+
+    y = y - x @ w
+    mean = x.mean(axis=0)
+    scale = x.std(axis=0)
+    scale[scale == 0] = 1.0
+    y_scale = float(y.std()) or 1.0
+    x = (x - mean) / scale
+    y = y / y_scale
+    rng = np.random.default_rng(seed)
+    params = [rng.normal(0, 1 / math.sqrt(x.shape[1]), (x.shape[1], hidden)),
+              rng.normal(0, 1 / math.sqrt(hidden), hidden)]
+    moments = [[np.zeros_like(p), np.zeros_like(p)] for p in params]
+    rate, beta1, beta2 = 0.01, 0.9, 0.999
+    for step in range(1, steps + 1):
+        h = np.tanh(x @ params[0])
+        err = h @ params[1] - y
+        grad2 = h.T @ err / len(y)
+        grad1 = x.T @ (np.outer(err, params[1]) * (1 - h * h)) / len(y)
+        for p, g, m in zip(params, (grad1, grad2), moments):
+            m[0] = beta1 * m[0] + (1 - beta1) * g
+            m[1] = beta2 * m[1] + (1 - beta2) * g * g
+            p -= rate * (m[0] / (1 - beta1 ** step)) / (np.sqrt(m[1] / (1 - beta2 ** step)) + 1e-8)
+    return {"kind": "mlp", "features": FEATURES, "w": w.tolist(), "mean": mean.tolist(),
+            "scale": scale.tolist(), "y_scale": y_scale,
+            "w1": params[0].tolist(), "w2": params[1].tolist()}
+
+
+def save_model(model, path=None):
+    """Write a model to disk and make it the active one.
+
+    Args:
+        model: Model dict.
+        path: Model file (default MODEL_FOLDER/MODEL_FILE).
+    """
+    global _model
+    if path is None:
+        if not os.path.exists(MODEL_FOLDER):
+            os.makedirs(MODEL_FOLDER)
+        path = os.path.join(MODEL_FOLDER, MODEL_FILE)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    _model = model
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "train":
+        print("usage: python learned_eval.py train LOG.jsonl... [--model linear|mlp] [--limit N]")
+        sys.exit(1)
+    if np is None:
+        print("training needs numpy")
+        sys.exit(1)
+    args = args[1:]
+    kind, limit = "linear", None
+    if "--model" in args:
+        i = args.index("--model")
+        kind = args[i + 1]
+        del args[i:i + 2]
+    if "--limit" in args:
+        i = args.index("--limit")
+        limit = int(args[i + 1])
+        del args[i:i + 2]
+
+    rows, targets = training_set(args, limit)
+    order = list(range(len(rows)))
+    random.Random(0).shuffle(order)
+    split = len(order) * 4 // 5
+    train = [rows[i] for i in order[:split]], [targets[i] for i in order[:split]]
+    test = [rows[i] for i in order[split:]], [targets[i] for i in order[split:]]
+    model = fit(*train, kind=kind)
+    error = predict(model, test[0]) - np.array(test[1])
+    print(f"{len(rows)} rows, held-out RMSE {math.sqrt(float(np.mean(error ** 2))):.4f}")
+    save_model(model)
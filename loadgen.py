@@ -0,0 +1,124 @@
+"""Load generator for the network PVP server.
+
+Opens two connections per simulated game, keeps all games running at
+once and plays random legal moves with a think time between them. At
+the end it reports completed games, accepted moves per second and the
+round trip time from sending a move to receiving its DELTA.
+
+Usage:
+    python server.py &
+    python loadgen.py --games 2000 --think 0.2
+"""
+import sys
+import time
+import random
+import asyncio
+import protocol
+from game import Game
+
+_boards = {}
+
+
+def _cells(w, h):
+    if (w, h) not in _boards:
+        _boards[(w, h)] = Game(w=w, h=h, n_obs=0)
+    return _boards[(w, h)]
+
+
+async def _read(reader):
+    header = await reader.readexactly(protocol.HEADER.size)
+    msg_type, length = protocol.HEADER.unpack(header)
+    return msg_type, protocol.decode(msg_type, await reader.readexactly(length))
+
+
+async def player(host, port, size, think, rtts, results, rng):
+    """Play one side of a game with random legal moves.
+
+    Args:
+        host: Server host.
+        port: Server port.
+        size: Board size to ask for.
+        think: Mean seconds to wait before each move.
+        rtts: List collecting round trip times of own moves.
+        results: Dict counting "finished", "left" and "errors".
+        rng: random.Random instance.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(protocol.encode_join(size, size, 10))
+        msg_type, fields = await _read(reader)
+        if msg_type != protocol.START:
+            results["errors"] += 1
+            return
+        _, role, w, h, pos, turn, walls = fields
+        board = _cells(w, h)
+        while True:
+            if turn == role:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+                if role == 0:
+                    near = [c for n in board.get_neighbors(*pos) for c in board.get_neighbors(*n)
+                            if c in board.cells and c not in walls and c != pos]
+                    move = rng.choice(near or [c for c in board.cells
+                                               if c not in walls and c != pos])
+                else:
+                    free = [n for n in board.get_neighbors(*pos) if n not in walls]
+                    out = [n for n in free if n not in board.cells]
+                    move = out[0] if out else rng.choice(free)
+                writer.write(protocol.encode_move(*move))
+                sent = time.perf_counter()
+            else:
+                sent = None
+            msg_type, fields = await _read(reader)
+            if msg_type == protocol.LEFT:
+                results["left"] += 1
+                return
+            if msg_type != protocol.DELTA:
+                results["errors"] += 1
+                return
+            if sent is not None:
+                rtts.append(time.perf_counter() - sent)
+            kind, cell, turn, winner = fields
+            if kind == protocol.WALL_PLACED:
+                walls.add(cell)
+            else:
+                pos = cell
+            if winner:
+                results["finished"] += 1
+                return
+    finally:
+        writer.close()
+
+
+async def run(games, host, port, think, size, seed=0):
+    """Run many games at once and print the measurements."""
+    rng = random.Random(seed)
+    rtts = []
+    results = {"finished": 0, "left": 0, "errors": 0}
+    start = time.perf_counter()
+    tasks = []
+    for _ in range(games):
+        for _ in range(2):
+            tasks.append(asyncio.create_task(player(host, port, size, think, rtts, results,
+                                                    random.Random(rng.random()))))
+    done = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for d in done if isinstance(d, Exception))
+    rtts.sort()
+    print(f"{games} concurrent games, {results['finished'] // 2} finished, "
+          f"{results['left']} opponent-left, {results['errors'] + failures} errors "
+          f"in {elapsed:.1f}s")
+    if rtts:
+        print(f"{len(rtts)} moves ({len(rtts) / elapsed:.0f}/s), round trip "
+              f"p50 {1000 * rtts[len(rtts) // 2]:.1f} ms, "
+              f"p99 {1000 * rtts[int(len(rtts) * 0.99)]:.1f} ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--games": "1000", "--host": protocol.DEFAULT_HOST,
+               "--port": str(protocol.DEFAULT_PORT), "--think": "0.2", "--size": "11"}
+    for name in options:
+        if name in args:
+            options[name] = args[args.index(name) + 1]
+    asyncio.run(run(int(options["--games"]), options["--host"], int(options["--port"]),
+                    float(options["--think"]), int(options["--size"])))
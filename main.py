@@ -4,29 +4,46 @@ This module contains the main entry point for the game, handling Pygame
 initialization, event processing, state management, menu navigation, and
 all rendering logic for the game interface.
 """
-import pygame
-import math
+import time
+STARTED = time.perf_counter()
 import os
-from game import Game
+import sys
+import threading
+import pygame
 import constants as C
 import hex_math
 import ui
+import assets
+
+# The game, AI and save modules are imported where they are first used
+# (and ahead of that by warm_up()), so the menu shows without them.
+
+# Budget of the proof search behind the analysis key (A). It runs on a
+# background thread; the game stays playable and a stale one is dropped.
+ANALYSIS_NODES = 5000
+ANALYSIS_TIME = 3.0
 
 if __name__ == "__main__":
-    pygame.init()
+    startup_profile = "--startup-profile" in sys.argv
+    phases = [("imports", time.perf_counter())]
+
+    def mark(phase):
+        phases.append((phase, time.perf_counter()))
+
+    # Only what the first frame needs; pygame.init() follows it.
+    pygame.display.init()
+    pygame.font.init()
     W, H = C.SCREEN_W, C.SCREEN_H
     scr = pygame.display.set_mode((W, H))
     pygame.display.set_caption("TrapTheMouse")
     clock = pygame.time.Clock()
-    
-    mouse_img_raw = None
-    if os.path.exists("mouse.png"):
-        mouse_img_raw = pygame.image.load("mouse.png")
+    mark("display")
 
     # Fonts
-    font_title = pygame.font.SysFont("Arial", 50, bold=True)
-    font_btn = pygame.font.SysFont("Arial", 28)
-    font_small = pygame.font.SysFont("Arial", 18)
+    font_title = assets.load_font("Arial", 50, bold=True)
+    font_btn = assets.load_font("Arial", 28)
+    font_small = assets.load_font("Arial", 18)
+    mark("fonts")
 
     state = "MENU_MAIN"
 
@@ -44,6 +61,9 @@ if __name__ == "__main__":
     btn_vs_ai = ui.get_centered_rect_y(220, W)
     btn_vs_pvp = ui.get_centered_rect_y(280, W)
     btn_load_menu = ui.get_centered_rect_y(340, W) 
+    btn_vs_net = ui.get_centered_rect_y(520, W)
+    btn_exhibition = ui.get_centered_rect_y(580, W)
+    btn_spectate = ui.get_centered_rect_y(640, W)
     
     btn_sz_11 = pygame.Rect(W//2 - 140, 450, 60, 40)
     btn_sz_13 = pygame.Rect(W//2 - 70, 450, 60, 40)
@@ -56,6 +76,7 @@ if __name__ == "__main__":
     btn_diff_easy = ui.get_centered_rect_y(220, W)
     btn_diff_med = ui.get_centered_rect_y(280, W)
     btn_diff_hard = ui.get_centered_rect_y(340, W)
+    btn_diff_expert = ui.get_centered_rect_y(400, W)
 
     btn_undo = pygame.Rect(30, H - 60, 70, 40)
     btn_redo = pygame.Rect(110, H - 60, 70, 40)
@@ -63,6 +84,17 @@ if __name__ == "__main__":
     btn_load_ingame = pygame.Rect(280, H - 60, 70, 40)
     btn_menu = pygame.Rect(W - 110, H - 60, 80, 40)
 
+    btn_play = pygame.Rect(30, H - 60, 70, 40)
+    btn_step = pygame.Rect(110, H - 60, 70, 40)
+    btn_slower = pygame.Rect(200, H - 60, 70, 40)
+    btn_faster = pygame.Rect(280, H - 60, 70, 40)
+    diffs = ("EASY", "MEDIUM", "HARD", "EXPERT")
+    btn_spec_blocker = [pygame.Rect(W//2 - 235 + i * 120, 240, 110, 40) for i in range(4)]
+    btn_spec_mouse = [pygame.Rect(W//2 - 235 + i * 120, 340, 110, 40) for i in range(4)]
+    btn_spec_start = ui.get_centered_rect_y(440, W)
+    spec_diffs = ["HARD", "HARD"]
+    timeline = pygame.Rect(30, H - 45, W - 170, 12)
+
     save_files = []
     save_file_rects = []
     delete_file_rects = []
@@ -71,6 +103,30 @@ if __name__ == "__main__":
     
     msg_timer = 0
     msg_text = ""
+    hint_cell = None
+    net = None
+    exhib = None
+    spec = None
+    rep = None
+    rep_pos = 0
+    rep_shown = None
+    rep_playing = False
+    rep_timer = 0
+    ponderer = None
+    analysis = None
+    thumbs = None
+    mouse_img_raw = None
+
+    def stop_pondering():
+        ponderer.cancel()
+        if game is not None:
+            game.reply_cache.clear()
+
+    def leave_network():
+        global net
+        if net is not None:
+            net.close()
+            net = None
 
     def refresh_save_list():
         save_files.clear()
@@ -85,6 +141,11 @@ if __name__ == "__main__":
         files.sort(key=lambda x: os.path.getmtime(os.path.join(folder, x)), reverse=True)
         
         display_files = files[:6]
+        global thumbs
+        if thumbs is None:
+            import thumbnails
+            thumbs = thumbnails.ThumbnailCache()
+        thumbs.refresh(display_files)
         
         start_y = 200
         for i, f in enumerate(display_files):
@@ -95,7 +156,26 @@ if __name__ == "__main__":
             save_file_rects.append(rect)
             delete_file_rects.append(del_rect)
 
+    def warm_up():
+        """Load what the menus do not need while the first menu is shown."""
+        global mouse_img_raw
+        import game, proof_search, ponder, replay, spectator, exhibition  # noqa: F401
+        mark("game modules")
+        if os.path.exists("mouse.png"):
+            mouse_img_raw = pygame.image.load("mouse.png")
+        mark("images")
+        import start_positions, opening_book, tablebase, learned_eval
+        start_positions.prefill(board_size, board_size, 10)
+        opening_book.preload()
+        tablebase.preload()
+        learned_eval.load_model()
+        mark("caches")
+        if startup_profile:
+            report = "  ".join(f"{name} {(t - STARTED) * 1000:.0f} ms" for name, t in phases)
+            print(f"startup: {report}", flush=True)
+
     run = True
+    first_frame = True
     while run:
         scr.fill(C.COLOR_BG)
         mx, my = pygame.mouse.get_pos()
@@ -115,6 +195,9 @@ if __name__ == "__main__":
             ui.draw_button(scr, btn_sz_13, "13", font_small, (mx, my), board_size==13)
             ui.draw_button(scr, btn_sz_15, "15", font_small, (mx, my), board_size==15)
             ui.draw_button(scr, btn_sz_17, "17", font_small, (mx, my), board_size==17)
+            ui.draw_button(scr, btn_vs_net, "Network PVP", font_btn, (mx, my))
+            ui.draw_button(scr, btn_exhibition, "Exhibition", font_btn, (mx, my))
+            ui.draw_button(scr, btn_spectate, "AI vs AI", font_btn, (mx, my))
 
         elif state == "MENU_SAVE":
             title = font_title.render("SAVE GAME AS", True, C.COLOR_WHITE)
@@ -146,6 +229,11 @@ if __name__ == "__main__":
                 scr.blit(info, info.get_rect(center=(W//2, 250)))
             
             for i, fname in enumerate(save_files):
+                thumb_rect = pygame.Rect(save_file_rects[i].x - 82, save_file_rects[i].centery - 27, 72, 54)
+                thumb = thumbs.get(fname)
+                if thumb is not None:
+                    scr.blit(thumb, thumb_rect)
+                pygame.draw.rect(scr, C.COLOR_BTN_NORMAL, thumb_rect, 1)
                 ui.draw_button(scr, save_file_rects[i], fname[:-4], font_small, (mx, my))
                 ui.draw_button(scr, delete_file_rects[i], "X", font_small, (mx, my), bg_color=C.COLOR_BTN_DELETE)
 
@@ -166,14 +254,118 @@ if __name__ == "__main__":
             ui.draw_button(scr, btn_diff_easy, "EAZY", font_btn, (mx, my))
             ui.draw_button(scr, btn_diff_med, "MEDIUM", font_btn, (mx, my))
             ui.draw_button(scr, btn_diff_hard, "HARD", font_btn, (mx, my))
+            ui.draw_button(scr, btn_diff_expert, "EXPERT", font_btn, (mx, my))
             back_txt = font_small.render("ESC - Back", True, C.COLOR_TEXT_DARK_GRAY)
             scr.blit(back_txt, back_txt.get_rect(center=(W//2, 500)))
 
+        elif state == "MENU_SPECTATE":
+            title = font_title.render("AI vs AI", True, C.COLOR_WHITE)
+            scr.blit(title, title.get_rect(center=(W//2, 130)))
+            for label, rects, side in (("Zidar:", btn_spec_blocker, 0), ("Soarece:", btn_spec_mouse, 1)):
+                scr.blit(font_small.render(label, True, C.COLOR_TEXT_GRAY), (rects[0].x, rects[0].y - 25))
+                for rect, d in zip(rects, diffs):
+                    ui.draw_button(scr, rect, d, font_small, (mx, my), spec_diffs[side] == d)
+            ui.draw_button(scr, btn_spec_start, "Start", font_btn, (mx, my))
+            back_txt = font_small.render("ESC - Back", True, C.COLOR_TEXT_DARK_GRAY)
+            scr.blit(back_txt, back_txt.get_rect(center=(W//2, 560)))
+
+        elif state == "SPECTATE":
+            spec.advance()
+            shown = spec.game
+            SZ = hex_math.get_hex_size(shown.w, shown.h, W, H - 110)
+            if mouse_img_raw:
+                scaled_mouse_img = pygame.transform.scale(mouse_img_raw, (SZ * 1.5, SZ * 1.5))
+            speed_txt = "MAX" if spec.speed is None else f"{spec.speed} mutari/s"
+            if spec.paused:
+                speed_txt = "PAUZA"
+            info = (f"AI vs AI | Zidar {spec.difficulties[0]} - Soarece {spec.difficulties[1]} | "
+                    f"Size: {shown.w}x{shown.h} | {speed_txt}")
+            scr.blit(font_small.render(info, True, C.COLOR_TEXT_GRAY), (20, 20))
+            score = (f"Joc {spec.games + 1} | Zidar {spec.wins['BLOCKER']} - Soarece {spec.wins['MOUSE']} | "
+                     f"{spec.games_per_minute():.0f} jocuri/min")
+            scr.blit(font_small.render(score, True, C.COLOR_TURN_INDICATOR), (20, 45))
+            ui.draw_board(scr, shown, SZ, (CX, CY), mouse_img=scaled_mouse_img)
+            if shown.over:
+                wtxt = "ZIDARUL A CASTIGAT!" if shown.winner == "BLOCKER" else "SOARECELE A SCAPAT!"
+                img = font_btn.render(wtxt, True, (255, 215, 0))
+                scr.blit(img, img.get_rect(center=(W // 2, H - 85)))
+            ui.draw_button(scr, btn_play, "Play" if spec.paused else "Pause", font_small, (mx, my))
+            ui.draw_button(scr, btn_step, "Step", font_small, (mx, my))
+            ui.draw_button(scr, btn_slower, "-", font_small, (mx, my))
+            ui.draw_button(scr, btn_faster, "+", font_small, (mx, my))
+            ui.draw_button(scr, btn_menu, "Menu", font_small, (mx, my))
+            keys_txt = font_small.render("SPACE - Pause | N - Step | +/- Speed", True, C.COLOR_TEXT_DARK_GRAY)
+            scr.blit(keys_txt, (370, H - 50))
+
+        elif state == "REPLAY":
+            if rep_playing and pygame.time.get_ticks() - rep_timer > 500:
+                rep_timer = pygame.time.get_ticks()
+                rep_pos = min(rep_pos + 1, len(rep))
+                rep_playing = rep_pos < len(rep)
+            if rep_shown is None or rep_shown[0] != rep_pos:
+                rep_shown = (rep_pos, rep.game_at(rep_pos))
+            shown = rep_shown[1]
+            SZ = hex_math.get_hex_size(shown.w, shown.h, W, H - 110)
+            if mouse_img_raw:
+                scaled_mouse_img = pygame.transform.scale(mouse_img_raw, (SZ * 1.5, SZ * 1.5))
+            info = f"REPLAY | Size: {shown.w}x{shown.h} | Mutarea {rep_pos} / {len(rep)}"
+            if rep_pos == len(rep) and shown.over:
+                info += " | " + ("Zidarul a castigat" if shown.winner == "BLOCKER" else "Soarecele a scapat")
+            scr.blit(font_small.render(info, True, C.COLOR_TEXT_GRAY), (20, 20))
+            keys_txt = "SPACE - Play | Sageti - Pas | Home/End | ESC - Inapoi"
+            scr.blit(font_small.render(keys_txt, True, C.COLOR_TEXT_DARK_GRAY), (20, 45))
+            ui.draw_board(scr, shown, SZ, (CX, CY), mouse_img=scaled_mouse_img)
+            pygame.draw.rect(scr, C.COLOR_BTN_NORMAL, timeline, border_radius=6)
+            done = timeline.copy()
+            done.w = timeline.w * rep_pos // max(1, len(rep))
+            pygame.draw.rect(scr, C.COLOR_TURN_INDICATOR, done, border_radius=6)
+            pygame.draw.circle(scr, C.COLOR_WHITE, (done.right, timeline.centery), 9)
+            ui.draw_button(scr, btn_menu, "Back", font_small, (mx, my))
+
+        elif state == "EXHIBITION":
+            exhib.update((mx, my))
+            role_txt = "Zidar" if exhib.player_role == "BLOCKER" else "Soarece"
+            won, lost, playing = exhib.score()
+            info = (f"EXHIBITION | {role_txt} | {exhib.difficulty} | Size: {exhib.w}x{exhib.h} | "
+                    f"Castigate {won}  Pierdute {lost}  In joc {playing} | {clock.get_fps():.0f} FPS")
+            scr.blit(font_small.render(info, True, C.COLOR_TEXT_GRAY), (20, 20))
+            exhib.draw(scr, font_small, (mx, my), scaled_mouse_img)
+            sub = font_small.render("R - Restart board | ESC - Menu", True, C.COLOR_TEXT_DARK_GRAY)
+            scr.blit(sub, (30, H - 50))
+            ui.draw_button(scr, btn_menu, "Menu", font_small, (mx, my))
+
         elif state == "GAME":
+            if net is not None:
+                net.poll()
+                if net.error:
+                    msg_text = net.error
+                    msg_timer = 120
+                    net.error = ""
+                game = net.game
+                if game is None:
+                    wait_txt = "Connecting..." if net.status == "CONNECTING" else "Waiting for opponent..."
+                    if net.status == "CLOSED":
+                        wait_txt = msg_text or "Connection closed"
+                    img = font_btn.render(wait_txt, True, C.COLOR_WHITE)
+                    scr.blit(img, img.get_rect(center=(W // 2, H // 2)))
+                    sub = font_small.render("ESC - Menu", True, C.COLOR_TEXT_GRAY)
+                    scr.blit(sub, sub.get_rect(center=(W // 2, H // 2 + 40)))
             if game is None:
-                state = "MENU_MAIN"
+                if net is None:
+                    state = "MENU_MAIN"
+                for e in pygame.event.get():
+                    if e.type == pygame.QUIT:
+                        run = False
+                    if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
+                        leave_network()
+                        state = "MENU_MAIN"
+                pygame.display.flip()
+                clock.tick(60)
                 continue
             
+            if ponderer is None:
+                import ponder
+                ponderer = ponder.Ponderer()
             SZ = hex_math.get_hex_size(game.w, game.h, W, H - 110)
             
             if mouse_img_raw:
@@ -182,59 +374,50 @@ if __name__ == "__main__":
             if not game.over:
                 role_txt = "Zidar" if game.player_role == "BLOCKER" else "Soarece"
                 diff_txt = f"{game.difficulty}" if game.mode == "AI" else "PVP"
+                if game.mode == "AI" and game.expert is not None:
+                    diff_txt += f" ({game.expert.last_rps:.0f} rollouts/s)"
                 info = f"{game.mode} | {role_txt} | {diff_txt} | Size: {game.w}x{game.h}"
                 scr.blit(font_small.render(info, True, C.COLOR_TEXT_GRAY), (20, 20))
                 
                 turn_label = "Randul tau" if (game.turn == 0 and game.player_role == "BLOCKER") or (game.turn == 1 and game.player_role == "MOUSE") else "Gandeste AI..."
                 if game.mode == "PVP": turn_label = "Zidar" if game.turn == 0 else "Soarece"
+                if game.mode == "NET" and not net.my_turn(): turn_label = "Muta adversarul..."
                 scr.blit(font_small.render(turn_label, True, C.COLOR_TURN_INDICATOR), (20, 45))
 
-            raw_q, raw_r = hex_math.pixel_to_hex(mx, my, SZ, CX, CY)
-            mid_r = game.h // 2
-            mid_q = (game.w // 2) - (mid_r // 2)
-            hq, hr = raw_q + mid_q, raw_r + mid_r
-
-            for q, r in game.cells:
-                color = C.COLOR_CELL_DEFAULT
-                if (q, r) in game.walls: color = C.COLOR_WALL
-                if (q, r) == game.pos:   color = C.COLOR_MOUSE_POS
-                
-                if (q, r) == (hq, hr) and not game.over:
-                    valid = False
-                    is_neighbor = (q, r) in game.get_neighbors(*game.pos)
-                    is_not_wall = (q, r) not in game.walls
-
-                    if game.mode == "PVP":
-                        if game.turn == 0:
-                            if is_not_wall and (q,r) != game.pos: valid = True
-                        else:
-                            if is_neighbor and is_not_wall: valid = True
-                    else:
-                        if game.player_role == "BLOCKER":
-                             if game.turn == 0 and is_not_wall and (q,r) != game.pos: valid = True
-                        else:
-                             if game.turn == 1 and is_neighbor and is_not_wall: valid = True
-
-                    color = C.COLOR_VALID_MOVE if valid else C.COLOR_INVALID_MOVE
-
-                px, py = hex_math.hex_to_pixel(q - mid_q, r - mid_r, SZ, CX, CY)
-                pts = []
-                for i in range(6):
-                    ang = math.radians(60 * i - 30)
-                    pts.append((px + SZ * math.cos(ang), py + SZ * math.sin(ang)))
-                pygame.draw.polygon(scr, color, pts)
-                pygame.draw.polygon(scr, C.COLOR_BLACK, pts, 2)
-
-                if (q, r) == game.pos and scaled_mouse_img:
-                    r_img = scaled_mouse_img.get_rect(center=(px, py))
-                    scr.blit(scaled_mouse_img, r_img)
-
-            ui.draw_button(scr, btn_undo, "Undo", font_small, (mx, my))
-            can_redo = len(game.redo_stack) > 0
-            bg_redo = None if can_redo else (40, 40, 40)
-            ui.draw_button(scr, btn_redo, "Redo", font_small, (mx, my), bg_color=bg_redo)
-            ui.draw_button(scr, btn_save, "Save", font_small, (mx, my))
-            ui.draw_button(scr, btn_load_ingame, "Load", font_small, (mx, my))
+            human_turn = (game.turn == 0 and game.player_role == "BLOCKER") or (game.turn == 1 and game.player_role == "MOUSE")
+            if game.mode == "AI" and not game.over and human_turn:
+                ponderer.start(game)
+
+            if analysis is not None and analysis.key != game.position_key():
+                analysis.cancel()
+                analysis = None
+                if msg_text == "Analysis...":
+                    msg_timer = 0
+            if analysis is not None and analysis.result is not None:
+                import proof_search
+                status, pv = analysis.result
+                analysis = None
+                if status == proof_search.PROVEN:
+                    msg_text = "Analysis: blocker forces a trap"
+                elif status == proof_search.DISPROVEN:
+                    msg_text = "Analysis: mouse escapes"
+                else:
+                    msg_text = "Analysis: unknown within budget"
+                if pv:
+                    hint_cell = pv[0][1]
+                msg_timer = 180
+
+            hq, hr = hex_math.pixel_to_cell(mx, my, game.w, game.h, SZ, CX, CY)
+            ui.draw_board(scr, game, SZ, (CX, CY), hover=(hq, hr), hint=hint_cell,
+                          mouse_img=scaled_mouse_img)
+
+            if game.mode != "NET":
+                ui.draw_button(scr, btn_undo, "Undo", font_small, (mx, my))
+                can_redo = len(game.redo_stack) > 0
+                bg_redo = None if can_redo else (40, 40, 40)
+                ui.draw_button(scr, btn_redo, "Redo", font_small, (mx, my), bg_color=bg_redo)
+                ui.draw_button(scr, btn_save, "Save", font_small, (mx, my))
+                ui.draw_button(scr, btn_load_ingame, "Load", font_small, (mx, my))
             ui.draw_button(scr, btn_menu, "Menu", font_small, (mx, my))
 
             if msg_timer > 0:
@@ -260,7 +443,7 @@ if __name__ == "__main__":
                 img = font_title.render(wtxt, True, col)
                 screen_center = img.get_rect(center=(W // 2, H // 2 - 20))
                 scr.blit(img, screen_center)
-                sub = font_small.render("R - Restart | ESC - Menu", True, C.COLOR_TEXT_GRAY)
+                sub = font_small.render("R - Restart | V - Replay | ESC - Menu", True, C.COLOR_TEXT_GRAY)
                 scr.blit(sub, sub.get_rect(center=(W // 2, H // 2 + 40)))
 
         for e in pygame.event.get():
@@ -300,21 +483,37 @@ if __name__ == "__main__":
                         state = "MENU_ROLE"
                     elif btn_vs_pvp.collidepoint((mx, my)):
                         selected_mode = "PVP"
-                        game = Game(mode="PVP", player_role="BLOCKER", w=board_size, h=board_size)
+                        from game import Game
+                        game = Game(mode="PVP", player_role="BLOCKER", w=board_size, h=board_size, balanced=True)
                         state = "GAME"
                     elif btn_load_menu.collidepoint((mx, my)):
                         refresh_save_list()
                         state = "MENU_LOAD"
+                    elif btn_spectate.collidepoint((mx, my)):
+                        state = "MENU_SPECTATE"
+                    elif btn_exhibition.collidepoint((mx, my)):
+                        selected_mode = "EXHIBITION"
+                        state = "MENU_ROLE"
+                    elif btn_vs_net.collidepoint((mx, my)):
+                        game = None
+                        import net_client
+                        net = net_client.NetClient(board_size, board_size)
+                        state = "GAME"
                     
+                    old_size = board_size
                     if btn_sz_11.collidepoint((mx, my)): board_size = 11
                     if btn_sz_13.collidepoint((mx, my)): board_size = 13
                     if btn_sz_15.collidepoint((mx, my)): board_size = 15
                     if btn_sz_17.collidepoint((mx, my)): board_size = 17
+                    if board_size != old_size:
+                        import start_positions
+                        start_positions.prefill(board_size, board_size, 10)
 
             elif state == "MENU_LOAD":
                 if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
                     for i, rect in enumerate(save_file_rects):
                         if rect.collidepoint((mx, my)):
+                            from game import Game
                             loaded_game = Game.load_from_file(save_files[i])
                             if loaded_game:
                                 game = loaded_game
@@ -349,20 +548,132 @@ if __name__ == "__main__":
                     elif btn_diff_hard.collidepoint((mx, my)):
                         selected_diff = "HARD"
                         ready = True
+                    elif btn_diff_expert.collidepoint((mx, my)):
+                        selected_diff = "EXPERT"
+                        ready = True
                     
-                    if ready:
-                        game = Game(mode="AI", difficulty=selected_diff, player_role=selected_role, w=board_size, h=board_size)
+                    if ready and selected_mode == "EXHIBITION":
+                        import exhibition
+                        exhib = exhibition.Exhibition(pygame.Rect(0, 50, W, H - 120), exhibition.BOARDS,
+                                                      board_size, board_size, selected_role, selected_diff)
+                        if mouse_img_raw:
+                            scaled_mouse_img = pygame.transform.scale(mouse_img_raw, (exhib.sz * 1.5, exhib.sz * 1.5))
+                        state = "EXHIBITION"
+                    elif ready:
+                        from game import Game
+                        game = Game(mode="AI", difficulty=selected_diff, player_role=selected_role, w=board_size, h=board_size,
+                                    auto_resolve=True, balanced=True)
                         state = "GAME"
                 if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
                     state = "MENU_ROLE"
 
 
+            elif state == "MENU_SPECTATE":
+                if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                    for side, rects in ((0, btn_spec_blocker), (1, btn_spec_mouse)):
+                        for rect, d in zip(rects, diffs):
+                            if rect.collidepoint((mx, my)):
+                                spec_diffs[side] = d
+                    if btn_spec_start.collidepoint((mx, my)):
+                        import spectator
+                        spec = spectator.Spectator(board_size, board_size, *spec_diffs)
+                        state = "SPECTATE"
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
+                    state = "MENU_MAIN"
+
+            elif state == "SPECTATE":
+                if e.type == pygame.KEYDOWN:
+                    if e.key == pygame.K_SPACE: spec.toggle_pause()
+                    if e.key in (pygame.K_n, pygame.K_RIGHT) and spec.paused: spec.step()
+                    if e.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS, pygame.K_UP): spec.faster()
+                    if e.key in (pygame.K_MINUS, pygame.K_KP_MINUS, pygame.K_DOWN): spec.slower()
+                    if e.key == pygame.K_ESCAPE:
+                        spec = None
+                        state = "MENU_MAIN"
+                if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                    if btn_play.collidepoint((mx, my)): spec.toggle_pause()
+                    elif btn_step.collidepoint((mx, my)) and spec.paused: spec.step()
+                    elif btn_slower.collidepoint((mx, my)): spec.slower()
+                    elif btn_faster.collidepoint((mx, my)): spec.faster()
+                    elif btn_menu.collidepoint((mx, my)):
+                        spec = None
+                        state = "MENU_MAIN"
+
+            elif state == "REPLAY":
+                if e.type == pygame.KEYDOWN:
+                    if e.key == pygame.K_SPACE:
+                        rep_playing = not rep_playing
+                        if rep_pos == len(rep): rep_pos = 0
+                        rep_timer = pygame.time.get_ticks()
+                    if e.key == pygame.K_LEFT: rep_pos = max(rep_pos - 1, 0)
+                    if e.key == pygame.K_RIGHT: rep_pos = min(rep_pos + 1, len(rep))
+                    if e.key == pygame.K_HOME: rep_pos = 0
+                    if e.key == pygame.K_END: rep_pos = len(rep)
+                    if e.key == pygame.K_ESCAPE:
+                        rep = rep_shown = None
+                        state = "GAME"
+                if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and btn_menu.collidepoint((mx, my)):
+                    rep = rep_shown = None
+                    state = "GAME"
+                seeking = ((e.type == pygame.MOUSEBUTTONDOWN and e.button == 1)
+                           or (e.type == pygame.MOUSEMOTION and e.buttons[0]))
+                if rep is not None and seeking and timeline.inflate(0, 20).collidepoint((mx, my)):
+                    rep_playing = False
+                    rep_pos = round((mx - timeline.x) / timeline.w * len(rep))
+                    rep_pos = max(0, min(rep_pos, len(rep)))
+
+            elif state == "EXHIBITION":
+                leave = e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE
+                if e.type == pygame.KEYDOWN and e.key == pygame.K_r and exhib.focus is not None:
+                    exhib.restart(exhib.focus)
+                if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                    if btn_menu.collidepoint((mx, my)):
+                        leave = True
+                    else:
+                        exhib.click((mx, my))
+                if leave:
+                    exhib.close()
+                    exhib = None
+                    state = "MENU_MAIN"
+
             elif state == "GAME":
+                if e.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                    hint_cell = None
+                if net is not None:
+                    if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
+                        leave_network()
+                        state = "MENU_MAIN"
+                    if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+                        if btn_menu.collidepoint((mx, my)):
+                            leave_network()
+                            state = "MENU_MAIN"
+                        else:
+                            net.send_move(hq, hr)
+                    continue
                 if e.type == pygame.KEYDOWN:
+                    if e.key == pygame.K_a and not game.over and analysis is None:
+                        import proof_search
+                        analysis = proof_search.Analysis(game, max_nodes=ANALYSIS_NODES,
+                                                         time_budget=ANALYSIS_TIME)
+                        msg_text = "Analysis..."
+                        msg_timer = 60 * int(ANALYSIS_TIME + 1)
+                    if e.key in (pygame.K_r, pygame.K_ESCAPE, pygame.K_z, pygame.K_y):
+                        stop_pondering()
                     if e.key == pygame.K_r: game.reset()
                     if e.key == pygame.K_ESCAPE: state = "MENU_MAIN"
                     if e.key == pygame.K_z: game.undo()
                     if e.key == pygame.K_y: game.redo()
+                    if e.key == pygame.K_v:
+                        if game.start_walls is None:
+                            msg_text = "No move log in this save"
+                            msg_timer = 120
+                        else:
+                            import replay
+                            rep = replay.Replay(game)
+                            rep_pos = len(rep)
+                            rep_shown = None
+                            rep_playing = False
+                            state = "REPLAY"
                     if e.key == pygame.K_s: 
                         if game.current_filename:
                             if game.save_to_file(game.current_filename):
@@ -373,8 +684,12 @@ if __name__ == "__main__":
                             save_error_msg = ""
                 
                 if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
-                    if btn_undo.collidepoint((mx, my)): game.undo()
-                    elif btn_redo.collidepoint((mx, my)): game.redo()
+                    if btn_undo.collidepoint((mx, my)):
+                        stop_pondering()
+                        game.undo()
+                    elif btn_redo.collidepoint((mx, my)):
+                        stop_pondering()
+                        game.redo()
                     elif btn_save.collidepoint((mx, my)): 
                         if game.current_filename:
                             if game.save_to_file(game.current_filename):
@@ -384,13 +699,30 @@ if __name__ == "__main__":
                             input_text = ""
                             save_error_msg = ""
                     elif btn_load_ingame.collidepoint((mx, my)):
+                        stop_pondering()
                         refresh_save_list()
                         state = "MENU_LOAD"
-                    elif btn_menu.collidepoint((mx, my)): state = "MENU_MAIN"
+                    elif btn_menu.collidepoint((mx, my)):
+                        stop_pondering()
+                        state = "MENU_MAIN"
                     else:
+                        ponderer.cancel()
                         game.click_tile(hq, hr)
 
         pygame.display.flip()
-        clock.tick(60)
+        if first_frame:
+            first_frame = False
+            mark("first frame")
+            pygame.init()
+            threading.Thread(target=warm_up, daemon=True).start()
+        if state == "SPECTATE" and spec.speed is None and not spec.paused:
+            # Logic runs flat out in spec.advance(); only count the frames.
+            clock.tick()
+        else:
+            clock.tick(60)
         
+    if exhib is not None:
+        exhib.close()
+    if thumbs is not None:
+        thumbs.close()
     pygame.quit()
\ No newline at end of file
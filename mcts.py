@@ -0,0 +1,309 @@
+"""Monte Carlo Tree Search player for the EXPERT difficulty.
+
+Unlike the one-ply HARD heuristics, the searcher looks ahead by growing a
+game tree with UCT selection and scoring its leaves with fast random
+playouts. Playouts follow cheap policies built from get_shortest_path and
+random nearby walls, and are spread across a pool of worker processes in
+batches, with virtual losses keeping the batch on different leaves. The
+tree is kept between turns and re-rooted at the opponent's actual move.
+"""
+import os
+import math
+import atexit
+import signal
+import random
+import time
+import multiprocessing
+import ai_logic
+import bfs_engine
+
+TIME_BUDGET = 1.0
+WORKERS = os.cpu_count() or 1
+ROLLOUTS_PER_LEAF = 4
+WALL_BRANCHING = 10
+EXPLORATION = 1.4
+PRIOR_VISITS = 8
+PRIOR_VALUE = 0.8
+MOUSE_NOISE = 0.2
+BLOCKER_NOISE = 0.3
+
+_pools = {}
+_boards = {}
+
+
+class Node:
+    """A position in the search tree.
+
+    Attributes:
+        state: Tuple of (walls frozenset, mouse position, turn).
+        parent: Parent node, None for the root.
+        move: Cell of the wall or mouse move leading here.
+        children: List of expanded child nodes.
+        untried: Moves not expanded yet, None until first visited.
+        visits: Number of playouts through this node.
+        wins: Playouts won by the side that made move.
+        winner: "BLOCKER" or "MOUSE" for terminal positions, else None.
+    """
+    __slots__ = ("state", "parent", "move", "children", "untried",
+                 "visits", "wins", "winner")
+
+    def __init__(self, state, parent=None, move=None):
+        self.state = state
+        self.parent = parent
+        self.move = move
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.winner = None
+
+
+def _winner(game, walls, pos, turn):
+    """Return the winner of a position if the game is decided there."""
+    free = 0
+    for n in game.get_neighbors(*pos):
+        if n not in game.cells:
+            return "MOUSE"
+        if n not in walls:
+            free += 1
+    if free == 0:
+        return "BLOCKER"
+    return None
+
+
+def _moves(game, walls, pos, turn):
+    """List the moves searched from a position, most promising first."""
+    if turn == 1:
+        moves = [n for n in game.get_neighbors(*pos) if n not in walls]
+        win_hexes = ai_logic.winning_hex(game, walls)
+        scores = dict(zip(moves, bfs_engine.score_moves(game, moves, walls, win_hexes)))
+        moves.sort(key=lambda n: -scores[n])
+        return moves
+    moves = [c for c, _ in ai_logic.wall_candidates(game, pos, walls)[:WALL_BRANCHING]]
+    for n in game.get_neighbors(*pos):
+        if n in game.cells and n not in walls and n not in moves:
+            moves.append(n)
+    return moves
+
+
+def _board(w, h):
+    """Return a wall-free Game used for the geometry of a board size."""
+    board = _boards.get((w, h))
+    if board is None:
+        from game import Game
+        board = _boards[(w, h)] = Game(w=w, h=h, n_obs=0)
+    return board
+
+
+def rollout(game, walls, pos, turn, rng):
+    """Play a position out with the cheap policies.
+
+    The mouse mostly follows its shortest path to the edge. The blocker
+    mostly walls the mouse's next step on that path, otherwise a random
+    free cell close to the mouse.
+
+    Args:
+        game: Game instance providing the board geometry.
+        walls: Set of blocked cells, modified in place.
+        pos: Mouse position (q, r).
+        turn: Side to move (0 = blocker, 1 = mouse).
+        rng: random.Random instance.
+
+    Returns:
+        "BLOCKER" or "MOUSE".
+    """
+    while True:
+        winner = _winner(game, walls, pos, turn)
+        if winner:
+            return winner
+        step = ai_logic.get_shortest_path(game, pos, walls)
+        if turn == 1:
+            free = [n for n in game.get_neighbors(*pos) if n not in walls]
+            if step not in free or rng.random() < MOUSE_NOISE:
+                step = rng.choice(free)
+            if step not in game.cells:
+                return "MOUSE"
+            pos = step
+        else:
+            if step is None or step not in game.cells or rng.random() < BLOCKER_NOISE:
+                near = [c for n in game.get_neighbors(*pos) for c in game.get_neighbors(*n)
+                        if c in game.cells and c not in walls and c != pos]
+                if not near:
+                    return "BLOCKER" if step is None else "MOUSE"
+                step = rng.choice(near)
+            walls.add(step)
+        turn = 1 - turn
+
+
+def _rollout_task(task):
+    """Worker entry point: run several playouts from one leaf."""
+    w, h, walls, pos, turn, count, seed = task
+    board = _board(w, h)
+    rng = random.Random(seed)
+    wins = 0
+    for _ in range(count):
+        if rollout(board, set(walls), pos, turn, rng) == "BLOCKER":
+            wins += 1
+    return wins
+
+
+def _init_worker():
+    # Started from the pygame process, whose SDL handler would swallow
+    # the SIGTERM that Pool.terminate() sends.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def _get_pool(workers):
+    """Return the rollout pool with that many workers, starting it once.
+
+    The workers are spawned rather than forked: the GUI process has
+    threads running (warm-up, pondering, start layouts) whose locks a
+    fork could copy in a held state.
+    """
+    pool = _pools.get(workers)
+    if pool is None:
+        if not _pools:
+            atexit.register(close_pools)
+        ctx = multiprocessing.get_context("spawn")
+        pool = _pools[workers] = ctx.Pool(workers, initializer=_init_worker)
+    return pool
+
+
+def close_pools():
+    """Stop the rollout worker processes."""
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.terminate()
+        pool.join()
+
+
+class Searcher:
+    """MCTS player that keeps its tree between turns.
+
+    Attributes:
+        time_budget: Seconds of search per move.
+        workers: Number of rollout worker processes, 1 runs in-process,
+            as does any search inside a daemonic process.
+        root: Root node of the current tree.
+        last_rollouts: Number of playouts of the last search.
+        last_rps: Playouts per second of the last search.
+    """
+    def __init__(self, time_budget=TIME_BUDGET, workers=WORKERS):
+        """Initialize a searcher.
+
+        Args:
+            time_budget: Seconds of search per move (default TIME_BUDGET).
+            workers: Rollout worker processes (default WORKERS).
+        """
+        self.time_budget = time_budget
+        self.workers = workers
+        self.root = None
+        self.last_rollouts = 0
+        self.last_rps = 0.0
+        self.rng = random.Random()
+
+    def _reroot(self, state):
+        """Reuse the subtree matching state, or start a new tree."""
+        if self.root is not None:
+            if self.root.state == state:
+                return
+            for child in self.root.children:
+                if child.state == state:
+                    child.parent = None
+                    self.root = child
+                    return
+        self.root = Node(state)
+
+    def _select(self, game):
+        """Walk down with UCT, expand one child and add a virtual loss."""
+        node = self.root
+        while True:
+            if node.untried is None:
+                node.winner = _winner(game, *node.state)
+                node.untried = [] if node.winner else _moves(game, *node.state)
+            if node.winner or node.untried or not node.children:
+                break
+            log_n = math.log(node.visits + 1)
+            node = max(node.children, key=lambda c: c.wins / (c.visits + 1e-9)
+                       + EXPLORATION * math.sqrt(log_n / (c.visits + 1e-9)))
+        if node.untried:
+            first = not node.children
+            move = node.untried.pop(0)
+            walls, pos, turn = node.state
+            if turn == 0:
+                state = (walls | {move}, pos, 1)
+            else:
+                state = (walls, move, 0)
+            child = Node(state, node, move)
+            if first:
+                child.visits = PRIOR_VISITS
+                child.wins = PRIOR_VISITS * PRIOR_VALUE
+            node.children.append(child)
+            node = child
+            node.winner = _winner(game, *state)
+            if node.winner:
+                node.untried = []
+        walk = node
+        while walk is not None:
+            walk.visits += ROLLOUTS_PER_LEAF
+            walk = walk.parent
+        return node
+
+    def _backup(self, node, blocker_wins):
+        while node is not None:
+            if node.parent is not None:
+                mover = node.parent.state[2]
+                node.wins += blocker_wins if mover == 0 else ROLLOUTS_PER_LEAF - blocker_wins
+            node = node.parent
+
+    def choose(self, game, stop=None):
+        """Search the position of game and return the move to play.
+
+        Args:
+            game: Game instance; its walls, pos and turn give the position.
+            stop: threading.Event ending the search before its time
+                budget when set (default None).
+
+        Returns:
+            Wall cell when the blocker is to move, mouse destination when
+            the mouse is to move, or None if there is no move.
+        """
+        self._reroot((frozenset(game.walls), game.pos, game.turn))
+        workers = self.workers
+        if multiprocessing.current_process().daemon:
+            # Daemonic processes (the batch and exhibition workers)
+            # cannot start a pool of their own.
+            workers = 1
+        pool = _get_pool(workers) if workers > 1 else None
+        batch = max(1, workers * 2)
+        start = time.perf_counter()
+        rollouts = 0
+        while True:
+            leaves = [self._select(game) for _ in range(batch)]
+            tasks = [(game.w, game.h, tuple(leaf.state[0]), leaf.state[1], leaf.state[2],
+                      ROLLOUTS_PER_LEAF, self.rng.random()) for leaf in leaves if not leaf.winner]
+            if pool is not None:
+                results = iter(pool.map(_rollout_task, tasks))
+            else:
+                results = iter(map(_rollout_task, tasks))
+            for leaf in leaves:
+                if leaf.winner:
+                    wins = ROLLOUTS_PER_LEAF if leaf.winner == "BLOCKER" else 0
+                else:
+                    wins = next(results)
+                    rollouts += ROLLOUTS_PER_LEAF
+                self._backup(leaf, wins)
+            if time.perf_counter() - start >= self.time_budget or self.root.winner:
+                break
+            if stop is not None and stop.is_set():
+                break
+
+        elapsed = time.perf_counter() - start
+        self.last_rollouts = rollouts
+        self.last_rps = rollouts / elapsed if elapsed > 0 else 0.0
+        if not self.root.children:
+            return None
+        best = max(self.root.children, key=lambda c: c.visits)
+        best.parent = None
+        self.root = best
+        return best.move
@@ -0,0 +1,134 @@
+"""Non-blocking client for network PVP games.
+
+Used from the render loop: poll() is called once per frame and never
+waits, doing whatever connecting, sending and receiving the socket
+allows at that moment. The client keeps a local mirror Game that is
+only changed by what the server sends.
+"""
+import socket
+import select
+import errno
+import protocol
+from game import Game
+
+
+class NetClient:
+    """Connection to the PVP server and mirror of the game played on it.
+
+    Attributes:
+        status: "CONNECTING", "WAITING", "PLAYING", "OVER" or "CLOSED".
+        game: Mirror Game (mode "NET") once the match started, else None.
+        game_id: Server-side game number.
+        error: Last error message, or "".
+    """
+    def __init__(self, w, h, n_obs=10, host=protocol.DEFAULT_HOST, port=protocol.DEFAULT_PORT):
+        """Start connecting to the server and queue the JOIN request.
+
+        Args:
+            w: Grid width.
+            h: Grid height.
+            n_obs: Number of initial obstacles (default 10).
+            host: Server host (default protocol.DEFAULT_HOST).
+            port: Server port (default protocol.DEFAULT_PORT).
+        """
+        self.status = "CONNECTING"
+        self.game = None
+        self.game_id = None
+        self.error = ""
+        self.frames = protocol.FrameBuffer()
+        self.outgoing = bytearray(protocol.encode_join(w, h, n_obs))
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        try:
+            code = self.sock.connect_ex((host, port))
+        except OSError as e:
+            code = e.errno or errno.ECONNREFUSED
+        if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            self._fail(f"Cannot connect: {errno.errorcode.get(code, code)}")
+
+    def _fail(self, message):
+        self.error = message
+        self.close()
+
+    def close(self):
+        """Close the connection."""
+        if self.status != "CLOSED":
+            self.status = "CLOSED"
+            self.sock.close()
+
+    def my_turn(self):
+        """Return True if the local player is the side to move."""
+        return (self.status == "PLAYING" and not self.game.over
+                and self.game.turn == (0 if self.game.player_role == "BLOCKER" else 1))
+
+    def send_move(self, q, r):
+        """Queue a move; the mirror changes when the server confirms it."""
+        if self.my_turn():
+            self.outgoing += protocol.encode_move(q, r)
+
+    def poll(self):
+        """Make progress on the connection without blocking."""
+        if self.status == "CLOSED":
+            return
+        try:
+            _, writable, _ = select.select([], [self.sock], [], 0)
+            if self.status == "CONNECTING":
+                if not writable:
+                    return
+                code = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code:
+                    self._fail(f"Cannot connect: {errno.errorcode.get(code, code)}")
+                    return
+                self.status = "WAITING"
+            if self.outgoing and writable:
+                sent = self.sock.send(self.outgoing)
+                del self.outgoing[:sent]
+            while True:
+                readable, _, _ = select.select([self.sock], [], [], 0)
+                if not readable:
+                    break
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    if self.status != "OVER":
+                        self.error = "Server closed the connection"
+                    self.close()
+                    return
+                for msg_type, payload in self.frames.feed(chunk):
+                    self._handle(msg_type, protocol.decode(msg_type, payload))
+        except (OSError, ValueError) as e:
+            self._fail(f"Connection error: {e}")
+
+    def _handle(self, msg_type, fields):
+        if msg_type == protocol.START:
+            self.game_id, role, w, h, pos, turn, walls = fields
+            game = Game(mode="NET", player_role=protocol.ROLES[role], w=w, h=h, n_obs=0)
+            game.walls, game.pos, game.turn = walls, pos, turn
+            game.start_walls = frozenset(walls)
+            game.update_region()
+            self.game = game
+            self.status = "PLAYING"
+        elif msg_type == protocol.DELTA and self.game is not None:
+            kind, cell, turn, winner = fields
+            if kind == protocol.WALL_PLACED:
+                self.game.walls.add(cell)
+                self.game.log_move(0, cell)
+                self.game.wall_added(cell)
+            else:
+                self.game.log_move(1, cell)
+                if cell in self.game.cells:
+                    self.game.pos = cell
+                    self.game.update_region()
+            self.game.turn = turn
+            if winner:
+                self.game.over, self.game.winner = True, winner
+                self.status = "OVER"
+        elif msg_type == protocol.ERROR:
+            self.error = {protocol.ERR_NOT_YOUR_TURN: "Not your turn",
+                          protocol.ERR_ILLEGAL: "Illegal move",
+                          protocol.ERR_NO_GAME: "No game in progress"}.get(fields[0], "Bad request")
+        elif msg_type == protocol.LEFT:
+            self.error = "Opponent left"
+            if self.game is not None and not self.game.over:
+                self.game.over = True
+                self.game.winner = self.game.player_role
+            self.status = "OVER"
@@ -0,0 +1,327 @@
+"""Opening book of precomputed HARD blocker walls.
+
+The first blocker moves of a game are the most expensive ones for
+best_wall, because the board is still open. The book stores the wall
+best_wall picks for early positions so that a position met again is
+answered by a dictionary lookup.
+
+Positions are keyed by a canonical form: the board's own symmetries (the
+grid transforms that map the set of cells onto itself) are applied to the
+walls and mouse, and the smallest image is kept. Mirrored positions thus
+share one entry. The book is filled offline by the batch builder and
+stored as a pickle in BOOK_FOLDER.
+
+Usage:
+    python opening_book.py build --starts 200 --depth 3 --size 11x11 --obs 10
+    python opening_book.py stats saves/*.sav
+"""
+import sys
+import os
+import glob
+import pickle
+import random
+import multiprocessing
+import hex_math
+import ai_logic
+
+BOOK_FOLDER = "book"
+BOOK_FILE = "openings.pkl"
+BUILD_DEPTH = 3
+
+_book = None
+_max_walls = {}
+_symmetries = {}
+_stats = {"lookups": 0, "hits": 0}
+
+
+def board_symmetries(game):
+    """Find the grid symmetries that map the board onto itself.
+
+    Each of the 12 transforms of hex_math.transform is tried, translated
+    so that the smallest transformed cell lands on the smallest cell.
+
+    Args:
+        game: Game instance.
+
+    Returns:
+        List of dicts mapping every cell to its image, identity first.
+    """
+    size = (game.w, game.h)
+    found = _symmetries.get(size)
+    if found is not None:
+        return found
+    found = []
+    first = min(game.cells)
+    for k in range(12):
+        moved = {c: hex_math.transform(c[0], c[1], k) for c in game.cells}
+        low = min(moved.values())
+        dq, dr = first[0] - low[0], first[1] - low[1]
+        image = {c: (q + dq, r + dr) for c, (q, r) in moved.items()}
+        if set(image.values()) == game.cells and image not in found:
+            found.append(image)
+    _symmetries[size] = found
+    return found
+
+
+def canonical_position(game, mouse_pos, blocked):
+    """Encode a blocker-to-move position up to board symmetry.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Tuple of (key, image) where key identifies the position and image
+        is the symmetry mapping the real board onto the canonical one.
+    """
+    best = None
+    for image in board_symmetries(game):
+        key = (game.w, game.h, tuple(sorted(image[c] for c in blocked)), image[mouse_pos])
+        if best is None or key < best[0]:
+            best = (key, image)
+    return best
+
+
+def _load():
+    global _book
+    if _book is not None:
+        return
+    try:
+        with open(os.path.join(BOOK_FOLDER, BOOK_FILE), "rb") as f:
+            _book = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        _book = {}
+    _max_walls.clear()
+    for w, h, walls, _ in _book:
+        _max_walls[(w, h)] = max(_max_walls.get((w, h), 0), len(walls))
+
+
+def preload():
+    """Read the book from disk now instead of on the first probe."""
+    _load()
+
+
+def save():
+    """Write the book to disk.
+
+    Returns:
+        True if the book was saved, False otherwise.
+    """
+    _load()
+    try:
+        if not os.path.exists(BOOK_FOLDER):
+            os.makedirs(BOOK_FOLDER)
+        with open(os.path.join(BOOK_FOLDER, BOOK_FILE), "wb") as f:
+            pickle.dump(_book, f)
+        return True
+    except OSError:
+        return False
+
+
+def probe(game, mouse_pos, blocked):
+    """Look up the book wall for a position.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Cell coordinates (q, r) of the wall, or None if the position is
+        not in the book.
+    """
+    _load()
+    if len(blocked) > _max_walls.get((game.w, game.h), -1):
+        return None
+    _stats["lookups"] += 1
+    key, image = canonical_position(game, mouse_pos, blocked)
+    wall = _book.get(key)
+    if wall is None:
+        return None
+    for cell, target in image.items():
+        if target == wall:
+            _stats["hits"] += 1
+            return cell
+    return None
+
+
+def add(game, mouse_pos, blocked, wall):
+    """Record the wall to play in a position.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+        wall: Cell coordinates (q, r) of the wall.
+    """
+    _load()
+    key, image = canonical_position(game, mouse_pos, blocked)
+    _book[key] = image[wall]
+    size = (game.w, game.h)
+    _max_walls[size] = max(_max_walls.get(size, 0), len(blocked))
+
+
+def stats():
+    """Return book size and lookup statistics of this process.
+
+    Positions with more walls than any book entry of their board size are
+    not counted as lookups.
+
+    Returns:
+        Dict with entries, lookups, hits and hit_rate.
+    """
+    _load()
+    lookups = _stats["lookups"]
+    return {"entries": len(_book), "lookups": lookups, "hits": _stats["hits"],
+            "hit_rate": _stats["hits"] / lookups if lookups else 0.0}
+
+
+def reset_stats():
+    """Set the lookup statistics back to zero."""
+    _stats["lookups"] = 0
+    _stats["hits"] = 0
+
+
+def expand(game, mouse_pos, blocked, depth, config=None):
+    """Compute book entries for a position and the mouse replies to it.
+
+    The blocker plays best_wall, then every legal mouse move that does not
+    end the game is expanded, until depth blocker moves have been played.
+
+    Args:
+        game: Game instance providing the board geometry.
+        mouse_pos: Mouse position (q, r) with the blocker to move.
+        blocked: Set of blocked cells.
+        depth: Number of blocker moves to cover.
+        config: Heuristic weights (default DEFAULT_CONFIG without the
+            book and the learned model, so a rebuild does not copy the
+            book it replaces).
+
+    Returns:
+        List of (mouse_pos, walls frozenset, wall) entries.
+    """
+    if config is None:
+        config = ai_logic.DEFAULT_CONFIG.replace(book=False, learned=False)
+    wall = ai_logic.best_wall(game, mouse_pos, blocked, config)
+    if wall is None:
+        return []
+    entries = [(mouse_pos, frozenset(blocked), wall)]
+    if depth <= 1:
+        return entries
+    walls = blocked | {wall}
+    for move in game.get_neighbors(*mouse_pos):
+        if move not in game.cells or move in walls or game.final_hex(move):
+            continue
+        entries += expand(game, move, walls, depth - 1, config)
+    return entries
+
+
+def _expand_task(task):
+    """Worker entry point: expand one start position."""
+    from game import Game
+    w, h, walls, pos, depth = task
+    board = Game(w=w, h=h, n_obs=0)
+    return w, h, expand(board, pos, set(walls), depth)
+
+
+def random_starts(w, h, n_obs, count, seed=None):
+    """Generate start positions the way a new Game does.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        n_obs: Number of random obstacles.
+        count: Number of positions.
+        seed: Seed for the layouts (default None).
+
+    Returns:
+        List of (walls frozenset, mouse position) tuples.
+    """
+    from game import Game
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        starts = []
+        for _ in range(count):
+            g = Game(w=w, h=h, n_obs=n_obs)
+            starts.append((frozenset(g.walls), g.pos))
+        return starts
+    finally:
+        random.setstate(state)
+
+
+def build(w, h, starts, depth=BUILD_DEPTH, workers=None):
+    """Fill the book from a batch of start positions and save it.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        starts: List of (walls, mouse position) tuples, blocker to move.
+        depth: Blocker moves to cover from each start (default BUILD_DEPTH).
+        workers: Worker processes (default os.cpu_count()).
+
+    Returns:
+        Number of positions added to the book.
+    """
+    from game import Game
+    _load()
+    board = Game(w=w, h=h, n_obs=0)
+    tasks = [(w, h, tuple(walls), pos, depth) for walls, pos in starts]
+    before = len(_book)
+    with multiprocessing.Pool(workers or os.cpu_count() or 1) as pool:
+        for _, _, entries in pool.imap_unordered(_expand_task, tasks):
+            for pos, walls, wall in entries:
+                add(board, pos, walls, wall)
+    save()
+    return len(_book) - before
+
+
+def _size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+if __name__ == "__main__":
+    from game import Game
+    args = sys.argv[1:]
+    command = args.pop(0) if args else "stats"
+    options = {"--starts": "100", "--depth": str(BUILD_DEPTH), "--size": "11x11",
+               "--obs": "10", "--seed": "0"}
+    for name in options:
+        if name in args:
+            i = args.index(name)
+            options[name] = args[i + 1]
+            del args[i:i + 2]
+
+    if command == "build":
+        w, h = _size(options["--size"])
+        n_obs = int(options["--obs"])
+        starts = [(frozenset(), Game(w=w, h=h, n_obs=0).pos)]
+        starts += random_starts(w, h, n_obs, int(options["--starts"]), int(options["--seed"]))
+        for pattern in args:
+            for path in sorted(glob.glob(pattern)):
+                g = Game.load_from_file(os.path.basename(path), os.path.dirname(path))
+                if g is not None and (g.w, g.h) == (w, h):
+                    for st in g.history:
+                        if st['turn'] == 0 and not st['over']:
+                            starts.append((frozenset(st['walls']), st['pos']))
+        added = build(w, h, starts, int(options["--depth"]))
+        print(f"{len(starts)} starts, {added} positions added, {stats()['entries']} in book")
+    elif command == "stats":
+        if not args:
+            args = [os.path.join("saves", "*.sav")]
+        for pattern in args:
+            for path in sorted(glob.glob(pattern)):
+                g = Game.load_from_file(os.path.basename(path), os.path.dirname(path))
+                if g is None:
+                    continue
+                for st in g.history + [{'walls': g.walls, 'pos': g.pos, 'turn': g.turn,
+                                        'over': g.over}]:
+                    if st['turn'] == 0 and not st['over']:
+                        probe(g, st['pos'], st['walls'])
+        s = stats()
+        print(f"{s['entries']} positions, {s['hits']}/{s['lookups']} lookups hit "
+              f"({s['hit_rate']:.1%})")
+    else:
+        print(f"unknown command: {command}")
@@ -0,0 +1,93 @@
+"""Speculative AI computation during the human's turn.
+
+While the human is deciding, a background thread plays out the human's
+likely moves on copies of the game and stores the AI's reply to each one
+in the game's reply cache. When the human commits one of those moves the
+reply is taken from the cache instead of being computed from scratch.
+"""
+import threading
+import ai_logic
+
+PONDER_DIFFICULTIES = ("HARD", "EXPERT")
+PONDER_WALLS = 6
+
+
+def human_moves(game):
+    """List the human moves worth pondering in the current position.
+
+    Args:
+        game: Game instance where it is the human's turn.
+
+    Returns:
+        All legal mouse moves for a human mouse, or the blocker AI's own
+        best wall candidates for a human blocker.
+    """
+    if game.turn == 1:
+        return [n for n in game.get_neighbors(*game.pos)
+                if n in game.cells and n not in game.walls]
+    return [c for c, _ in ai_logic.wall_candidates(game, game.pos, game.walls)[:PONDER_WALLS]]
+
+
+class Ponderer:
+    """Runs one speculation thread at a time for the current position.
+
+    Attributes:
+        thread: Running speculation thread, or None.
+        key: Position key the running thread is working on.
+    """
+    def __init__(self):
+        """Initialize an idle ponderer."""
+        self.thread = None
+        self.key = None
+        self._stop = None
+
+    def start(self, game):
+        """Start pondering on game's position unless already doing so.
+
+        Args:
+            game: Game instance where it is the human's turn.
+        """
+        if game.mode != "AI" or game.over or game.difficulty not in PONDER_DIFFICULTIES:
+            return
+        key = game.position_key()
+        if key == self.key:
+            return
+        self.cancel()
+        self.key = key
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run,
+                                       args=(game.clone_position(), game.reply_cache, self._stop),
+                                       daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """Stop the running speculation; its results are discarded.
+
+        An EXPERT search in progress sees the stop event and ends within
+        one rollout batch instead of using its whole time budget.
+        """
+        if self._stop is not None:
+            self._stop.set()
+        self.thread = None
+        self.key = None
+        self._stop = None
+
+    @staticmethod
+    def _run(snapshot, cache, stop):
+        for move in human_moves(snapshot):
+            if stop.is_set():
+                return
+            g = snapshot.clone_position()
+            if g.turn == 1:
+                g.apply_mouse_move(move)
+                if g.over:
+                    continue
+                reply = g.choose_blocker_wall(stop=stop)
+            else:
+                g.apply_blocker_wall(move)
+                if g.over:
+                    continue
+                reply = g.choose_mouse_move(stop=stop)
+            if stop.is_set():
+                return
+            cache[g.position_key()] = reply
@@ -0,0 +1,325 @@
+"""Depth-first proof-number search for forced blocker wins.
+
+Answers whether the blocker can force a trap from a given position,
+whatever the mouse does. The search is a df-pn over the Game move rules:
+blocker nodes are OR nodes (one trapping wall is enough), mouse nodes are
+AND nodes (every move must be trapped). Proof and disproof numbers are
+kept in a transposition table, walls are tried in best_wall score order,
+and positions inside small regions are resolved by the tablebase.
+
+Analysis runs a search on a background thread with a wall-clock budget,
+for the GUI's analysis key.
+
+Usage:
+    python proof_search.py saves/caz.sav saves/*.sav --nodes 200000
+"""
+import sys
+import os
+import glob
+import time
+import threading
+import ai_logic
+import tablebase
+from game import Game
+
+PROVEN = "PROVEN"
+DISPROVEN = "DISPROVEN"
+UNKNOWN = "UNKNOWN"
+
+INF = 10**9
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class ProofSearch:
+    """Proof-number search from one position of a game.
+
+    Attributes:
+        game: Game instance providing the board geometry.
+        max_nodes: Maximum number of node expansions.
+        max_entries: Maximum number of transposition table entries.
+        time_budget: Maximum seconds of search, or None.
+        stop: threading.Event ending the search when set, or None.
+        nodes: Number of node expansions performed so far.
+        table: Transposition table mapping states to [pn, dn, moves].
+        leaves: Cache of initial (pn, dn) values of unexpanded states.
+    """
+    def __init__(self, game, max_nodes=100000, max_entries=200000, time_budget=None, stop=None):
+        """Initialize a search over the position stored in game.
+
+        Args:
+            game: Game instance holding the position to analyze.
+            max_nodes: Node expansion budget (default 100000).
+            max_entries: Transposition table size budget (default 200000).
+            time_budget: Seconds of search at most (default None, no limit).
+            stop: threading.Event ending the search early (default None).
+        """
+        self.game = game
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.time_budget = time_budget
+        self.stop = stop
+        self._deadline = None
+        self.nodes = 0
+        self.table = {}
+        self.leaves = {}
+        self.root = (frozenset(game.walls), game.pos, game.turn)
+
+    def run(self):
+        """Search until the root is solved or a budget runs out.
+
+        Returns:
+            Tuple of (status, pv) where status is PROVEN, DISPROVEN or
+            UNKNOWN and pv is a list of ("WALL" | "MOVE", cell) tuples.
+        """
+        if self.game.over:
+            status = PROVEN if self.game.winner == "BLOCKER" else DISPROVEN
+            return status, []
+        if self.time_budget is not None:
+            self._deadline = time.perf_counter() + self.time_budget
+        try:
+            self._mid(self.root, INF, INF)
+        except _BudgetExceeded:
+            pass
+        pn, dn = self._value(self.root)
+        if pn == 0:
+            status = PROVEN
+        elif dn == 0:
+            status = DISPROVEN
+        else:
+            status = UNKNOWN
+        return status, self.principal_variation()
+
+    def _leaf(self, state):
+        """Return terminal or initial (pn, dn) values for a new state."""
+        walls, pos, turn = state
+        game = self.game
+        exact = tablebase.probe_value(game, pos, walls, turn)
+        if exact is not None:
+            return (INF, 0) if exact == tablebase.ESCAPE else (0, INF)
+
+        moves = 0
+        edge_moves = 0
+        for n in game.get_neighbors(*pos):
+            if n not in game.cells:
+                return INF, 0
+            if n not in walls:
+                moves += 1
+                if game.final_hex(n):
+                    edge_moves += 1
+        if turn == 1:
+            if moves == 0:
+                return 0, INF
+            return moves, 1
+        if edge_moves >= 2:
+            return INF, 0
+        return 1, 1
+
+    def _moves(self, state):
+        """Generate child states, best candidates first."""
+        walls, pos, turn = state
+        game = self.game
+        if turn == 1:
+            moves = [n for n in game.get_neighbors(*pos) if n in game.cells and n not in walls]
+            moves.sort(key=lambda n: -sum(1 for m in game.get_neighbors(*n) if m not in walls))
+            return [(walls, n, 0) for n in moves]
+
+        ranked = [c for c, _ in ai_logic.wall_candidates(game, pos, walls)]
+        seen = set(ranked)
+        rest = [c for c in game.cells if c not in walls and c != pos and c not in seen]
+        rest.sort(key=lambda c: _hex_distance(c, pos))
+        return [(walls | {c}, pos, 1) for c in ranked + rest]
+
+    def _value(self, state):
+        entry = self.table.get(state)
+        if entry is not None:
+            return entry[0], entry[1]
+        value = self.leaves.get(state)
+        if value is None:
+            if len(self.leaves) >= self.max_entries:
+                self.leaves.clear()
+            value = self.leaves[state] = self._leaf(state)
+        return value
+
+    def _mid(self, state, th_pn, th_dn):
+        """Expand state until its numbers reach one of the thresholds."""
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _BudgetExceeded()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+        if self.stop is not None and self.stop.is_set():
+            raise _BudgetExceeded()
+
+        entry = self.table.get(state)
+        if entry is None:
+            pn, dn = self._value(state)
+            entry = [pn, dn, None]
+            if pn == 0 or dn == 0:
+                self._store(state, entry)
+                return
+        if entry[2] is None:
+            entry[2] = self._moves(state)
+        self._store(state, entry)
+
+        children = entry[2]
+        is_or = state[2] == 0
+        while True:
+            values = [self._value(c) for c in children]
+            if not values:
+                pn, dn = (INF, 0) if is_or else (0, INF)
+            elif is_or:
+                pn = min(v[0] for v in values)
+                dn = min(INF, sum(v[1] for v in values))
+            else:
+                pn = min(INF, sum(v[0] for v in values))
+                dn = min(v[1] for v in values)
+            entry[0], entry[1] = pn, dn
+            if pn >= th_pn or dn >= th_dn:
+                break
+
+            key = 0 if is_or else 1
+            best = min(range(len(values)), key=lambda i: values[i][key])
+            second = min((values[i][key] for i in range(len(values)) if i != best),
+                         default=INF)
+            c_pn, c_dn = values[best]
+            if is_or:
+                child_pn = min(th_pn, second + 1)
+                child_dn = min(INF, th_dn - dn + c_dn)
+            else:
+                child_pn = min(INF, th_pn - pn + c_pn)
+                child_dn = min(th_dn, second + 1)
+            self._mid(children[best], child_pn, child_dn)
+            if self.table.get(state) is not entry:
+                self._store(state, entry)
+
+    def _store(self, state, entry):
+        """Insert an entry, evicting unsolved entries when over budget."""
+        self.table[state] = entry
+        if len(self.table) <= self.max_entries:
+            return
+        unsolved = [s for s, e in self.table.items()
+                    if e[0] != 0 and e[1] != 0 and s != state and s != self.root]
+        for s in unsolved[:len(unsolved) // 2 + 1]:
+            del self.table[s]
+
+    def principal_variation(self, max_length=40):
+        """Follow the most relevant line of play from the root.
+
+        Args:
+            max_length: Maximum number of plies (default 40).
+
+        Returns:
+            List of ("WALL" | "MOVE", cell) tuples.
+        """
+        pv = []
+        state = self.root
+        while len(pv) < max_length:
+            entry = self.table.get(state)
+            is_or = state[2] == 0
+            if entry is not None and entry[2]:
+                children = entry[2]
+                values = [self._value(c) for c in children]
+                key = 0 if is_or else 1
+                child = children[min(range(len(values)), key=lambda i: values[i][key])]
+            else:
+                child = self._tablebase_child(state)
+                if child is None:
+                    break
+            if is_or:
+                (wall,) = child[0] - state[0]
+                pv.append(("WALL", wall))
+            else:
+                pv.append(("MOVE", child[1]))
+            state = child
+        return pv
+
+
+    def _tablebase_child(self, state):
+        """Return the tablebase's best reply from state, if it has one."""
+        walls, pos, turn = state
+        if turn == 0:
+            found = tablebase.probe_wall(self.game, pos, walls)
+            return (walls | {found[0]}, pos, 1) if found else None
+        found = tablebase.probe_mouse(self.game, pos, walls)
+        return (walls, found[0], 0) if found else None
+
+
+def _hex_distance(a, b):
+    dq = a[0] - b[0]
+    dr = a[1] - b[1]
+    return (abs(dq) + abs(dr) + abs(dq + dr)) // 2
+
+
+def prove(game, max_nodes=100000, max_entries=200000):
+    """Decide whether the blocker can force a trap from game's position.
+
+    Args:
+        game: Game instance holding the position to analyze.
+        max_nodes: Node expansion budget (default 100000).
+        max_entries: Transposition table size budget (default 200000).
+
+    Returns:
+        Tuple of (status, pv) as returned by ProofSearch.run.
+    """
+    return ProofSearch(game, max_nodes, max_entries).run()
+
+
+class Analysis:
+    """Proof search of a game's position running on a background thread.
+
+    Attributes:
+        key: position_key() of the analyzed position.
+        result: Tuple of (status, pv) once the search is over, else None.
+        thread: Search thread.
+    """
+    def __init__(self, game, max_nodes=100000, time_budget=None):
+        """Start searching a copy of game's position.
+
+        Args:
+            game: Game instance holding the position to analyze.
+            max_nodes: Node expansion budget (default 100000).
+            time_budget: Seconds of search at most (default None, no limit).
+        """
+        self.key = game.position_key()
+        self.result = None
+        self._stop = threading.Event()
+        self._search = ProofSearch(game.clone_position(), max_nodes,
+                                   time_budget=time_budget, stop=self._stop)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        self.result = self._search.run()
+
+    def cancel(self):
+        """Stop the search; its result is not needed any more."""
+        self._stop.set()
+
+
+def format_pv(pv):
+    """Render a principal variation as a short readable string."""
+    return " ".join(f"{'W' if kind == 'WALL' else 'M'}{cell}" for kind, cell in pv)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    max_nodes = 100000
+    if "--nodes" in args:
+        i = args.index("--nodes")
+        max_nodes = int(args[i + 1])
+        del args[i:i + 2]
+    if not args:
+        args = [os.path.join("saves", "*.sav")]
+
+    for pattern in args:
+        for path in sorted(glob.glob(pattern)):
+            g = Game.load_from_file(os.path.basename(path), os.path.dirname(path))
+            if g is None:
+                print(f"{path}: cannot load")
+                continue
+            search = ProofSearch(g, max_nodes)
+            status, pv = search.run()
+            print(f"{path}: {status} ({search.nodes} nodes) {format_pv(pv)}")
@@ -0,0 +1,165 @@
+"""Binary wire protocol of the network PVP server.
+
+Every message is a frame made of a 3 byte header (message type, payload
+length) followed by a fixed-layout struct payload. Coordinates travel as
+signed bytes, which covers every board size the game offers.
+
+Client to server:
+    JOIN   w, h, n_obs               ask to be paired for a game
+    MOVE   q, r                      place a wall or move the mouse
+
+Server to client:
+    START  game id, role, w, h, mouse q, r, turn, walls...
+    DELTA  kind, q, r, turn, status  a move was played
+    ERROR  code                      the last request was rejected
+    LEFT                             the opponent disconnected
+"""
+import struct
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5555
+
+JOIN = 1
+MOVE = 2
+START = 3
+DELTA = 4
+ERROR = 5
+LEFT = 6
+
+WALL_PLACED = 0
+MOUSE_MOVED = 1
+
+ONGOING = 0
+BLOCKER_WON = 1
+MOUSE_WON = 2
+
+ERR_NOT_YOUR_TURN = 1
+ERR_ILLEGAL = 2
+ERR_NO_GAME = 3
+ERR_BAD_REQUEST = 4
+
+HEADER = struct.Struct("!BH")
+_JOIN = struct.Struct("!BBB")
+_MOVE = struct.Struct("!bb")
+_START = struct.Struct("!IBBBbbBH")
+_CELL = struct.Struct("!bb")
+_DELTA = struct.Struct("!BbbBB")
+_ERROR = struct.Struct("!B")
+
+ROLES = ("BLOCKER", "MOUSE")
+WINNERS = {ONGOING: None, BLOCKER_WON: "BLOCKER", MOUSE_WON: "MOUSE"}
+
+
+def frame(msg_type, payload=b""):
+    """Prefix a payload with its header."""
+    return HEADER.pack(msg_type, len(payload)) + payload
+
+
+def encode_join(w, h, n_obs):
+    return frame(JOIN, _JOIN.pack(w, h, n_obs))
+
+
+def encode_move(q, r):
+    return frame(MOVE, _MOVE.pack(q, r))
+
+
+def encode_start(game_id, role, game):
+    """Encode the full state of a game for one of its players.
+
+    Args:
+        game_id: Server-side game number.
+        role: 0 for the blocker, 1 for the mouse.
+        game: Game instance.
+
+    Returns:
+        Frame bytes.
+    """
+    walls = sorted(game.walls)
+    payload = _START.pack(game_id, role, game.w, game.h, game.pos[0], game.pos[1],
+                          game.turn, len(walls))
+    return frame(START, payload + b"".join(_CELL.pack(q, r) for q, r in walls))
+
+
+def encode_delta(kind, cell, turn, winner):
+    """Encode a played move.
+
+    Args:
+        kind: WALL_PLACED or MOUSE_MOVED.
+        cell: Wall cell or new mouse cell (q, r).
+        turn: Side to move after the move.
+        winner: "BLOCKER", "MOUSE" or None.
+
+    Returns:
+        Frame bytes.
+    """
+    status = {None: ONGOING, "BLOCKER": BLOCKER_WON, "MOUSE": MOUSE_WON}[winner]
+    return frame(DELTA, _DELTA.pack(kind, cell[0], cell[1], turn, status))
+
+
+def encode_error(code):
+    return frame(ERROR, _ERROR.pack(code))
+
+
+def encode_left():
+    return frame(LEFT)
+
+
+def decode(msg_type, payload):
+    """Decode a payload into a tuple of its fields.
+
+    START yields (game_id, role, w, h, pos, turn, walls); DELTA yields
+    (kind, cell, turn, winner); the others their struct fields.
+
+    Raises:
+        ValueError: If the type is unknown or the payload malformed.
+    """
+    try:
+        if msg_type == JOIN:
+            return _JOIN.unpack(payload)
+        if msg_type == MOVE:
+            return _MOVE.unpack(payload)
+        if msg_type == START:
+            game_id, role, w, h, q, r, turn, count = _START.unpack_from(payload)
+            walls = {_CELL.unpack_from(payload, _START.size + i * _CELL.size)
+                     for i in range(count)}
+            return game_id, role, w, h, (q, r), turn, walls
+        if msg_type == DELTA:
+            kind, q, r, turn, status = _DELTA.unpack(payload)
+            return kind, (q, r), turn, WINNERS[status]
+        if msg_type == ERROR:
+            return _ERROR.unpack(payload)
+        if msg_type == LEFT:
+            return ()
+    except (struct.error, KeyError) as e:
+        raise ValueError(f"malformed message {msg_type}") from e
+    raise ValueError(f"unknown message {msg_type}")
+
+
+class FrameBuffer:
+    """Reassembles frames from a byte stream received in pieces.
+
+    Attributes:
+        data: Bytes received but not yet returned as frames.
+    """
+    def __init__(self):
+        self.data = bytearray()
+
+    def feed(self, chunk):
+        """Add received bytes and return the frames completed by them.
+
+        Args:
+            chunk: Received bytes.
+
+        Returns:
+            List of (msg_type, payload) tuples.
+        """
+        self.data += chunk
+        frames = []
+        while len(self.data) >= HEADER.size:
+            msg_type, length = HEADER.unpack_from(self.data)
+            end = HEADER.size + length
+            if len(self.data) < end:
+                break
+            frames.append((msg_type, bytes(self.data[HEADER.size:end])))
+            del self.data[:end]
+        return frames
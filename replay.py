@@ -0,0 +1,92 @@
+"""Replay of a recorded game with a keyframe index for seeking.
+
+A game's move log is played through once when the replay is built, and
+every KEYFRAME_INTERVAL moves the position is stored as a keyframe.
+Seeking to any move then starts from the keyframe at or before it and
+applies at most KEYFRAME_INTERVAL - 1 logged moves, so jumping around
+the timeline costs the same on long games as on short ones.
+"""
+import hex_math
+
+KEYFRAME_INTERVAL = 16
+
+
+class Replay:
+    """Positions of a finished or ongoing game, move by move.
+
+    Attributes:
+        game: Copy of the replayed game at its last position.
+        log: Tuple of (turn, cell) moves, copied from Game.move_log.
+        keyframes: List of (walls, pos, turn) tuples, the position after
+            every KEYFRAME_INTERVAL-th move starting with the start.
+    """
+    def __init__(self, game):
+        """Index the move log of a game.
+
+        Args:
+            game: Game instance with start_walls and move_log recorded.
+
+        Raises:
+            ValueError: If the game has no recorded start (older saves).
+        """
+        if game.start_walls is None:
+            raise ValueError("game has no move log")
+        self.game = game.clone_position()
+        self.log = tuple(game.move_log)
+        walls, pos, turn = set(game.start_walls), hex_math.board_origin(game.w, game.h), 0
+        self.keyframes = []
+        for i, (side, cell) in enumerate(self.log):
+            if i % KEYFRAME_INTERVAL == 0:
+                self.keyframes.append((frozenset(walls), pos, turn))
+            walls, pos, turn = self._apply(walls, pos, side, cell)
+        if len(self.log) % KEYFRAME_INTERVAL == 0:
+            self.keyframes.append((frozenset(walls), pos, turn))
+
+    def __len__(self):
+        """Return the number of moves in the replay."""
+        return len(self.log)
+
+    def _apply(self, walls, pos, side, cell):
+        # An escape ends the game with the mouse still on its last cell.
+        if side == 0:
+            walls.add(cell)
+        elif cell in self.game.cells:
+            pos = cell
+        return walls, pos, 1 - side
+
+    def position(self, n):
+        """Return the position after the first n moves.
+
+        Args:
+            n: Number of moves played, clamped to [0, len(self)].
+
+        Returns:
+            Tuple of (walls, pos, turn) with walls a set.
+        """
+        n = max(0, min(n, len(self.log)))
+        k = n // KEYFRAME_INTERVAL
+        walls, pos, turn = self.keyframes[k]
+        walls = set(walls)
+        for side, cell in self.log[k * KEYFRAME_INTERVAL:n]:
+            walls, pos, turn = self._apply(walls, pos, side, cell)
+        return walls, pos, turn
+
+    def game_at(self, n):
+        """Return a Game showing the position after the first n moves.
+
+        Only the last position keeps the game's result; earlier ones are
+        shown as ongoing.
+
+        Args:
+            n: Number of moves played, clamped to [0, len(self)].
+
+        Returns:
+            Game instance (a copy, safe to draw or analyze).
+        """
+        n = max(0, min(n, len(self.log)))
+        game = self.game.clone_position()
+        game.walls, game.pos, game.turn = self.position(n)
+        if n < len(self.log):
+            game.over, game.winner = False, None
+        game.update_region()
+        return game
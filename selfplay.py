@@ -0,0 +1,82 @@
+"""Self-play driver producing training logs.
+
+Plays AI-vs-AI games and writes one JSON line per decision with the
+position, the move played and the final winner. The logs feed
+learned_eval.py's trainer.
+
+Usage:
+    python selfplay.py --games 200 --mouse MEDIUM --explore 0.2 --out logs/selfplay.jsonl
+"""
+import sys
+import os
+import json
+import random
+import ai_logic
+from game import Game
+
+
+def play(game, mouse_difficulty, explore, rng):
+    """Play a game out with the HARD blocker against an AI mouse.
+
+    With probability explore the blocker plays a random one of its top
+    three candidates instead of best_wall, to diversify the positions.
+
+    Args:
+        game: Game instance with the blocker to move.
+        mouse_difficulty: Difficulty of the mouse.
+        explore: Exploration probability of the blocker.
+        rng: random.Random instance.
+
+    Returns:
+        List of decision records.
+    """
+    records = []
+    while not game.over:
+        rec = {"w": game.w, "h": game.h, "walls": sorted(game.walls), "pos": game.pos}
+        if game.turn == 0:
+            move = None
+            if rng.random() < explore:
+                top = ai_logic.wall_candidates(game, game.pos, game.walls)[:3]
+                move = rng.choice(top)[0] if top else None
+            move = move or game.choose_blocker_wall("HARD")
+            if move is None:
+                break
+            rec.update(side="BLOCKER", move=move)
+            game.apply_blocker_wall(move)
+        else:
+            move = game.choose_mouse_move(mouse_difficulty)
+            if move is None:
+                game.over, game.winner = True, "BLOCKER"
+                break
+            rec.update(side="MOUSE", move=move)
+            game.apply_mouse_move(move)
+        records.append(rec)
+    for rec in records:
+        rec["winner"] = game.winner
+    return records
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--games": "100", "--size": "11", "--obs": "10", "--mouse": "MEDIUM",
+               "--explore": "0.2", "--seed": "0", "--out": os.path.join("logs", "selfplay.jsonl")}
+    for name in options:
+        if name in args:
+            options[name] = args[args.index(name) + 1]
+
+    rng = random.Random(int(options["--seed"]))
+    random.seed(int(options["--seed"]))
+    folder = os.path.dirname(options["--out"])
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    size = int(options["--size"])
+    wins = 0
+    with open(options["--out"], "a") as f:
+        for i in range(int(options["--games"])):
+            g = Game(difficulty="HARD", w=size, h=size, n_obs=int(options["--obs"]),
+                     auto_resolve=True)
+            records = play(g, options["--mouse"], float(options["--explore"]), rng)
+            wins += g.winner == "BLOCKER"
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+    print(f"{options['--games']} games, blocker won {wins}")
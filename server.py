@@ -0,0 +1,161 @@
+"""Asyncio server for network PVP games.
+
+The server owns the authoritative Game of every match. Clients send JOIN
+and are paired first come, first served with a client asking for the
+same board; the first one plays the blocker. Moves are checked against
+the side to move and applied with Game.click_tile, so the usual rules
+decide what is legal; every accepted move is pushed to both players as a
+DELTA frame. Everything runs on one event loop thread.
+
+Usage:
+    python server.py --host 0.0.0.0 --port 5555
+"""
+import sys
+import asyncio
+import itertools
+import protocol
+from game import Game
+
+
+class Match:
+    """A game between two connected players.
+
+    Attributes:
+        id: Game number.
+        game: Authoritative Game instance.
+        writers: Stream writers of the blocker and the mouse.
+    """
+    def __init__(self, game_id, game, blocker, mouse):
+        self.id = game_id
+        self.game = game
+        self.writers = [blocker, mouse]
+
+
+class Server:
+    """Pairs clients and referees their games.
+
+    Attributes:
+        waiting: Dict mapping (w, h, n_obs) to a writer waiting for a game.
+        matches: Dict mapping a writer to its Match.
+        games_started: Number of matches created.
+        games_finished: Number of matches that reached a result.
+        moves: Number of accepted moves.
+    """
+    def __init__(self):
+        self.waiting = {}
+        self.matches = {}
+        self.ids = itertools.count(1)
+        self.games_started = 0
+        self.games_finished = 0
+        self.moves = 0
+
+    async def handle(self, reader, writer):
+        """Serve one client connection until it closes."""
+        try:
+            while True:
+                header = await reader.readexactly(protocol.HEADER.size)
+                msg_type, length = protocol.HEADER.unpack(header)
+                payload = await reader.readexactly(length)
+                try:
+                    fields = protocol.decode(msg_type, payload)
+                except ValueError:
+                    writer.write(protocol.encode_error(protocol.ERR_BAD_REQUEST))
+                    continue
+                if msg_type == protocol.JOIN:
+                    self.join(writer, *fields)
+                elif msg_type == protocol.MOVE:
+                    self.move(writer, *fields)
+                else:
+                    writer.write(protocol.encode_error(protocol.ERR_BAD_REQUEST))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.leave(writer)
+            writer.close()
+
+    def join(self, writer, w, h, n_obs):
+        """Pair a client with a waiting one, or make it wait.
+
+        Board sizes outside 5..25 and obstacle counts of half the board or
+        more are refused; such a board is walled in before the first move.
+        """
+        if (writer in self.matches or not 5 <= w <= 25 or not 5 <= h <= 25
+                or n_obs >= w * h / 2):
+            writer.write(protocol.encode_error(protocol.ERR_BAD_REQUEST))
+            return
+        key = (w, h, n_obs)
+        other = self.waiting.pop(key, None)
+        if other is None or other.is_closing():
+            self.waiting[key] = writer
+            return
+        match = Match(next(self.ids), Game(mode="PVP", w=w, h=h, n_obs=n_obs), other, writer)
+        self.games_started += 1
+        for role, player in enumerate(match.writers):
+            self.matches[player] = match
+            player.write(protocol.encode_start(match.id, role, match.game))
+
+    def move(self, writer, q, r):
+        """Validate and apply a move, then broadcast it."""
+        match = self.matches.get(writer)
+        if match is None or match.game.over:
+            writer.write(protocol.encode_error(protocol.ERR_NO_GAME))
+            return
+        game = match.game
+        role = match.writers.index(writer)
+        if role != game.turn:
+            writer.write(protocol.encode_error(protocol.ERR_NOT_YOUR_TURN))
+            return
+        before = (len(game.walls), game.pos, game.turn, game.over)
+        game.click_tile(q, r)
+        if (len(game.walls), game.pos, game.turn, game.over) == before:
+            writer.write(protocol.encode_error(protocol.ERR_ILLEGAL))
+            return
+        self.moves += 1
+        kind = protocol.WALL_PLACED if role == 0 else protocol.MOUSE_MOVED
+        delta = protocol.encode_delta(kind, (q, r), game.turn, game.winner)
+        for player in match.writers:
+            player.write(delta)
+        if game.over:
+            self.games_finished += 1
+            for player in match.writers:
+                self.matches.pop(player, None)
+
+    def leave(self, writer):
+        """Forget a disconnected client and tell its opponent."""
+        for key, waiting in list(self.waiting.items()):
+            if waiting is writer:
+                del self.waiting[key]
+        match = self.matches.pop(writer, None)
+        if match is not None:
+            for player in match.writers:
+                if player is not writer:
+                    self.matches.pop(player, None)
+                    if not player.is_closing():
+                        player.write(protocol.encode_left())
+
+
+async def serve(host=protocol.DEFAULT_HOST, port=protocol.DEFAULT_PORT, server=None):
+    """Run the server forever.
+
+    Args:
+        host: Interface to listen on (default protocol.DEFAULT_HOST).
+        port: TCP port (default protocol.DEFAULT_PORT).
+        server: Server instance (default a new one).
+    """
+    server = server or Server()
+    listener = await asyncio.start_server(server.handle, host, port, backlog=4096)
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--host": protocol.DEFAULT_HOST, "--port": str(protocol.DEFAULT_PORT)}
+    for name in options:
+        if name in args:
+            options[name] = args[args.index(name) + 1]
+    try:
+        asyncio.run(serve(options["--host"], int(options["--port"])))
+    except KeyboardInterrupt:
+        pass
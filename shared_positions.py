@@ -0,0 +1,212 @@
+"""Positions passed to AI worker processes through shared memory.
+
+Sending a position to a worker through a multiprocessing pipe pickles it,
+and for the small boards that costs more than the move it asks for. Here
+the board geometry of each size is written once into a shared memory
+block (the cell of every bit index), and a position is a fixed-size
+record in a ring of slots in another block: board size, side to move,
+difficulty, mouse cell and the walls as a bitmap over the cell indices.
+Workers read the record in place, write the move they choose back into
+the same slot, and only slot numbers travel through the control queues.
+"""
+import atexit
+import struct
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+import ai_logic
+import board_geometry
+
+SLOTS = 64
+MAX_CELLS = 1024
+DIFFICULTIES = ("EASY", "MEDIUM", "HARD", "EXPERT")
+
+# w, h, turn, difficulty, pos q, pos r, status, move q, move r
+RECORD = struct.Struct("<BBBBhhBhh")
+BITMAP_BYTES = MAX_CELLS // 8
+SLOT_SIZE = RECORD.size + BITMAP_BYTES
+CELL = struct.Struct("<hh")
+NO_MOVE, MOVE, FAILED = 0, 1, 2
+
+_names = itertools.count()
+
+
+def board_cells(w, h):
+    """Return the cells of a board size in bit index order."""
+    return list(board_geometry.get(w, h).order)
+
+
+def _attach(name):
+    """Open a shared block the pool owns, without tracking it here.
+
+    Python 3.13+ can attach untracked. Before that the worker's register
+    goes to the pool process's resource tracker, which spawned children
+    share and which keeps a set, so it adds nothing. Unregistering here
+    instead would drop the owner's entry, and its unlink would then fail
+    in the tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name)
+
+
+def _worker(ring_name, tasks, done):
+    """Worker loop: answer the positions of the slots named on tasks."""
+    ring = _attach(ring_name)
+    geometries = {}
+    try:
+        while True:
+            slot = tasks.get()
+            if slot is None:
+                return
+            offset = slot * SLOT_SIZE
+            w, h, turn, difficulty, q, r, _, _, _ = RECORD.unpack_from(ring.buf, offset)
+            cells = geometries.get((w, h))
+            if cells is None:
+                block = _attach(f"{ring_name}_{w}x{h}")
+                cells = geometries[(w, h)] = [CELL.unpack_from(block.buf, i * CELL.size)
+                                              for i in range(w * h)]
+                block.close()
+            start = offset + RECORD.size
+            bits = int.from_bytes(ring.buf[start:start + (len(cells) + 7) // 8], "little")
+            walls = []
+            while bits:
+                low = bits & -bits
+                walls.append(cells[low.bit_length() - 1])
+                bits ^= low
+            try:
+                move = ai_logic.solve_position(w, h, walls, (q, r), turn, DIFFICULTIES[difficulty])
+                status = NO_MOVE if move is None else MOVE
+            except Exception:
+                move, status = None, FAILED
+            RECORD.pack_into(ring.buf, offset, w, h, turn, difficulty, q, r,
+                             status, *(move or (0, 0)))
+            done.put(slot)
+    finally:
+        ring.close()
+
+
+class PositionPool:
+    """Worker processes fed with positions through a shared ring buffer.
+
+    Attributes:
+        workers: Number of worker processes.
+        name: Name of the ring's shared memory block; the geometry block
+            of a board size is named after it, e.g. name + "_11x11".
+    """
+    def __init__(self, workers, slots=SLOTS):
+        """Create the shared blocks and start the workers.
+
+        Args:
+            workers: Number of worker processes.
+            slots: Number of positions in flight at most (default SLOTS).
+        """
+        self.workers = workers
+        self.slots = slots
+        self.name = f"ttm{multiprocessing.current_process().pid}_{next(_names)}"
+        self._ring = shared_memory.SharedMemory(self.name, create=True, size=slots * SLOT_SIZE)
+        self._geometries = {}
+        # Spawned, not forked: the GUI and batch callers have threads
+        # running whose locks a fork could copy in a held state.
+        ctx = multiprocessing.get_context("spawn")
+        self._tasks = ctx.SimpleQueue()
+        self._done = ctx.SimpleQueue()
+        self._processes = [ctx.Process(target=_worker, daemon=True,
+                                       args=(self.name, self._tasks, self._done))
+                           for _ in range(workers)]
+        for process in self._processes:
+            process.start()
+        atexit.register(self.close)
+
+    def _index(self, w, h):
+        entry = self._geometries.get((w, h))
+        if entry is None:
+            cells = board_cells(w, h)
+            if len(cells) > MAX_CELLS:
+                raise ValueError(f"board {w}x{h} has more than {MAX_CELLS} cells")
+            block = shared_memory.SharedMemory(f"{self.name}_{w}x{h}", create=True,
+                                               size=len(cells) * CELL.size)
+            for i, cell in enumerate(cells):
+                CELL.pack_into(block.buf, i * CELL.size, *cell)
+            entry = self._geometries[(w, h)] = (block, {cell: i for i, cell in enumerate(cells)})
+        return entry[1]
+
+    def _write(self, slot, position):
+        w, h, walls, pos, turn, difficulty = position
+        index = self._index(w, h)
+        offset = slot * SLOT_SIZE
+        RECORD.pack_into(self._ring.buf, offset, w, h, turn, DIFFICULTIES.index(difficulty),
+                         *pos, 0, 0, 0)
+        bits = 0
+        for cell in walls:
+            bits |= 1 << index[cell]
+        start = offset + RECORD.size
+        self._ring.buf[start:start + BITMAP_BYTES] = bits.to_bytes(BITMAP_BYTES, "little")
+
+    def _read(self, slot):
+        w, h, _, _, pos_q, pos_r, status, q, r = RECORD.unpack_from(self._ring.buf, slot * SLOT_SIZE)
+        if status == FAILED:
+            raise RuntimeError(f"worker failed on the {w}x{h} position at {(pos_q, pos_r)}")
+        return (q, r) if status == MOVE else None
+
+    def map(self, positions):
+        """Choose the moves of many positions.
+
+        Args:
+            positions: List of (w, h, walls, pos, turn, difficulty) tuples.
+
+        Returns:
+            List with the move of each position, None where the side to
+            move has none.
+
+        Raises:
+            RuntimeError: If a worker raised an exception on a position;
+                raised once the positions in flight are all back, so
+                the pool stays usable.
+        """
+        moves = [None] * len(positions)
+        owner = {}
+        failures = []
+        free = list(range(self.slots))
+        pending = iter(enumerate(positions))
+        while True:
+            for slot in free:
+                item = next(pending, None)
+                if item is None:
+                    break
+                owner[slot] = item[0]
+                self._write(slot, item[1])
+                self._tasks.put(slot)
+            free = []
+            if not owner:
+                break
+            slot = self._done.get()
+            i = owner.pop(slot)
+            try:
+                moves[i] = self._read(slot)
+            except RuntimeError as e:
+                failures.append(e)
+                pending = iter(())
+            free.append(slot)
+        if failures:
+            raise failures[0]
+        return moves
+
+    def close(self):
+        """Stop the workers and free the shared memory blocks."""
+        if self._ring is None:
+            return
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        for block, _ in self._geometries.values():
+            block.close()
+            block.unlink()
+        self._ring.close()
+        self._ring.unlink()
+        self._ring = None
+        atexit.unregister(self.close)
@@ -0,0 +1,162 @@
+"""Long-session soak test with a memory-growth detector.
+
+Plays thousands of games in one process through the Game API the way a
+kiosk session does: human moves with click_tile and the AI replying,
+undo/redo storms, save/load cycles, and the previous game kept alive
+while the next one is played, as main.py keeps it across the menus.
+Memory is sampled with tracemalloc and the process RSS after a warm-up,
+and the growth per game is the slope of a least-squares line through the
+samples. The run fails (exit status 1) when the traced growth per game
+is above the threshold.
+
+The caps on what a session keeps (game.HISTORY_LIMIT undo snapshots per
+game, tablebase.MEMORY_LIMIT in-memory tables) can be set from the
+command line to check their effect.
+
+Usage:
+    python soak.py --games 2000 --size 11 --difficulty MEDIUM --threshold 256
+    python soak.py --games 50 --size 25 --history-limit 50
+"""
+import sys
+import os
+import gc
+import time
+import random
+import tempfile
+import tracemalloc
+import game as game_module
+from game import Game
+
+SAMPLES = 20
+STORM_MOVES = 60
+
+
+def rss_bytes():
+    """Return the resident set size of this process, 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def play(game, rng):
+    """Play a game out, the human side picking MEDIUM moves."""
+    while not game.over:
+        if game.turn == 0:
+            move = game.choose_blocker_wall("MEDIUM")
+        else:
+            move = game.choose_mouse_move("MEDIUM")
+        before = game.position_key()
+        if move is not None:
+            game.click_tile(*move)
+        if move is None or game.position_key() == before:
+            break
+
+
+def storm(game, rng, moves=STORM_MOVES):
+    """Undo and redo at random, then redo everything that is left."""
+    for _ in range(moves):
+        if rng.random() < 0.5:
+            game.undo()
+        else:
+            game.redo()
+    while game.redo_stack:
+        game.redo()
+
+
+def slope(points):
+    """Return the least-squares slope of (x, y) points."""
+    n = len(points)
+    mx = sum(x for x, _ in points) / n
+    my = sum(y for _, y in points) / n
+    var = sum((x - mx) ** 2 for x, _ in points)
+    return sum((x - mx) * (y - my) for x, y in points) / var if var else 0.0
+
+
+def soak(games, size=11, difficulty="MEDIUM", warmup=None, save_every=10, seed=0, log=print):
+    """Run a soak session and measure the memory growth per game.
+
+    Args:
+        games: Number of games to play.
+        size: Board size (default 11).
+        difficulty: AI difficulty (default "MEDIUM").
+        warmup: Games played before the first sample, letting caches
+            fill (default a tenth of the games).
+        save_every: Save and reload the game every that many games
+            (default 10).
+        seed: Random seed (default 0).
+        log: Function receiving progress lines (default print).
+
+    Returns:
+        Dict with traced_per_game and rss_per_game in bytes, the peak
+        traced memory, seconds, and the top allocation sites that grew
+        since the warm-up.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)
+    warmup = games // 10 if warmup is None else warmup
+    every = max(1, (games - warmup) // SAMPLES)
+    folder = tempfile.mkdtemp(prefix="soak")
+    traced, rss = [], []
+    baseline = None
+    previous = None
+    game = None
+    start = time.perf_counter()
+    tracemalloc.start()
+    try:
+        for i in range(1, games + 1):
+            role = "BLOCKER" if i % 2 else "MOUSE"
+            previous, game = game, Game(mode="AI", difficulty=difficulty, player_role=role,
+                                        w=size, h=size, auto_resolve=True, balanced=True)
+            play(game, rng)
+            storm(game, rng)
+            if i % save_every == 0:
+                game.save_to_file("soak.sav", folder)
+                game = Game.load_from_file("soak.sav", folder)
+                storm(game, rng)
+            if i == warmup or (i > warmup and (i - warmup) % every == 0):
+                gc.collect()
+                current = tracemalloc.get_traced_memory()[0]
+                if baseline is None:
+                    baseline = tracemalloc.take_snapshot()
+                traced.append((i, current))
+                rss.append((i, rss_bytes()))
+                log(f"game {i:6d}: traced {current / 1024:9.1f} KB, "
+                    f"rss {rss[-1][1] / 2 ** 20:7.1f} MB, history {len(game.history)}")
+        growth = tracemalloc.take_snapshot().compare_to(baseline, "lineno")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+    return {"traced_per_game": slope(traced) if len(traced) > 1 else 0.0,
+            "rss_per_game": slope(rss) if len(rss) > 1 else 0.0,
+            "peak": peak, "seconds": time.perf_counter() - start,
+            "top": [str(stat) for stat in growth[:5] if stat.size_diff > 0]}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--games": "1000", "--size": "11", "--difficulty": "MEDIUM",
+               "--threshold": "256", "--seed": "0", "--history-limit": None}
+    for name in options:
+        if name in args:
+            options[name] = args[args.index(name) + 1]
+    threshold = float(options["--threshold"])
+    if options["--history-limit"] is not None:
+        limit = int(options["--history-limit"])
+        game_module.HISTORY_LIMIT = limit if limit > 0 else None
+    result = soak(int(options["--games"]), int(options["--size"]), options["--difficulty"],
+                  seed=int(options["--seed"]))
+    print(f"{options['--games']} games in {result['seconds']:.0f} s, "
+          f"peak traced {result['peak'] / 2 ** 20:.1f} MB")
+    print(f"growth per game: traced {result['traced_per_game']:.1f} B, "
+          f"rss {result['rss_per_game']:.1f} B (threshold {threshold:.0f} B traced)")
+    for line in result["top"]:
+        print("  " + line)
+    if result["traced_per_game"] > threshold:
+        print("FAIL: memory grows with the number of games")
+        sys.exit(1)
+    print("OK")
@@ -0,0 +1,119 @@
+"""AI against AI games to watch, with play/pause/step and speed control.
+
+Moves are played on a schedule of their own rather than one per frame:
+at the normal speeds the schedule is a number of moves per second, and
+at the top speed moves are played back to back for RENDER_INTERVAL
+seconds between two rendered frames, so the game logic is never
+throttled by the frame rate.
+"""
+import time
+from game import Game
+
+SPEEDS = (1, 2, 4, 8, 30, None)
+RENDER_INTERVAL = 0.1
+RESULT_PAUSE = 1.0
+
+
+class Spectator:
+    """A series of AI against AI games and its playback state.
+
+    Attributes:
+        game: Game being played (mode "SPECTATE").
+        difficulties: Tuple of the blocker's and the mouse's difficulty.
+        paused: Whether playback is paused.
+        speed_index: Index of the current speed in SPEEDS.
+        games: Number of finished games.
+        wins: Dict counting the finished games won by each side.
+        moves: Number of moves played.
+        started: time.perf_counter() value when watching began.
+    """
+    def __init__(self, w=11, h=11, blocker_difficulty="HARD", mouse_difficulty="HARD"):
+        """Start the first game.
+
+        Args:
+            w: Grid width (default 11).
+            h: Grid height (default 11).
+            blocker_difficulty: Difficulty of the blocker AI (default "HARD").
+            mouse_difficulty: Difficulty of the mouse AI (default "HARD").
+        """
+        self.game = Game(mode="SPECTATE", difficulty=blocker_difficulty, w=w, h=h,
+                         auto_resolve=True, balanced=True)
+        self.difficulties = (blocker_difficulty, mouse_difficulty)
+        self.paused = False
+        self.speed_index = 2
+        self.games = 0
+        self.wins = {"BLOCKER": 0, "MOUSE": 0}
+        self.moves = 0
+        self.started = time.perf_counter()
+        self._next = self.started
+
+    @property
+    def speed(self):
+        """Moves per second, or None for as fast as possible."""
+        return SPEEDS[self.speed_index]
+
+    def faster(self):
+        """Switch to the next higher speed."""
+        self.speed_index = min(self.speed_index + 1, len(SPEEDS) - 1)
+        self._next = time.perf_counter()
+
+    def slower(self):
+        """Switch to the next lower speed."""
+        self.speed_index = max(self.speed_index - 1, 0)
+        self._next = time.perf_counter()
+
+    def toggle_pause(self):
+        """Pause or resume playback."""
+        self.paused = not self.paused
+        self._next = time.perf_counter()
+
+    def step(self):
+        """Play one move, or start the next game if this one is over.
+
+        Returns:
+            True if the move ended the game, False otherwise.
+        """
+        game = self.game
+        if game.over:
+            game.reset()
+            return False
+        if game.turn == 0:
+            wall = game.choose_blocker_wall(self.difficulties[0])
+            if wall is None:
+                game.turn = 1
+            else:
+                game.apply_blocker_wall(wall)
+        else:
+            move = game.choose_mouse_move(self.difficulties[1])
+            if move is None:
+                game.over, game.winner = True, "BLOCKER"
+            else:
+                game.apply_mouse_move(move)
+        self.moves += 1
+        if game.over:
+            self.games += 1
+            self.wins[game.winner] += 1
+        return game.over
+
+    def advance(self):
+        """Play the moves that are due before the next frame is drawn."""
+        if self.paused:
+            return
+        now = time.perf_counter()
+        if self.speed is None:
+            deadline = now + RENDER_INTERVAL
+            while time.perf_counter() < deadline:
+                self.step()
+            return
+        # Do not try to catch up after a long stall, e.g. a slow EXPERT move.
+        self._next = max(self._next, now - 1.0)
+        while self._next <= now:
+            ended = self.step()
+            self._next += 1.0 / self.speed
+            if ended:
+                self._next = now + RESULT_PAUSE
+
+    def games_per_minute(self):
+        """Return the finished games per minute since watching began."""
+        elapsed = time.perf_counter() - self.started
+        return 60.0 * self.games / elapsed if elapsed > 0 else 0.0
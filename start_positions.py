@@ -0,0 +1,320 @@
+"""Balanced start positions.
+
+Game.add_walls drops its obstacles uniformly at random, so some starts
+leave the mouse almost free and others almost trapped. This module samples
+candidate wall layouts and screens them with cheap measures of the mouse's
+escape routes, keeping the layouts whose measures fall in a target band
+around those of the empty board:
+
+- the mouse's distance to the edge must not grow,
+- the number of vertex-disjoint shortest escape paths (the base min-cut)
+  must drop by CUT_BAND,
+- the number of shortest escape paths must stay within PATH_BAND as a
+  share of the empty board's.
+
+Walls only ever remove shortest paths, so while the distance to the edge
+is unchanged all three measures only depend on the walls lying on the
+empty board's shortest-path DAG. The screen precomputes that DAG once per
+board size and evaluates a layout on it alone.
+
+The balanced layout of a game is a function of its seed: the first
+layout that passes the screen when sampling with random.Random(seed). A
+background thread keeps a small pool of vetted (seed, layout) pairs per
+board configuration, so a Game without a seed of its own never waits for
+the screen.
+
+Usage:
+    python start_positions.py --size 11x11 --obs 10 --count 5000 --seed 0
+"""
+import sys
+import time
+import random
+import threading
+import collections
+import ai_logic
+
+CUT_BAND = (1, 2)
+PATH_BAND = (0.4, 0.85)
+POOL_SIZE = 32
+MAX_TRIES = 200
+
+_screens = {}
+_pools = collections.defaultdict(collections.deque)
+_filling = set()
+_lock = threading.Lock()
+
+
+class Screen:
+    """Fairness screen for the start layouts of one board size.
+
+    Attributes:
+        board: Wall-free Game of the board size.
+        start: Mouse start cell.
+        distance: Distance from start to the edge on the empty board.
+        paths: Number of shortest escape paths on the empty board.
+        cut: Base min-cut on the empty board.
+        order: Cells of the empty board's shortest-path DAG by distance.
+        dist: Dict mapping each DAG cell to its distance from start.
+        preds: Dict mapping each DAG cell to its DAG predecessors.
+        exits: DAG cells on the edge.
+        cells: Cells a wall may be placed on.
+    """
+    def __init__(self, w, h):
+        """Precompute the empty board's shortest-path DAG.
+
+        Args:
+            w: Grid width.
+            h: Grid height.
+        """
+        from game import Game
+        self.board = Game(w=w, h=h, n_obs=0)
+        self.start = self.board.pos
+        self.cells = sorted(c for c in self.board.cells if c != self.start)
+        dist = ai_logic.bfs_dist(self.board, self.start, set())
+        IN, OUT, self.paths = ai_logic.dp_IN_OUT(self.board, dist, set(), self.start)
+        self.cut = ai_logic.unit_flow_cut(self.board, self.start, set(), dist)[0]
+        self.order = sorted((u for u in dist if IN[u] and OUT[u]), key=dist.get)
+        self.dist = {u: dist[u] for u in self.order}
+        self.distance = max(self.dist.values())
+        self.preds = {u: [v for v in self.board.get_neighbors(*u)
+                          if self.dist.get(v) == dist[u] - 1] for u in self.order}
+        self.exits = [u for u in self.order if self.dist[u] == self.distance]
+        self._build_network()
+
+    def _build_network(self):
+        """Lay out the DAG as a flow network with split cells.
+
+        Cell i becomes nodes 2i (in) and 2i+1 (out) joined by a unit
+        capacity edge, the sink is the last node. Edges are stored in
+        pairs, edge e ^ 1 being the reverse of edge e.
+        """
+        index = {u: i for i, u in enumerate(self.order)}
+        self.sink = 2 * len(self.order)
+        self.head = []
+        self.capacity = []
+        self.edges = [[] for _ in range(self.sink + 1)]
+        self.cell_edge = {}
+
+        def link(a, b, cap):
+            self.edges[a].append(len(self.head))
+            self.head.append(b)
+            self.capacity.append(cap)
+            self.edges[b].append(len(self.head))
+            self.head.append(a)
+            self.capacity.append(0)
+
+        for u, i in index.items():
+            self.cell_edge[u] = len(self.head)
+            link(2 * i, 2 * i + 1, len(self.order) if u == self.start else 1)
+            for v in self.preds[u]:
+                link(2 * index[v] + 1, 2 * i, 1)
+        for u in self.exits:
+            link(2 * index[u] + 1, self.sink, 1)
+        self.source = 2 * index[self.start]
+
+    def evaluate(self, walls):
+        """Measure the mouse's escape routes on a layout.
+
+        Args:
+            walls: Set of wall cells, not containing the start cell.
+
+        Returns:
+            Tuple of (distance, paths, cut) for the mouse at the start.
+            When the walls block every shortest escape path the way out
+            got longer, which the screen rejects anyway, so distance and
+            cut are None instead of being measured on the full board.
+        """
+        count = {}
+        for u in self.order:
+            if u in walls:
+                count[u] = 0
+            elif u == self.start:
+                count[u] = 1
+            else:
+                count[u] = sum(count[v] for v in self.preds[u])
+        paths = sum(count[u] for u in self.exits)
+        if paths == 0:
+            return None, 0, None
+        return self.distance, paths, self._cut(walls)
+
+    def _cut(self, walls):
+        """Count vertex-disjoint shortest escape paths by augmenting paths."""
+        capacity = self.capacity[:]
+        for u in walls:
+            e = self.cell_edge.get(u)
+            if e is not None:
+                capacity[e] = 0
+        head, edges, sink = self.head, self.edges, self.sink
+        flow = 0
+        while True:
+            prev = {self.source: None}
+            queue = collections.deque([self.source])
+            while queue and sink not in prev:
+                a = queue.popleft()
+                for e in edges[a]:
+                    b = head[e]
+                    if capacity[e] and b not in prev:
+                        prev[b] = e
+                        queue.append(b)
+            if sink not in prev:
+                return flow
+            b = sink
+            while prev[b] is not None:
+                e = prev[b]
+                capacity[e] -= 1
+                capacity[e ^ 1] += 1
+                b = head[e ^ 1]
+            flow += 1
+
+    def accepts(self, measures):
+        """Return True if a layout's measures lie in the target band."""
+        distance, paths, cut = measures
+        if distance != self.distance or cut is None:
+            return False
+        if not self.cut - CUT_BAND[1] <= cut <= self.cut - CUT_BAND[0]:
+            return False
+        return PATH_BAND[0] * self.paths <= paths <= PATH_BAND[1] * self.paths
+
+    def generate(self, n_obs, count, rng=random):
+        """Sample layouts until count of them pass the screen.
+
+        Gives up after MAX_TRIES samples per requested layout, e.g. when
+        n_obs is too small to ever reach the band.
+
+        Args:
+            n_obs: Number of walls per layout.
+            count: Number of layouts to return.
+            rng: Random source (default the random module).
+
+        Returns:
+            List of at most count wall frozensets.
+        """
+        found = []
+        n_obs = min(n_obs, len(self.cells))
+        for _ in range(count * MAX_TRIES):
+            if len(found) == count:
+                break
+            walls = frozenset(rng.sample(self.cells, n_obs))
+            if self.accepts(self.evaluate(walls)):
+                found.append(walls)
+        return found
+
+
+def get_screen(w, h):
+    """Return the screen of a board size, building it on first use."""
+    screen = _screens.get((w, h))
+    if screen is None:
+        screen = _screens[(w, h)] = Screen(w, h)
+    return screen
+
+
+def generate(w, h, n_obs, count, rng=random):
+    """Generate balanced wall layouts for a board configuration.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        n_obs: Number of walls per layout.
+        count: Number of layouts.
+        rng: Random source (default the random module).
+
+    Returns:
+        List of wall frozensets.
+    """
+    return get_screen(w, h).generate(n_obs, count, rng)
+
+
+def draw(w, h, n_obs, seed):
+    """Return the balanced layout of a seed.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        n_obs: Number of walls.
+        seed: Seed of the sampling.
+
+    Returns:
+        Wall frozenset, or None if no sample passed the screen.
+    """
+    found = generate(w, h, n_obs, 1, random.Random(seed))
+    return found[0] if found else None
+
+
+def prefill(w, h, n_obs):
+    """Start filling the pool of a board configuration in the background.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        n_obs: Number of walls per layout.
+    """
+    key = (w, h, n_obs)
+    with _lock:
+        if key in _filling or len(_pools[key]) >= POOL_SIZE:
+            return
+        _filling.add(key)
+    threading.Thread(target=_fill, args=(key,), daemon=True).start()
+
+
+def _fill(key):
+    w, h, n_obs = key
+    try:
+        while len(_pools[key]) < POOL_SIZE:
+            seed = random.randrange(2 ** 32)
+            walls = draw(w, h, n_obs, seed)
+            if walls is None:
+                break
+            _pools[key].append((seed, walls))
+    finally:
+        with _lock:
+            _filling.discard(key)
+
+
+def take(w, h, n_obs):
+    """Take a vetted start from the pool without waiting.
+
+    The pool is topped up in the background after every call.
+
+    Args:
+        w: Grid width.
+        h: Grid height.
+        n_obs: Number of walls per layout.
+
+    Returns:
+        Tuple of (seed, walls) with walls the layout draw returns for
+        seed, or None if the pool is empty.
+    """
+    pool = _pools[(w, h, n_obs)]
+    try:
+        start = pool.popleft()
+    except IndexError:
+        start = None
+    prefill(w, h, n_obs)
+    return start
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--size": "11x11", "--obs": "10", "--count": "2000", "--seed": "0"}
+    for name in options:
+        if name in args:
+            i = args.index(name)
+            options[name] = args[i + 1]
+    w, h = (int(x) for x in options["--size"].lower().split("x"))
+    n_obs, count = int(options["--obs"]), int(options["--count"])
+    rng = random.Random(int(options["--seed"]))
+
+    screen = get_screen(w, h)
+    print(f"empty board: distance {screen.distance}, {screen.paths} paths, cut {screen.cut}")
+    sampled = collections.Counter()
+    t = time.perf_counter()
+    for _ in range(count):
+        walls = set(rng.sample(screen.cells, min(n_obs, len(screen.cells))))
+        sampled[screen.accepts(screen.evaluate(walls))] += 1
+    elapsed = time.perf_counter() - t
+    print(f"screened {count} layouts in {elapsed:.2f}s ({count / elapsed:.0f}/s), "
+          f"{sampled[True]} accepted ({sampled[True] / count:.0%})")
+    t = time.perf_counter()
+    generate(w, h, n_obs, count, rng)
+    elapsed = time.perf_counter() - t
+    print(f"generated {count} balanced starts in {elapsed:.2f}s ({count / elapsed:.0f}/s)")
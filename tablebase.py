@@ -0,0 +1,351 @@
+"""Endgame tablebase for small mouse regions.
+
+When the free cells reachable by the mouse form a region of at most
+TB_MAX_CELLS cells, the rest of the board no longer matters and the game
+can be solved exactly. This module solves such regions by retrograde
+analysis over every subset of their cells and stores the results in a
+memory-mapped file, keyed by a canonical encoding of the region that is
+independent of its position and orientation on the board.
+
+Each table holds one byte per (free cells mask, mouse cell, side to move):
+the number of walls the blocker still needs to trap the mouse with best
+play from both sides, or ESCAPE if the mouse gets out.
+
+Several processes (analysis and tuning pools) and threads (pondering) may
+solve tables at once. Appending a table and rewriting the index happen
+under a lock file and a thread lock, with the index re-read from disk
+inside them, so no writer records a wrong offset or drops another's key.
+"""
+import os
+import mmap
+import pickle
+import threading
+import hex_math
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+TB_MAX_CELLS = 10
+TB_FOLDER = "tablebase"
+ESCAPE = 255
+# Tables kept in memory when the tablebase folder cannot be written.
+MEMORY_LIMIT = 256
+
+_index = None
+_data = None
+_memory = {}
+_lock = threading.Lock()
+
+
+def small_region(game, mouse_pos, blocked, limit=TB_MAX_CELLS):
+    """Collect the mouse's free region if it has at most limit cells.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+        limit: Maximum region size (default TB_MAX_CELLS).
+
+    Returns:
+        Set of free cells reachable from mouse_pos, or None if larger.
+    """
+    region = {mouse_pos}
+    stack = [mouse_pos]
+    while stack:
+        u = stack.pop()
+        for n in game.get_neighbors(*u):
+            if n in game.cells and n not in blocked and n not in region:
+                region.add(n)
+                if len(region) > limit:
+                    return None
+                stack.append(n)
+    return region
+
+
+def canonical_region(game, region):
+    """Encode a region independently of its placement on the board.
+
+    The region is tried under all 12 grid symmetries, each translated so
+    its smallest q and r are 0, and the lexicographically smallest sorted
+    list of (q, r, is_exit) entries is kept.
+
+    Args:
+        game: Game instance.
+        region: Set of free cells.
+
+    Returns:
+        Tuple of (key, order) where key is the canonical encoding and
+        order lists the region's cells in canonical index order.
+    """
+    best = None
+    for k in range(12):
+        moved = [(hex_math.transform(q, r, k), (q, r)) for q, r in region]
+        min_q = min(c[0] for c, _ in moved)
+        min_r = min(c[1] for c, _ in moved)
+        entries = sorted(((c[0] - min_q, c[1] - min_r, int(game.final_hex(cell))), cell)
+                         for c, cell in moved)
+        key = tuple(e for e, _ in entries)
+        if best is None or key < best[0]:
+            best = (key, [cell for _, cell in entries])
+    return best
+
+
+def _offset(mask, n, i, turn):
+    return ((mask * n) + i) * 2 + turn
+
+
+def solve_region(key):
+    """Solve every position inside a canonical region by retrograde analysis.
+
+    Masks are processed in order of increasing size, because a wall only
+    ever removes a cell: blocker-to-move values depend on mouse-to-move
+    values of smaller masks, and mouse-to-move values on blocker-to-move
+    values of the same mask.
+
+    Args:
+        key: Canonical region encoding from canonical_region.
+
+    Returns:
+        Bytearray table indexed by (mask, mouse index, side to move).
+    """
+    n = len(key)
+    index = {(q, r): i for i, (q, r, _) in enumerate(key)}
+    exits = [e for _, _, e in key]
+    adj = []
+    for q, r, _ in key:
+        bits = 0
+        for dq, dr in ((1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)):
+            j = index.get((q + dq, r + dr))
+            if j is not None:
+                bits |= 1 << j
+        adj.append(bits)
+
+    table = bytearray([ESCAPE]) * (2 * n << n)
+    for mask in sorted(range(1, 1 << n), key=lambda m: bin(m).count("1")):
+        cells = [i for i in range(n) if mask >> i & 1]
+        for p in cells:
+            best = ESCAPE
+            for c in cells:
+                if c == p:
+                    continue
+                v = table[_offset(mask & ~(1 << c), n, p, 1)]
+                if v != ESCAPE and v + 1 < best:
+                    best = v + 1
+            if len(cells) == 1 and not exits[p]:
+                best = 0
+            table[_offset(mask, n, p, 0)] = best
+
+        for p in cells:
+            if exits[p]:
+                continue
+            moves = [m for m in cells if adj[p] >> m & 1]
+            worst = 0
+            for m in moves:
+                v = table[_offset(mask, n, m, 0)]
+                if v > worst:
+                    worst = v
+            table[_offset(mask, n, p, 1)] = worst
+    return table
+
+
+def _table_size(key):
+    return 2 * len(key) << len(key)
+
+
+def _read_index():
+    """Return the on-disk index, leaving out tables regions.dat lacks.
+
+    An index without its data file (deleted, truncated or empty) would
+    point past the end of the mapping; those tables are solved again.
+    """
+    try:
+        with open(os.path.join(TB_FOLDER, "regions.idx"), "rb") as f:
+            index = pickle.load(f)
+        size = os.path.getsize(os.path.join(TB_FOLDER, "regions.dat"))
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return {}
+    return {key: offset for key, offset in index.items()
+            if offset + _table_size(key) <= size}
+
+
+def _map():
+    """Map regions.dat, or return None while it is empty."""
+    path = os.path.join(TB_FOLDER, "regions.dat")
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _load():
+    global _index, _data
+    if _index is not None:
+        return
+    with _lock:
+        if _index is not None:
+            return
+        index = _read_index()
+        try:
+            _data = _map() if index else None
+        except OSError:
+            index = {}
+        _index = index
+
+
+def _lock_file(f, locked):
+    """Take or release an exclusive lock on an open file."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if locked else msvcrt.LK_UNLCK, 1)
+
+
+def preload():
+    """Open the table index now instead of on the first probe."""
+    _load()
+
+
+def _store(key, table):
+    """Append a solved table to the on-disk tablebase.
+
+    The index is re-read under the locks: another writer may have added
+    tables, this one among them, since it was last loaded. The data is
+    mapped before the new index is published, so a reader never finds an
+    offset past the end of the mapping it uses.
+    """
+    global _index, _data
+    with _lock:
+        try:
+            os.makedirs(TB_FOLDER, exist_ok=True)
+            with open(os.path.join(TB_FOLDER, "regions.lock"), "a+b") as lock:
+                _lock_file(lock, True)
+                try:
+                    index = _read_index()
+                    if key not in index:
+                        with open(os.path.join(TB_FOLDER, "regions.dat"), "ab") as f:
+                            index[key] = f.seek(0, os.SEEK_END)
+                            f.write(table)
+                        path = os.path.join(TB_FOLDER, "regions.idx")
+                        tmp = f"{path}.{os.getpid()}.tmp"
+                        with open(tmp, "wb") as f:
+                            pickle.dump(index, f)
+                        os.replace(tmp, path)
+                finally:
+                    _lock_file(lock, False)
+            _data = _map()
+            _index = index
+        except OSError:
+            if len(_memory) >= MEMORY_LIMIT:
+                del _memory[next(iter(_memory))]
+            _memory[key] = table
+
+
+def get_table(key):
+    """Return the solved table for a canonical region, building it once.
+
+    Args:
+        key: Canonical region encoding from canonical_region.
+
+    Returns:
+        Buffer supporting indexing by table offset.
+    """
+    _load()
+    table = _memory.get(key)
+    if table is not None:
+        return table
+    offset = _index.get(key)
+    if offset is None:
+        _store(key, solve_region(key))
+        table = _memory.get(key)
+        if table is not None:
+            return table
+        offset = _index[key]
+    return memoryview(_data)[offset:offset + _table_size(key)]
+
+
+def _probe(game, mouse_pos, blocked):
+    region = small_region(game, mouse_pos, blocked)
+    if region is None:
+        return None
+    key, order = canonical_region(game, region)
+    pos = {cell: i for i, cell in enumerate(order)}
+    return get_table(key), pos, len(order)
+
+
+def probe_wall(game, mouse_pos, blocked):
+    """Look up the fastest trapping wall for a small mouse region.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Tuple of (wall, walls_to_trap) or None if the region is too large
+        or the mouse escapes against every wall.
+    """
+    found = _probe(game, mouse_pos, blocked)
+    if found is None:
+        return None
+    table, pos, n = found
+    full = (1 << n) - 1
+    p = pos[mouse_pos]
+    best = None
+    for cell, c in pos.items():
+        if c == p:
+            continue
+        v = table[_offset(full & ~(1 << c), n, p, 1)]
+        if v != ESCAPE and (best is None or v + 1 < best[1]):
+            best = (cell, v + 1)
+    return best
+
+
+def probe_mouse(game, mouse_pos, blocked):
+    """Look up the best mouse move inside a small region.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+
+    Returns:
+        Tuple of (move, walls_to_trap) where walls_to_trap is ESCAPE for a
+        winning move, or None if the region is too large or has no moves.
+    """
+    found = _probe(game, mouse_pos, blocked)
+    if found is None:
+        return None
+    table, pos, n = found
+    full = (1 << n) - 1
+    best = None
+    for move in game.get_neighbors(*mouse_pos):
+        if move not in pos:
+            continue
+        v = table[_offset(full, n, pos[move], 0)]
+        if best is None or v > best[1] or (v == best[1] == ESCAPE and game.final_hex(move)):
+            best = (move, v)
+    return best
+
+
+def probe_value(game, mouse_pos, blocked, turn):
+    """Look up the exact value of a position in a small mouse region.
+
+    Args:
+        game: Game instance.
+        mouse_pos: Current mouse position (q, r).
+        blocked: Set of blocked cells.
+        turn: Side to move (0 = blocker, 1 = mouse).
+
+    Returns:
+        Number of walls the blocker still needs to trap the mouse, ESCAPE
+        if the mouse gets out, or None if the region is too large.
+    """
+    found = _probe(game, mouse_pos, blocked)
+    if found is None:
+        return None
+    table, pos, n = found
+    return table[_offset((1 << n) - 1, n, pos[mouse_pos], turn)]
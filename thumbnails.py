@@ -0,0 +1,183 @@
+"""Board thumbnails of save files, rendered in the background.
+
+Thumbnails are drawn with ui.draw_board in a separate worker process
+running pygame on the SDL dummy video driver, so rendering never touches
+the game window or its frame rate. They are cached on disk as PNG files
+named after the SHA-1 of the save's content: an overwritten save hashes
+differently and gets a fresh thumbnail, and thumbnails no save refers to
+any more are deleted.
+
+Usage:
+    python thumbnails.py    # render the thumbnails of every save
+"""
+import os
+import signal
+import hashlib
+import pickle
+import multiprocessing
+import pygame
+import hex_math
+import ui
+import constants as C
+
+THUMB_FOLDER = "thumbnails"
+SAVE_FOLDER = "saves"
+RENDER_SIZE = (360, 270)
+THUMB_SIZE = (72, 54)
+
+
+def _init_worker():
+    # SDL reads the driver when the display is initialized, not on import.
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.display.init()
+    # SDL turns SIGTERM into a quit event; Pool.terminate() needs it to kill.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def thumbnail_path(data, folder=THUMB_FOLDER):
+    """Return the cache path of the thumbnail of a save's content."""
+    return os.path.join(folder, hashlib.sha1(data).hexdigest() + ".png")
+
+
+def render(data, path):
+    """Draw the board of a pickled game into a PNG file.
+
+    Args:
+        data: Save file content.
+        path: PNG file to write.
+    """
+    game = pickle.loads(data)
+    surface = pygame.Surface(RENDER_SIZE)
+    surface.fill(C.COLOR_BG)
+    sz = hex_math.get_hex_size(game.w, game.h, *RENDER_SIZE)
+    ui.draw_board(surface, game, sz, (RENDER_SIZE[0] // 2, RENDER_SIZE[1] // 2))
+    tmp = path + ".tmp.png"
+    pygame.image.save(pygame.transform.smoothscale(surface, THUMB_SIZE), tmp)
+    os.replace(tmp, path)
+
+
+def build(filename, save_folder=SAVE_FOLDER, thumb_folder=THUMB_FOLDER):
+    """Make sure a save has a cached thumbnail.
+
+    Args:
+        filename: Save file name.
+        save_folder: Folder of the save files (default SAVE_FOLDER).
+        thumb_folder: Thumbnail cache folder (default THUMB_FOLDER).
+
+    Returns:
+        Tuple of (filename, thumbnail path), the path None if the save
+        cannot be read.
+    """
+    try:
+        with open(os.path.join(save_folder, filename), "rb") as f:
+            data = f.read()
+        path = thumbnail_path(data, thumb_folder)
+        if not os.path.exists(path):
+            os.makedirs(thumb_folder, exist_ok=True)
+            render(data, path)
+        return filename, path
+    except Exception:
+        return filename, None
+
+
+def prune(save_folder=SAVE_FOLDER, thumb_folder=THUMB_FOLDER):
+    """Delete the cached thumbnails that no save file matches any more.
+
+    Returns:
+        Number of deleted thumbnails.
+    """
+    if not os.path.isdir(thumb_folder):
+        return 0
+    keep = set()
+    if os.path.isdir(save_folder):
+        for name in os.listdir(save_folder):
+            if name.endswith(".sav"):
+                with open(os.path.join(save_folder, name), "rb") as f:
+                    keep.add(os.path.basename(thumbnail_path(f.read(), thumb_folder)))
+    removed = 0
+    for name in os.listdir(thumb_folder):
+        if name not in keep:
+            os.remove(os.path.join(thumb_folder, name))
+            removed += 1
+    return removed
+
+
+class ThumbnailCache:
+    """Thumbnails for the load menu, requested from a background worker.
+
+    The worker process is started lazily on the first request. get()
+    never waits: it returns None until the thumbnail is ready.
+
+    Attributes:
+        paths: Dict mapping a save file name to its latest thumbnail
+            path, None if the save could not be read.
+        surfaces: Dict mapping a thumbnail path to its loaded surface.
+    """
+    def __init__(self, save_folder=SAVE_FOLDER, thumb_folder=THUMB_FOLDER):
+        self.save_folder = save_folder
+        self.thumb_folder = thumb_folder
+        self.paths = {}
+        self.surfaces = {}
+        self._stamps = {}
+        self._pool = None
+
+    def refresh(self, filenames):
+        """Request thumbnails of saves that are new or changed on disk.
+
+        Args:
+            filenames: Save file names, most wanted first.
+        """
+        if self._pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._pool = ctx.Pool(1, initializer=_init_worker)
+        requested = False
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(self.save_folder, name))
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._stamps.get(name) == stamp:
+                continue
+            self._stamps[name] = stamp
+            self._pool.apply_async(build, (name, self.save_folder, self.thumb_folder),
+                                   callback=self._done)
+            requested = True
+        if requested:
+            self._pool.apply_async(prune, (self.save_folder, self.thumb_folder))
+        # Every overwrite of a save gets a new thumbnail path; only keep
+        # the surfaces of the latest ones.
+        live = set(self.paths.values())
+        for path in [p for p in self.surfaces if p not in live]:
+            del self.surfaces[path]
+
+    def _done(self, result):
+        name, path = result
+        self.paths[name] = path
+
+    def get(self, filename):
+        """Return the thumbnail surface of a save, or None if not ready."""
+        path = self.paths.get(filename)
+        if path is None:
+            return None
+        surface = self.surfaces.get(path)
+        if surface is None:
+            try:
+                surface = self.surfaces[path] = pygame.image.load(path)
+            except (pygame.error, FileNotFoundError):
+                return None
+        return surface
+
+    def close(self):
+        """Stop the worker process."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+
+if __name__ == "__main__":
+    _init_worker()
+    names = sorted(n for n in os.listdir(SAVE_FOLDER) if n.endswith(".sav"))
+    for name in names:
+        print(*build(name))
+    print(f"{prune()} stale thumbnails removed")
@@ -0,0 +1,248 @@
+"""Tuning harness for the heuristic weights in ai_logic.Config.
+
+Each candidate configuration plays paired AI-vs-AI games against the
+baseline on the same starts: once as blocker against the baseline mouse,
+once as mouse against the baseline blocker. Games are spread over a
+worker pool and over several board sizes. After every batch an SPRT
+decides whether the candidate holds the baseline's strength (H1: Elo
+difference ELO1) or is weaker (H0: ELO0). The report lists strength and
+per-move latency, and picks the cheapest configuration that holds.
+
+The opening book and learned model are switched off so only the
+heuristic weights are compared. The candidate learned=true rates the
+trained model against the heuristic instead; if the SPRT finds it holds,
+the model is marked accepted and best_wall plays it by default.
+
+Usage:
+    python tune.py top_k=5,8,15 alpha_cut=0.5,1.0 --sizes 11,13 --games 400
+    python tune.py learned=true
+"""
+import sys
+import os
+import math
+import time
+import random
+import itertools
+import multiprocessing
+import ai_logic
+import learned_eval
+from game import Game
+
+OBSTACLE_SHARE = 0.2
+ELO0 = -30.0
+ELO1 = 0.0
+ALPHA = 0.05
+BETA = 0.05
+MAX_MOVES = 400
+
+BASELINE = ai_logic.DEFAULT_CONFIG.replace(book=False, learned=False)
+
+
+def play_game(task):
+    """Play one game between a blocker and a mouse configuration.
+
+    Args:
+        task: Tuple of (size, seed, blocker_config, mouse_config).
+
+    Returns:
+        Tuple of (blocker_won, blocker_seconds, blocker_moves,
+        mouse_seconds, mouse_moves).
+    """
+    size, seed, blocker, mouse = task
+    random.seed(seed)
+    g = Game(w=size, h=size, n_obs=int(OBSTACLE_SHARE * size * size), auto_resolve=True)
+    spent = [0.0, 0.0]
+    moves = [0, 0]
+    while not g.over and sum(moves) < MAX_MOVES:
+        start = time.perf_counter()
+        if g.turn == 0:
+            cell = ai_logic.best_wall(g, g.pos, g.walls, blocker)
+        else:
+            cell = ai_logic.best_move_mouse(g, g.pos, g.walls, mouse)
+        spent[g.turn] += time.perf_counter() - start
+        moves[g.turn] += 1
+        if cell is None:
+            g.over, g.winner = True, "BLOCKER" if g.turn == 1 else "MOUSE"
+        elif g.turn == 0:
+            g.apply_blocker_wall(cell)
+        else:
+            g.apply_mouse_move(cell)
+    return g.winner == "BLOCKER", spent[0], moves[0], spent[1], moves[1]
+
+
+def expected_score(elo):
+    """Return the expected score of a side rated elo points higher."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo(score):
+    """Convert a score fraction into an Elo difference."""
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    return -400 * math.log10(1 / score - 1)
+
+
+def sprt(results, elo0=ELO0, elo1=ELO1, alpha=ALPHA, beta=BETA):
+    """Run a sequential probability ratio test on game results.
+
+    Uses the normal approximation of the log-likelihood ratio between
+    Elo differences elo0 (H0) and elo1 (H1).
+
+    Args:
+        results: List of per-game scores of the candidate (0 or 1).
+        elo0: Elo difference under H0 (default ELO0).
+        elo1: Elo difference under H1 (default ELO1).
+        alpha: False positive rate (default ALPHA).
+        beta: False negative rate (default BETA).
+
+    Returns:
+        Tuple of (verdict, llr) where verdict is "H0", "H1" or None while
+        undecided.
+    """
+    n = len(results)
+    if n < 2:
+        return None, 0.0
+    mean = sum(results) / n
+    var = sum((x - mean) ** 2 for x in results) / n
+    if var == 0:
+        return None, 0.0
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    llr = n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * var)
+    if llr >= math.log((1 - beta) / alpha):
+        return "H1", llr
+    if llr <= math.log(beta / (1 - alpha)):
+        return "H0", llr
+    return None, llr
+
+
+class Rating:
+    """Match results and latency of one candidate against the baseline.
+
+    Attributes:
+        config: Candidate configuration.
+        results: Candidate's score in each game.
+        blocker_time: Seconds the candidate spent as blocker.
+        blocker_moves: Moves the candidate played as blocker.
+        mouse_time: Seconds the candidate spent as mouse.
+        mouse_moves: Moves the candidate played as mouse.
+        verdict: SPRT verdict, None while undecided.
+        llr: Last log-likelihood ratio.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.results = []
+        self.blocker_time = self.mouse_time = 0.0
+        self.blocker_moves = self.mouse_moves = 0
+        self.verdict = None
+        self.llr = 0.0
+
+    def add(self, as_blocker, result):
+        """Record one game played by the candidate on either side."""
+        won, b_time, b_moves, m_time, m_moves = result
+        if as_blocker:
+            self.results.append(1 if won else 0)
+            self.blocker_time += b_time
+            self.blocker_moves += b_moves
+        else:
+            self.results.append(0 if won else 1)
+            self.mouse_time += m_time
+            self.mouse_moves += m_moves
+        self.verdict, self.llr = sprt(self.results)
+
+    def score(self):
+        """Return the candidate's mean score, 0.5 before any game."""
+        return sum(self.results) / len(self.results) if self.results else 0.5
+
+    def latency(self):
+        """Return mean (blocker, mouse) milliseconds per move."""
+        return (1000 * self.blocker_time / max(1, self.blocker_moves),
+                1000 * self.mouse_time / max(1, self.mouse_moves))
+
+
+def rate(config, sizes, max_games, pool, batch):
+    """Play paired games of a candidate against the baseline.
+
+    Stops as soon as the SPRT decides or after max_games games.
+
+    Args:
+        config: Candidate configuration.
+        sizes: Board sizes to cycle through.
+        max_games: Maximum number of games.
+        pool: multiprocessing.Pool or None to play in-process.
+        batch: Games per batch between SPRT checks.
+
+    Returns:
+        Rating of the candidate.
+    """
+    rating = Rating(config)
+    seeds = itertools.count()
+    while len(rating.results) < max_games and rating.verdict is None:
+        tasks, sides = [], []
+        for _ in range(batch // 2):
+            seed = next(seeds)
+            size = sizes[seed % len(sizes)]
+            tasks += [(size, seed, config, BASELINE), (size, seed, BASELINE, config)]
+            sides += [True, False]
+        results = pool.map(play_game, tasks) if pool else map(play_game, tasks)
+        for as_blocker, result in zip(sides, results):
+            rating.add(as_blocker, result)
+    return rating
+
+
+def grid(specs):
+    """Expand "field=v1,v2" specs into candidate configurations."""
+    axes = []
+    for spec in specs:
+        name, values = spec.split("=")
+        kind = type(getattr(BASELINE, name))
+        if kind is bool:
+            kind = lambda v: v.lower() in ("1", "true", "yes")
+        axes.append([(name, kind(v)) for v in values.split(",")])
+    return [BASELINE.replace(**dict(combo)) for combo in itertools.product(*axes)]
+
+
+def report(ratings):
+    """Print the ratings and return the cheapest configuration that holds."""
+    print(f"{'config':<60} {'games':>5} {'score':>6} {'elo':>6} {'sprt':>4} "
+          f"{'blk ms':>7} {'mouse ms':>8}")
+    holding = []
+    for r in ratings:
+        changed = {name: getattr(r.config, name) for name in ai_logic.Config.FIELDS
+                   if getattr(r.config, name) != getattr(BASELINE, name)}
+        blocker_ms, mouse_ms = r.latency()
+        label = ", ".join(f"{k}={v}" for k, v in changed.items()) or "baseline"
+        print(f"{label:<60} {len(r.results):>5} {r.score():>6.3f} {elo(r.score()):>6.0f} "
+              f"{r.verdict or '-':>4} {blocker_ms:>7.2f} {mouse_ms:>8.2f}")
+        if r.verdict == "H1":
+            holding.append((blocker_ms + mouse_ms, label, r.config))
+    if holding:
+        _, label, config = min(holding, key=lambda x: x[0])
+        print(f"cheapest configuration holding strength: {label}")
+        return config
+    print("no configuration held the baseline's strength")
+    return BASELINE
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--sizes": "11,13", "--games": "400", "--workers": str(os.cpu_count() or 1)}
+    for name in options:
+        if name in args:
+            i = args.index(name)
+            options[name] = args[i + 1]
+            del args[i:i + 2]
+    sizes = [int(s) for s in options["--sizes"].split(",")]
+    workers = int(options["--workers"])
+    candidates = grid(args) if args else [BASELINE]
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        ratings = [rate(c, sizes, int(options["--games"]), pool, max(2, 2 * workers))
+                   for c in candidates]
+    finally:
+        if pool:
+            pool.close()
+    report(ratings)
+    for r in ratings:
+        if r.config == BASELINE.replace(learned=True) and r.verdict == "H1":
+            learned_eval.accept_model()
+            print("learned model accepted for default play")
@@ -3,8 +3,12 @@
 This module provides reusable UI components for the game interface,
 including button rendering and layout utilities.
 """
+import math
 import pygame
+import hex_math
 from constants import COLOR_BTN_NORMAL, COLOR_BTN_ACTIVE, COLOR_BTN_HOVER, COLOR_BTN_BORDER, COLOR_WHITE
+from constants import (COLOR_BLACK, COLOR_WALL, COLOR_CELL_DEFAULT, COLOR_MOUSE_POS, COLOR_MSG_INFO,
+                       COLOR_VALID_MOVE, COLOR_INVALID_MOVE)
 
 def draw_button(screen, rect, text, font, mouse_pos, active=False, bg_color=None):
     """Draw a button with hover and active state support.
@@ -47,3 +51,56 @@ def get_centered_rect_y(y, screen_w, w=260, h=45):
         Pygame Rect centered horizontally at the given Y position.
     """
     return pygame.Rect(screen_w//2 - w//2, y, w, h)
+
+def is_valid_click(game, cell):
+    """Tell whether clicking cell is a legal move for the side to play.
+    
+    Args:
+        game: Game instance.
+        cell: Cell coordinates (q, r).
+    
+    Returns:
+        True if the human may play on cell now, False otherwise.
+    """
+    is_neighbor = cell in game.get_neighbors(*game.pos)
+    is_not_wall = cell not in game.walls
+    if game.mode == "PVP":
+        if game.turn == 0:
+            return is_not_wall and cell != game.pos
+        return is_neighbor and is_not_wall
+    if game.player_role == "BLOCKER":
+        return game.turn == 0 and is_not_wall and cell != game.pos
+    return game.turn == 1 and is_neighbor and is_not_wall
+
+def draw_board(screen, game, sz, center, hover=None, hint=None, mouse_img=None):
+    """Draw the hexagonal board of a game.
+    
+    Args:
+        screen: Pygame surface to draw on.
+        game: Game instance.
+        sz: Hexagon size (radius).
+        center: Tuple of (x, y) pixel coordinates of the board center.
+        hover: Cell under the mouse cursor, colored by move validity
+            (default None).
+        hint: Cell to highlight as a hint (default None).
+        mouse_img: Pygame surface drawn on the mouse's cell (default None).
+    """
+    cx, cy = center
+    for q, r in game.cells:
+        color = COLOR_CELL_DEFAULT
+        if (q, r) in game.walls: color = COLOR_WALL
+        if (q, r) == game.pos:   color = COLOR_MOUSE_POS
+        if (q, r) == hint:       color = COLOR_MSG_INFO
+        if (q, r) == hover and not game.over:
+            color = COLOR_VALID_MOVE if is_valid_click(game, (q, r)) else COLOR_INVALID_MOVE
+
+        px, py = hex_math.cell_to_pixel(q, r, game.w, game.h, sz, cx, cy)
+        pts = []
+        for i in range(6):
+            ang = math.radians(60 * i - 30)
+            pts.append((px + sz * math.cos(ang), py + sz * math.sin(ang)))
+        pygame.draw.polygon(screen, color, pts)
+        pygame.draw.polygon(screen, COLOR_BLACK, pts, 2)
+
+        if (q, r) == game.pos and mouse_img:
+            screen.blit(mouse_img, mouse_img.get_rect(center=(px, py)))